@@ -7,11 +7,10 @@
  * 职责：检测 B站发布成功 → 启动 PMO Agent 智能分析并创建 Linear Issue
  */
 
-const { spawn } = require('child_process');
+const { submitAgentJob } = require('../../pmo/lib/client');
 const fs = require('fs');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-bilibili');
 
-const PMO_DIR = '/Users/liuyishou/usr/pac/pmo';
-const CLAUDE_BIN = '/Users/liuyishou/.local/share/fnm/node-versions/v22.16.0/installation/bin/claude';
 const LOG_FILE = '/tmp/pmo-report-bilibili.log';
 
 function log(msg) {
@@ -24,7 +23,7 @@ process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
+    const hookData = trace.parse(input);
     main(hookData);
   } catch (e) {
     log(`Parse error: ${e.message}`);
@@ -75,7 +74,7 @@ function main(hookData) {
   };
 
   // 启动 PMO Agent 智能分析
-  callPmoAgent(event);
+  callPmoAgent(event).catch(e => log(`Schedule error: ${e.message}`));
 }
 
 /**
@@ -116,7 +115,7 @@ function parseBiliupCommand(command, output) {
 /**
  * 启动 PMO Agent 智能分析并创建 Linear Issue
  */
-function callPmoAgent(event) {
+async function callPmoAgent(event) {
   const biliLink = event.data.bvid
     ? `https://www.bilibili.com/video/${event.data.bvid}`
     : '（未获取到 BV 号）';
@@ -164,29 +163,23 @@ node ~/.claude/skills/api-linear/linear-cli.js create \\
 
 直接执行，不要询问确认。`;
 
-  // 移除 ANTHROPIC_API_KEY，让 claude 使用 Pro 订阅认证
-  const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
-
-  const child = spawn(CLAUDE_BIN, [
-    '--dangerously-skip-permissions',
-    '--model', 'haiku',
-    '--max-turns', '10',
-    '--disallowedTools', 'Skill'
-  ], {
-    cwd: PMO_DIR,
-    detached: true,
-    stdio: ['pipe', 'ignore', 'ignore'],
-    env: cleanEnv
+  const scheduled = await submitAgentJob({
+    kind: 'publish',
+    bu: event.bu,
+    sessionId: event.sessionId,
+    prompt,
+    args: [
+      '--model', 'haiku',
+      '--max-turns', '10',
+      '--disallowedTools', 'Skill'
+    ]
   });
 
-  child.stdin.write(prompt);
-  child.stdin.end();
-  child.unref();
-
-  log('PMO Agent spawned');
+  log(`PMO Agent job ${scheduled.result}: ${scheduled.id || ''}`);
 
   console.log(JSON.stringify({
     result: 'success',
-    message: 'PMO Agent spawned in background'
+    scheduled: scheduled.result,
+    message: 'PMO Agent job queued'
   }));
 }
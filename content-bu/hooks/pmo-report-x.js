@@ -6,19 +6,20 @@
  * 职责：检测 X 发布成功 → 上报 PMO
  */
 
-const { handleEvent } = require('/Users/liuyishou/usr/pac/pmo/lib/handler');
+const { dispatchEvent } = require('../../pmo/lib/client');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-x');
 
 let input = '';
 process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
-    main(hookData);
+    const hookData = trace.parse(input);
+    main(hookData).catch(() => {});
   } catch (e) {}
 });
 
-function main(hookData) {
+async function main(hookData) {
   const { tool_name, tool_input, tool_output, session_id } = hookData;
 
   // 只处理 Skill 工具且是 x-post
@@ -33,7 +34,7 @@ function main(hookData) {
   // 提取推文内容
   const content = tool_input?.args || tool_input?.text || '';
 
-  const result = handleEvent({
+  const result = await dispatchEvent({
     type: 'x_publish',
     bu: 'content',
     sessionId: session_id,
@@ -43,7 +44,7 @@ function main(hookData) {
     }
   });
 
-  if (result.result === 'created') {
-    console.log(`✅ PMO: X 发布 tracked - ${result.issue?.identifier}`);
+  if (result.result === 'created' || result.result === 'queued') {
+    console.log(`✅ PMO: X 发布 tracked - ${result.issue?.identifier || '已入队'}`);
   }
 }
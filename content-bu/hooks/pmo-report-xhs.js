@@ -7,11 +7,11 @@
  * 职责：检测发布成功 → 启动 PMO Agent 智能分析并创建 Linear Issue
  */
 
-const { spawn } = require('child_process');
+const { submitAgentJob, dispatchEvent } = require('../../pmo/lib/client');
+const classifier = require('../../pmo/lib/classifier');
 const fs = require('fs');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-xhs');
 
-const PMO_DIR = '/Users/liuyishou/usr/pac/pmo';
-const CLAUDE_BIN = '/Users/liuyishou/.local/share/fnm/node-versions/v22.16.0/installation/bin/claude';
 const LOG_FILE = '/tmp/pmo-report-xhs.log';
 
 function log(msg) {
@@ -24,7 +24,7 @@ process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
+    const hookData = trace.parse(input);
     main(hookData);
   } catch (e) {
     log(`Parse error: ${e.message}`);
@@ -79,8 +79,26 @@ function main(hookData) {
     }
   };
 
-  // 启动 PMO Agent 智能分析
-  callPmoAgent(event);
+  // 系列归属明确时由 handler 直接建 Issue，否则启动 PMO Agent 智能分析
+  const verdict = classifier.classify({
+    eventType: event.type,
+    bu: event.bu,
+    skill,
+    text: [publishInfo.title, publishInfo.tags.join(' '), publishInfo.content || ''].join('\n')
+  });
+
+  if (!verdict.spawnAgent && verdict.project) {
+    log(`Fast path: project=${verdict.project.name}, confidence=${verdict.confidence}`);
+    event.data.projectId = verdict.project.projectId;
+    event.data.labelIds = verdict.labels.map(l => l.id).filter(Boolean);
+    dispatchEvent(event).then(
+      (result) => console.log(JSON.stringify({ result: 'success', handledBy: 'rules', outcome: result?.result })),
+      (e) => log(`Dispatch error: ${e.message}`)
+    );
+    return;
+  }
+
+  callPmoAgent(event).catch(e => log(`Schedule error: ${e.message}`));
 }
 
 /**
@@ -148,7 +166,7 @@ function parsePublishArgs(args) {
  * 3. 智能提炼应该记录的内容
  * 4. 调用 /api-linear skill 创建 Issue
  */
-function callPmoAgent(event) {
+async function callPmoAgent(event) {
   const prompt = `你是 PMO 记录员，只负责创建 Linear Issue 来记录发布事件。
 
 ## 严格禁令
@@ -200,29 +218,23 @@ node ~/.claude/skills/api-linear/linear-cli.js link-doc --id C-xxx --prompt "模
 
 直接执行，不要询问确认。`;
 
-  // 移除 ANTHROPIC_API_KEY，让 claude 使用 Pro 订阅认证
-  const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
-
-  const child = spawn(CLAUDE_BIN, [
-    '--dangerously-skip-permissions',
-    '--model', 'haiku',
-    '--max-turns', '10',
-    '--disallowedTools', 'mcp__xiaohongshu-mcp*,Skill'
-  ], {
-    cwd: PMO_DIR,
-    detached: true,
-    stdio: ['pipe', 'ignore', 'ignore'],
-    env: cleanEnv
+  const scheduled = await submitAgentJob({
+    kind: 'publish',
+    bu: event.bu,
+    sessionId: event.sessionId,
+    prompt,
+    args: [
+      '--model', 'haiku',
+      '--max-turns', '10',
+      '--disallowedTools', 'mcp__xiaohongshu-mcp*,Skill'
+    ]
   });
 
-  child.stdin.write(prompt);
-  child.stdin.end();
-  child.unref();
-
-  log('PMO Agent spawned');
+  log(`PMO Agent job ${scheduled.result}: ${scheduled.id || ''}`);
 
   console.log(JSON.stringify({
     result: 'success',
-    message: 'PMO Agent spawned in background'
+    scheduled: scheduled.result,
+    message: 'PMO Agent job queued'
   }));
 }
@@ -0,0 +1,54 @@
+/**
+ * DuckDB CLI 封装
+ *
+ * Lakehouse 的读写都交给 duckdb 命令行（postgres 扩展直连 Supabase、COPY 写 Parquet），
+ * Node 这边只拼 SQL、解析 -json 输出，行数据不经过 JS。
+ *
+ * 依赖：PATH 里有 duckdb（或 LAKEHOUSE_DUCKDB_BIN 指定），首次使用会自动安装 postgres 扩展
+ */
+
+const { execFileSync } = require('child_process');
+
+const DUCKDB_BIN = process.env.LAKEHOUSE_DUCKDB_BIN || 'duckdb';
+
+/**
+ * SQL 字符串字面量（单引号转义）
+ */
+function sqlString(value) {
+  return `'${String(value).replace(/'/g, "''")}'`;
+}
+
+/**
+ * 执行一段 SQL（多条语句），返回每个结果集的行数组
+ *
+ * -json 模式下每个结果集输出为一个以 "[" 开头的 JSON 数组，无结果的语句（SET / ATTACH）不输出
+ *
+ * @param {string} sql
+ * @param {Object} [options]
+ * @param {string} [options.db] - 数据库文件，默认内存库
+ * @returns {Array<Array<Object>>}
+ */
+function run(sql, options = {}) {
+  let stdout;
+  try {
+    stdout = execFileSync(DUCKDB_BIN, ['-bail', '-json', options.db || ':memory:'], {
+      input: sql,
+      encoding: 'utf8',
+      maxBuffer: 64 * 1024 * 1024,
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+  } catch (e) {
+    const detail = (e.stderr || e.stdout || '').toString().trim();
+    throw new Error(`duckdb failed: ${detail || e.message}`);
+  }
+
+  const text = stdout.trim();
+  if (!text) return [];
+  return text.split(/\n(?=\[)/).map(chunk => JSON.parse(chunk));
+}
+
+module.exports = {
+  DUCKDB_BIN,
+  sqlString,
+  run
+};
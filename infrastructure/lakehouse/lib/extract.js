@@ -0,0 +1,95 @@
+/**
+ * 增量抽取：Supabase pac.<table> → append-only Parquet
+ *
+ * 每批一次 duckdb 调用：
+ * 1. postgres_query 把整条 keyset 查询原样下推到 Postgres（走 (updated_at, id) 索引，不扫全表）
+ *    WHERE (updated_at, id) > 水位 AND updated_at <= upper ORDER BY updated_at, id LIMIT batchRows
+ * 2. COPY 写 Parquet，按变更日期（上海时间）分区：<rawDir>/<table>/dt=YYYY-MM-DD/sync_<run>_<batch>_<i>.parquet
+ * 3. 返回本批行数和最后一行的 (updated_at, id)，调用方据此推进水位
+ *
+ * upper 是本轮开始时间减去安全延迟，只能挡住「提交比 updated_at 晚不到安全延迟」的事务：
+ * updated_at 取的是事务开始时间（NOW()），事务开始后超过安全延迟才提交、且此前水位已越过它的 updated_at，
+ * 这些行就会被 (updated_at, id) > 水位 永久跳过。pac 的写入都是 PostgREST / 触发器里的短事务，
+ * 默认 5 分钟足够；有更长的写事务时调大 LAKEHOUSE_SAFETY_LAG_SECONDS，怀疑漏行时用 --full 重建
+ */
+
+const path = require('path');
+const duckdb = require('./duckdb');
+
+// 分区日期与日报一致（pac.pmo_report_day 也按上海时间切天）
+const PARTITION_TZ = 'Asia/Shanghai';
+
+function keysetQuery(table, watermark, upper, batchRows) {
+  return `SELECT * FROM pac.${table}
+    WHERE (updated_at, id) > (${duckdb.sqlString(watermark.updatedAt)}::timestamptz, ${duckdb.sqlString(watermark.id)}::uuid)
+      AND updated_at <= ${duckdb.sqlString(upper)}::timestamptz
+    ORDER BY updated_at, id
+    LIMIT ${batchRows}`;
+}
+
+/**
+ * 抽取一批
+ *
+ * @returns {{rows: number, last: {updatedAt: string, id: string}|null}}
+ */
+function extractBatch({ table, pgUrl, rawDir, watermark, upper, batchRows, runId, batch, syncedAt }) {
+  const pattern = `sync_${runId}_${String(batch).padStart(4, '0')}_{i}`;
+  const results = duckdb.run(`
+SET TimeZone = 'UTC';
+INSTALL postgres;
+LOAD postgres;
+ATTACH ${duckdb.sqlString(pgUrl)} AS pg (TYPE postgres, READ_ONLY);
+CREATE TEMP TABLE batch AS
+  SELECT * FROM postgres_query('pg', ${duckdb.sqlString(keysetQuery(table, watermark, upper, batchRows))});
+COPY (
+  SELECT *,
+    TIMESTAMPTZ ${duckdb.sqlString(syncedAt)} AS _synced_at,
+    strftime(timezone('${PARTITION_TZ}', updated_at), '%Y-%m-%d') AS dt
+  FROM batch
+) TO ${duckdb.sqlString(path.join(rawDir, table))}
+  (FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY (dt), FILENAME_PATTERN ${duckdb.sqlString(pattern)}, OVERWRITE_OR_IGNORE true);
+SELECT
+  count(*) OVER () AS rows,
+  strftime(updated_at, '%Y-%m-%dT%H:%M:%S.%fZ') AS last_updated_at,
+  id::VARCHAR AS last_id
+FROM batch
+ORDER BY batch.updated_at DESC, id::VARCHAR DESC
+LIMIT 1;
+`);
+
+  // 空批次时最后一个 SELECT 没有行，只剩 COPY 的 Count
+  const last = results.map(r => r[0]).find(r => r && 'last_id' in r);
+  if (!last) return { rows: 0, last: null };
+  return { rows: Number(last.rows), last: { updatedAt: last.last_updated_at, id: last.last_id } };
+}
+
+/**
+ * 从水位开始逐批抽取，直到某批不满 batchRows
+ *
+ * @param {Object} options
+ * @param {Function} options.onBatch - ({rows, last}) => void，每批落盘后调用（推进并保存水位）
+ * @returns {{rows: number, batches: number}}
+ */
+function extractTable(options) {
+  let watermark = options.watermark;
+  const stats = { rows: 0, batches: 0 };
+
+  for (let batch = 1; ; batch++) {
+    const result = extractBatch({ ...options, watermark, batch });
+    if (result.rows === 0) break;
+
+    stats.rows += result.rows;
+    stats.batches++;
+    watermark = result.last;
+    options.onBatch(result);
+
+    if (result.rows < options.batchRows) break;
+  }
+  return stats;
+}
+
+module.exports = {
+  PARTITION_TZ,
+  keysetQuery,
+  extractTable
+};
@@ -0,0 +1,92 @@
+/**
+ * Parquet 存储维护：小文件合并 + DuckDB 视图
+ *
+ * 目录布局：<rawDir>/<table>/dt=YYYY-MM-DD/*.parquet
+ * - sync_*.parquet：每轮每批追加写入的变更行（同一 id 可能出现多次）
+ * - compact_*.parquet：合并结果，分区内每个 id 只保留当天最后一个版本
+ *
+ * 视图（<LAKEHOUSE_DIR>/lakehouse.duckdb）：
+ * - pac_changes.<table>：全部变更版本（带 dt / _synced_at），可看 content_posts 数据随天变化
+ * - pac.<table>：每个 id 的最新版本，与 Supabase 当前状态一致（删除除外）
+ */
+
+const fs = require('fs');
+const path = require('path');
+const duckdb = require('./duckdb');
+
+const LATEST_ORDER = 'ORDER BY updated_at DESC, _synced_at DESC';
+
+function listPartitions(tableDir) {
+  let entries = [];
+  try { entries = fs.readdirSync(tableDir, { withFileTypes: true }); } catch (e) { return []; }
+  return entries
+    .filter(d => d.isDirectory() && d.name.startsWith('dt='))
+    .map(d => {
+      const dir = path.join(tableDir, d.name);
+      const files = fs.readdirSync(dir).filter(n => n.endsWith('.parquet')).map(n => path.join(dir, n));
+      return { dir, files };
+    });
+}
+
+/**
+ * 合并一张表里文件数达到 minFiles 的分区
+ *
+ * 先写 .tmp 再 rename，最后删旧文件；删之前中断只会留下重复行，视图去重后不受影响
+ *
+ * @returns {{partitions: number, filesBefore: number, filesAfter: number}}
+ */
+function compactTable(rawDir, table, { minFiles, runId }) {
+  const stats = { partitions: 0, filesBefore: 0, filesAfter: 0 };
+
+  for (const { dir, files } of listPartitions(path.join(rawDir, table))) {
+    if (files.length < minFiles) continue;
+
+    const target = path.join(dir, `compact_${runId}.parquet`);
+    const tmp = `${target}.tmp`;
+    const list = files.map(duckdb.sqlString).join(', ');
+    duckdb.run(`
+COPY (
+  SELECT * FROM read_parquet([${list}], hive_partitioning = false, union_by_name = true)
+  QUALIFY row_number() OVER (PARTITION BY id ${LATEST_ORDER}) = 1
+  ORDER BY updated_at, id
+) TO ${duckdb.sqlString(tmp)} (FORMAT PARQUET, COMPRESSION ZSTD);
+`);
+    fs.renameSync(tmp, target);
+    for (const file of files) fs.unlinkSync(file);
+
+    stats.partitions++;
+    stats.filesBefore += files.length;
+    stats.filesAfter++;
+  }
+  return stats;
+}
+
+/**
+ * 重建视图；还没有任何 Parquet 的表跳过（read_parquet 空 glob 会报错）
+ *
+ * @returns {string[]} 建了视图的表
+ */
+function refreshViews(rawDir, dbFile, tables) {
+  const ready = tables.filter(t => listPartitions(path.join(rawDir, t)).some(p => p.files.length > 0));
+  if (ready.length === 0) return ready;
+
+  const statements = ['CREATE SCHEMA IF NOT EXISTS pac;', 'CREATE SCHEMA IF NOT EXISTS pac_changes;'];
+  for (const table of ready) {
+    const glob = path.join(rawDir, table, '*', '*.parquet');
+    statements.push(
+      `CREATE OR REPLACE VIEW pac_changes.${table} AS
+  SELECT * FROM read_parquet(${duckdb.sqlString(glob)}, hive_partitioning = true, union_by_name = true);`,
+      `CREATE OR REPLACE VIEW pac.${table} AS
+  SELECT * EXCLUDE (dt, _synced_at) FROM pac_changes.${table}
+  QUALIFY row_number() OVER (PARTITION BY id ${LATEST_ORDER}) = 1;`
+    );
+  }
+  duckdb.run(statements.join('\n'), { db: dbFile });
+  return ready;
+}
+
+module.exports = {
+  listPartitions,
+  compactTable,
+  refreshViews
+};
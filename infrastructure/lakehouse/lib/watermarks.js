@@ -0,0 +1,47 @@
+/**
+ * 每张表的同步水位
+ *
+ * 水位是最后一条已落盘行的 (updated_at, id)，下一批从它之后继续（keyset 分页），
+ * 每写完一批 Parquet 就推进一次：中途失败重跑只会重复最后一批，视图按 id 去重后结果不变。
+ *
+ * 文件格式：{ [table]: { updatedAt, id, rows, syncedAt } }，tmp 文件 + rename 原子写入
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+// 比任何真实行都早的起点：首次同步 / --full 从这里开始
+const INITIAL = Object.freeze({
+  updatedAt: '-infinity',
+  id: '00000000-0000-0000-0000-000000000000'
+});
+
+function load(file) {
+  try {
+    return JSON.parse(fs.readFileSync(file, 'utf8'));
+  } catch (e) {
+    return {};
+  }
+}
+
+function save(file, marks) {
+  fs.mkdirSync(path.dirname(file), { recursive: true });
+  const tmp = `${file}.${process.pid}.tmp`;
+  fs.writeFileSync(tmp, JSON.stringify(marks, null, 2));
+  fs.renameSync(tmp, file);
+}
+
+/**
+ * 取某张表的水位，没有记录时返回 INITIAL
+ */
+function get(marks, table) {
+  const mark = marks[table];
+  return mark ? { updatedAt: mark.updatedAt, id: mark.id } : { ...INITIAL };
+}
+
+module.exports = {
+  INITIAL,
+  load,
+  save,
+  get
+};
@@ -0,0 +1,349 @@
+-- PMO 事件表按月分区 + 预聚合汇总表
+--
+-- 1. pac.pmo_events 改为按 created_at 按月分区（UTC 月份边界），default 分区兜底
+-- 2. 五个单列索引换成与报表 / Dashboard 查询一致的复合索引
+-- 3. 语句级触发器增量维护两张汇总表（批量插入时每条语句只聚合一次）：
+--    - pac.pmo_events_daily：天（上海时间）× 事业部 × 事件类型 × 结论 的事件数
+--    - pac.pmo_sessions：每个 session 的首末事件时间、事件数、关联 Issue
+--
+-- 日报（23:00 / 23:55）和 CC Dashboard 读汇总表，不再扫明细
+
+-- ============================================
+-- 旧表改名，腾出名字（主键索引名也要让出来）
+-- ============================================
+
+ALTER TABLE pac.pmo_events RENAME TO pmo_events_unpartitioned;
+ALTER INDEX pac.pmo_events_pkey RENAME TO pmo_events_unpartitioned_pkey;
+DROP INDEX pac.idx_pmo_events_session;
+DROP INDEX pac.idx_pmo_events_type;
+DROP INDEX pac.idx_pmo_events_bu;
+DROP INDEX pac.idx_pmo_events_decision;
+DROP INDEX pac.idx_pmo_events_created_at;
+
+-- ============================================
+-- 分区表
+-- ============================================
+
+-- 分区键必须在主键里；created_at 不再允许为空
+CREATE TABLE pac.pmo_events (
+  id UUID NOT NULL DEFAULT gen_random_uuid(),
+  session_id TEXT NOT NULL,
+  event_type TEXT NOT NULL CHECK (event_type IN ('session_end', 'tool_use', 'subagent_start', 'subagent_stop', 'publish')),
+  bu TEXT CHECK (bu IN ('product', 'content', 'investment', 'research', 'pmo', 'unknown')),
+  cwd TEXT,
+  summary TEXT,
+  decision TEXT CHECK (decision IN ('reported', 'skipped', 'pending')),
+  linear_issue_id TEXT,
+  transcript_path TEXT,
+  metadata JSONB DEFAULT '{}',
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- 没有对应月份分区的行先落到这里，ensure_pmo_events_partition 建分区时会搬走
+CREATE TABLE pac.pmo_events_default PARTITION OF pac.pmo_events DEFAULT;
+
+-- 创建某个月的分区（幂等）；default 分区里已有该月数据时先搬出来再挂载，否则 ATTACH 会失败
+-- 直接对分区做 DELETE / INSERT 不会触发父表上的语句级触发器，汇总表不受影响
+CREATE OR REPLACE FUNCTION pac.ensure_pmo_events_partition(p_month DATE)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+DECLARE
+  v_from TIMESTAMPTZ := date_trunc('month', p_month::timestamp) AT TIME ZONE 'UTC';
+  v_to TIMESTAMPTZ := (date_trunc('month', p_month::timestamp) + INTERVAL '1 month') AT TIME ZONE 'UTC';
+  v_name TEXT := 'pmo_events_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+  IF to_regclass(format('pac.%I', v_name)) IS NOT NULL THEN
+    RETURN v_name;
+  END IF;
+
+  EXECUTE format('CREATE TABLE pac.%I (LIKE pac.pmo_events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+  EXECUTE format(
+    'WITH moved AS (DELETE FROM pac.pmo_events_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+     INSERT INTO pac.%I SELECT * FROM moved',
+    v_from, v_to, v_name
+  );
+  EXECUTE format('ALTER TABLE pac.pmo_events ATTACH PARTITION pac.%I FOR VALUES FROM (%L) TO (%L)', v_name, v_from, v_to);
+  RETURN v_name;
+END;
+$$;
+
+-- 当月 + 未来 p_ahead 个月；Scanner 每轮调用一次（rpc/ensure_pmo_events_partitions）
+CREATE OR REPLACE FUNCTION pac.ensure_pmo_events_partitions(p_ahead INT DEFAULT 2)
+RETURNS SETOF TEXT
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+  SELECT pac.ensure_pmo_events_partition((date_trunc('month', NOW() AT TIME ZONE 'UTC') + make_interval(months => m))::date)
+  FROM generate_series(0, p_ahead) AS m;
+$$;
+
+-- 旧数据涉及的月份 + 当前及未来两个月
+SELECT pac.ensure_pmo_events_partition(month)
+FROM (
+  SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date AS month
+  FROM pac.pmo_events_unpartitioned
+  WHERE created_at IS NOT NULL
+) months;
+SELECT pac.ensure_pmo_events_partitions(2);
+
+INSERT INTO pac.pmo_events (id, session_id, event_type, bu, cwd, summary, decision, linear_issue_id, transcript_path, metadata, created_at)
+SELECT id, session_id, event_type, bu, cwd, summary, decision, linear_issue_id, transcript_path, metadata, COALESCE(created_at, NOW())
+FROM pac.pmo_events_unpartitioned;
+
+DROP TABLE pac.pmo_events_unpartitioned;
+
+-- ============================================
+-- 复合索引（建在父表上，自动下推到每个分区）
+-- ============================================
+
+-- session → Issue 关联、单个 session 的事件时间线
+CREATE INDEX idx_pmo_events_session_created ON pac.pmo_events (session_id, created_at DESC);
+-- Dashboard 按事业部的事件流
+CREATE INDEX idx_pmo_events_bu_created ON pac.pmo_events (bu, created_at DESC) INCLUDE (event_type, decision);
+-- 按类型 / 结论筛选（如待处理的 pending、某类发布）
+CREATE INDEX idx_pmo_events_type_decision_created ON pac.pmo_events (event_type, decision, created_at DESC);
+-- 全部事业部的最新事件流（分区间 Merge Append 需要）
+CREATE INDEX idx_pmo_events_created ON pac.pmo_events (created_at DESC);
+
+-- ============================================
+-- 汇总表
+-- ============================================
+
+-- 报表按上海时间切天
+CREATE OR REPLACE FUNCTION pac.pmo_report_day(ts TIMESTAMPTZ)
+RETURNS DATE
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT (ts AT TIME ZONE 'Asia/Shanghai')::date;
+$$;
+
+-- bu / decision 为空时分别记为 'unknown' / 'none'
+CREATE TABLE pac.pmo_events_daily (
+  day DATE NOT NULL,
+  bu TEXT NOT NULL,
+  event_type TEXT NOT NULL,
+  decision TEXT NOT NULL,
+  events BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (day, bu, event_type, decision)
+);
+
+CREATE TABLE pac.pmo_sessions (
+  session_id TEXT PRIMARY KEY,
+  bu TEXT,
+  first_at TIMESTAMPTZ NOT NULL,
+  last_at TIMESTAMPTZ NOT NULL,
+  events BIGINT NOT NULL DEFAULT 0,
+  linear_issue_id TEXT,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_pmo_sessions_last_at ON pac.pmo_sessions (last_at DESC);
+CREATE INDEX idx_pmo_sessions_bu_last_at ON pac.pmo_sessions (bu, last_at DESC);
+
+-- 用现有明细回填
+INSERT INTO pac.pmo_events_daily (day, bu, event_type, decision, events)
+SELECT pac.pmo_report_day(created_at), COALESCE(bu, 'unknown'), event_type, COALESCE(decision, 'none'), count(*)
+FROM pac.pmo_events
+GROUP BY 1, 2, 3, 4;
+
+INSERT INTO pac.pmo_sessions (session_id, bu, first_at, last_at, events, linear_issue_id)
+SELECT
+  session_id,
+  (array_agg(bu ORDER BY created_at DESC) FILTER (WHERE bu IS NOT NULL))[1],
+  min(created_at),
+  max(created_at),
+  count(*),
+  (array_agg(linear_issue_id ORDER BY created_at DESC) FILTER (WHERE linear_issue_id IS NOT NULL))[1]
+FROM pac.pmo_events
+GROUP BY session_id;
+
+-- ============================================
+-- 增量维护（语句级触发器 + 转换表）
+-- ============================================
+
+-- 按 session 从明细重算（UPDATE / DELETE 走这里，首末时间无法按差量维护）
+CREATE OR REPLACE FUNCTION pac.refresh_pmo_sessions(p_session_ids TEXT[])
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+  DELETE FROM pac.pmo_sessions s
+  WHERE s.session_id = ANY(p_session_ids)
+    AND NOT EXISTS (SELECT 1 FROM pac.pmo_events e WHERE e.session_id = s.session_id);
+
+  INSERT INTO pac.pmo_sessions AS s (session_id, bu, first_at, last_at, events, linear_issue_id)
+  SELECT
+    session_id,
+    (array_agg(bu ORDER BY created_at DESC) FILTER (WHERE bu IS NOT NULL))[1],
+    min(created_at),
+    max(created_at),
+    count(*),
+    (array_agg(linear_issue_id ORDER BY created_at DESC) FILTER (WHERE linear_issue_id IS NOT NULL))[1]
+  FROM pac.pmo_events
+  WHERE session_id = ANY(p_session_ids)
+  GROUP BY session_id
+  ORDER BY session_id
+  ON CONFLICT (session_id) DO UPDATE SET
+    bu = EXCLUDED.bu,
+    first_at = EXCLUDED.first_at,
+    last_at = EXCLUDED.last_at,
+    events = EXCLUDED.events,
+    linear_issue_id = EXCLUDED.linear_issue_id,
+    updated_at = NOW();
+$$;
+
+-- 插入：按批聚合后 upsert；按主键排序，避免并发批次互相死锁
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  INSERT INTO pac.pmo_events_daily AS d (day, bu, event_type, decision, events)
+  SELECT pac.pmo_report_day(created_at), COALESCE(bu, 'unknown'), event_type, COALESCE(decision, 'none'), count(*)
+  FROM new_rows
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 2, 3, 4
+  ON CONFLICT (day, bu, event_type, decision)
+  DO UPDATE SET events = d.events + EXCLUDED.events, updated_at = NOW();
+
+  INSERT INTO pac.pmo_sessions AS s (session_id, bu, first_at, last_at, events, linear_issue_id)
+  SELECT
+    session_id,
+    (array_agg(bu ORDER BY created_at DESC) FILTER (WHERE bu IS NOT NULL))[1],
+    min(created_at),
+    max(created_at),
+    count(*),
+    (array_agg(linear_issue_id ORDER BY created_at DESC) FILTER (WHERE linear_issue_id IS NOT NULL))[1]
+  FROM new_rows
+  GROUP BY session_id
+  ORDER BY session_id
+  ON CONFLICT (session_id) DO UPDATE SET
+    bu = COALESCE(EXCLUDED.bu, s.bu),
+    first_at = LEAST(s.first_at, EXCLUDED.first_at),
+    last_at = GREATEST(s.last_at, EXCLUDED.last_at),
+    events = s.events + EXCLUDED.events,
+    linear_issue_id = COALESCE(EXCLUDED.linear_issue_id, s.linear_issue_id),
+    updated_at = NOW();
+
+  RETURN NULL;
+END;
+$$;
+
+-- 更新（如 pending → reported）：日汇总按差量调整，session 重算
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  INSERT INTO pac.pmo_events_daily AS d (day, bu, event_type, decision, events)
+  SELECT day, bu, event_type, decision, sum(delta)
+  FROM (
+    SELECT pac.pmo_report_day(created_at) AS day, COALESCE(bu, 'unknown') AS bu, event_type, COALESCE(decision, 'none') AS decision, -1 AS delta
+    FROM old_rows
+    UNION ALL
+    SELECT pac.pmo_report_day(created_at), COALESCE(bu, 'unknown'), event_type, COALESCE(decision, 'none'), 1
+    FROM new_rows
+  ) changes
+  GROUP BY 1, 2, 3, 4
+  HAVING sum(delta) <> 0
+  ORDER BY 1, 2, 3, 4
+  ON CONFLICT (day, bu, event_type, decision)
+  DO UPDATE SET events = d.events + EXCLUDED.events, updated_at = NOW();
+
+  DELETE FROM pac.pmo_events_daily
+  WHERE events <= 0
+    AND day IN (SELECT pac.pmo_report_day(created_at) FROM old_rows);
+
+  PERFORM pac.refresh_pmo_sessions(ARRAY(SELECT session_id FROM old_rows UNION SELECT session_id FROM new_rows));
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_delete()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  UPDATE pac.pmo_events_daily d
+  SET events = d.events - removed.events, updated_at = NOW()
+  FROM (
+    SELECT pac.pmo_report_day(created_at) AS day, COALESCE(bu, 'unknown') AS bu, event_type, COALESCE(decision, 'none') AS decision, count(*) AS events
+    FROM old_rows
+    GROUP BY 1, 2, 3, 4
+  ) removed
+  WHERE d.day = removed.day AND d.bu = removed.bu AND d.event_type = removed.event_type AND d.decision = removed.decision;
+
+  DELETE FROM pac.pmo_events_daily
+  WHERE events <= 0
+    AND day IN (SELECT pac.pmo_report_day(created_at) FROM old_rows);
+
+  PERFORM pac.refresh_pmo_sessions(ARRAY(SELECT DISTINCT session_id FROM old_rows));
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_truncate()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  TRUNCATE pac.pmo_events_daily, pac.pmo_sessions;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER pmo_events_rollup_insert
+  AFTER INSERT ON pac.pmo_events
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION pac.pmo_events_rollup_insert();
+
+CREATE TRIGGER pmo_events_rollup_update
+  AFTER UPDATE ON pac.pmo_events
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION pac.pmo_events_rollup_update();
+
+CREATE TRIGGER pmo_events_rollup_delete
+  AFTER DELETE ON pac.pmo_events
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION pac.pmo_events_rollup_delete();
+
+CREATE TRIGGER pmo_events_rollup_truncate
+  AFTER TRUNCATE ON pac.pmo_events
+  FOR EACH STATEMENT EXECUTE FUNCTION pac.pmo_events_rollup_truncate();
+
+-- ============================================
+-- RLS / 授权
+-- ============================================
+
+ALTER TABLE pac.pmo_events ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow all for anon" ON pac.pmo_events FOR ALL USING (true);
+
+-- 汇总表只由触发器写入
+ALTER TABLE pac.pmo_events_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE pac.pmo_sessions ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow read for anon" ON pac.pmo_events_daily FOR SELECT USING (true);
+CREATE POLICY "Allow read for anon" ON pac.pmo_sessions FOR SELECT USING (true);
+
+GRANT ALL ON pac.pmo_events TO anon, authenticated;
+GRANT SELECT ON pac.pmo_events_daily, pac.pmo_sessions TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION pac.ensure_pmo_events_partitions(INT) TO anon, authenticated;
+
+COMMENT ON TABLE pac.pmo_events IS 'PMO 事件留痕：记录所有 Agent session 的活动（按月分区）';
+COMMENT ON TABLE pac.pmo_events_daily IS 'pmo_events 日汇总：天（上海时间）× 事业部 × 事件类型 × 结论，触发器增量维护';
+COMMENT ON TABLE pac.pmo_sessions IS 'pmo_events 按 session 汇总：首末事件时间、事件数、关联 Issue，触发器增量维护';
@@ -0,0 +1,47 @@
+-- pac 表变更追踪：updated_at + 触发器
+--
+-- Lakehouse Sync 按 (updated_at, id) 水位增量拉取：
+-- - 插入时 updated_at 取默认值 NOW()
+-- - 原地更新（如 content_posts 的 views / likes / tracked_at）由触发器刷新 updated_at
+-- - (updated_at, id) 索引支撑 keyset 分页
+--
+-- 已有行的 updated_at 为本迁移执行时间（加列默认值，不重写表）；首次同步本来就是全量
+-- 删除不会被追踪，需要时用 lakehouse-sync.js --full 重建
+
+CREATE OR REPLACE FUNCTION pac.set_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END;
+$$;
+
+-- bu_artifacts
+ALTER TABLE pac.bu_artifacts ADD COLUMN updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX idx_bu_artifacts_updated ON pac.bu_artifacts (updated_at, id);
+CREATE TRIGGER bu_artifacts_set_updated_at
+  BEFORE UPDATE ON pac.bu_artifacts
+  FOR EACH ROW EXECUTE FUNCTION pac.set_updated_at();
+
+-- content_posts
+ALTER TABLE pac.content_posts ADD COLUMN updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX idx_content_posts_updated ON pac.content_posts (updated_at, id);
+CREATE TRIGGER content_posts_set_updated_at
+  BEFORE UPDATE ON pac.content_posts
+  FOR EACH ROW EXECUTE FUNCTION pac.set_updated_at();
+
+-- investment_trades
+ALTER TABLE pac.investment_trades ADD COLUMN updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX idx_investment_trades_updated ON pac.investment_trades (updated_at, id);
+CREATE TRIGGER investment_trades_set_updated_at
+  BEFORE UPDATE ON pac.investment_trades
+  FOR EACH ROW EXECUTE FUNCTION pac.set_updated_at();
+
+-- pmo_events（分区表：列、索引、行级触发器都建在父表上，自动下推到各分区）
+ALTER TABLE pac.pmo_events ADD COLUMN updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+CREATE INDEX idx_pmo_events_updated ON pac.pmo_events (updated_at, id);
+CREATE TRIGGER pmo_events_set_updated_at
+  BEFORE UPDATE ON pac.pmo_events
+  FOR EACH ROW EXECUTE FUNCTION pac.set_updated_at();
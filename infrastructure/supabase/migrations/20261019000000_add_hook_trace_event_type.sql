@@ -0,0 +1,11 @@
+-- pac.pmo_events 增加 hook_trace 事件类型
+--
+-- hook 开启 PMO_TRACE_EVENTS=1 时，每次调用结束写一行（见 pmo/lib/tracing.js）：
+-- - session_id / bu：hook 收到的 session 与投递的事业部
+-- - metadata：{ hook, trace, ms, matched, spans: [{ span, at, ms, ... }] }
+--
+-- 与其他事件一样计入 pmo_events_daily / pmo_sessions.events；日报与 Dashboard 按 event_type 过滤
+
+ALTER TABLE pac.pmo_events DROP CONSTRAINT pmo_events_event_type_check;
+ALTER TABLE pac.pmo_events ADD CONSTRAINT pmo_events_event_type_check
+  CHECK (event_type IN ('session_end', 'tool_use', 'subagent_start', 'subagent_stop', 'publish', 'hook_trace'));
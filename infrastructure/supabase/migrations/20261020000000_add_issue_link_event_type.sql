@@ -0,0 +1,144 @@
+-- pac.pmo_events 增加 issue_link 事件类型：session → Linear Issue 关联
+--
+-- handler 建 Issue 提交后写一行（见 pmo/lib/spool.js 的 linkCreated）：
+-- - session_id / bu / summary（Issue 标题）/ linear_issue_id，decision 为空
+--
+-- 汇总触发器不把 issue_link 计入 pmo_events_daily 和 pmo_sessions.events，
+-- pmo_sessions.linear_issue_id 照常取最新一条
+
+ALTER TABLE pac.pmo_events DROP CONSTRAINT pmo_events_event_type_check;
+ALTER TABLE pac.pmo_events ADD CONSTRAINT pmo_events_event_type_check
+  CHECK (event_type IN ('session_end', 'tool_use', 'subagent_start', 'subagent_stop', 'publish', 'hook_trace', 'issue_link'));
+
+-- ============================================
+-- 汇总触发器：排除 issue_link
+-- ============================================
+
+CREATE OR REPLACE FUNCTION pac.refresh_pmo_sessions(p_session_ids TEXT[])
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+  DELETE FROM pac.pmo_sessions s
+  WHERE s.session_id = ANY(p_session_ids)
+    AND NOT EXISTS (SELECT 1 FROM pac.pmo_events e WHERE e.session_id = s.session_id);
+
+  INSERT INTO pac.pmo_sessions AS s (session_id, bu, first_at, last_at, events, linear_issue_id)
+  SELECT
+    session_id,
+    (array_agg(bu ORDER BY created_at DESC) FILTER (WHERE bu IS NOT NULL))[1],
+    min(created_at),
+    max(created_at),
+    count(*) FILTER (WHERE event_type <> 'issue_link'),
+    (array_agg(linear_issue_id ORDER BY created_at DESC) FILTER (WHERE linear_issue_id IS NOT NULL))[1]
+  FROM pac.pmo_events
+  WHERE session_id = ANY(p_session_ids)
+  GROUP BY session_id
+  ORDER BY session_id
+  ON CONFLICT (session_id) DO UPDATE SET
+    bu = EXCLUDED.bu,
+    first_at = EXCLUDED.first_at,
+    last_at = EXCLUDED.last_at,
+    events = EXCLUDED.events,
+    linear_issue_id = EXCLUDED.linear_issue_id,
+    updated_at = NOW();
+$$;
+
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_insert()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  INSERT INTO pac.pmo_events_daily AS d (day, bu, event_type, decision, events)
+  SELECT pac.pmo_report_day(created_at), COALESCE(bu, 'unknown'), event_type, COALESCE(decision, 'none'), count(*)
+  FROM new_rows
+  WHERE event_type <> 'issue_link'
+  GROUP BY 1, 2, 3, 4
+  ORDER BY 1, 2, 3, 4
+  ON CONFLICT (day, bu, event_type, decision)
+  DO UPDATE SET events = d.events + EXCLUDED.events, updated_at = NOW();
+
+  INSERT INTO pac.pmo_sessions AS s (session_id, bu, first_at, last_at, events, linear_issue_id)
+  SELECT
+    session_id,
+    (array_agg(bu ORDER BY created_at DESC) FILTER (WHERE bu IS NOT NULL))[1],
+    min(created_at),
+    max(created_at),
+    count(*) FILTER (WHERE event_type <> 'issue_link'),
+    (array_agg(linear_issue_id ORDER BY created_at DESC) FILTER (WHERE linear_issue_id IS NOT NULL))[1]
+  FROM new_rows
+  GROUP BY session_id
+  ORDER BY session_id
+  ON CONFLICT (session_id) DO UPDATE SET
+    bu = COALESCE(EXCLUDED.bu, s.bu),
+    first_at = LEAST(s.first_at, EXCLUDED.first_at),
+    last_at = GREATEST(s.last_at, EXCLUDED.last_at),
+    events = s.events + EXCLUDED.events,
+    linear_issue_id = COALESCE(EXCLUDED.linear_issue_id, s.linear_issue_id),
+    updated_at = NOW();
+
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_update()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  INSERT INTO pac.pmo_events_daily AS d (day, bu, event_type, decision, events)
+  SELECT day, bu, event_type, decision, sum(delta)
+  FROM (
+    SELECT pac.pmo_report_day(created_at) AS day, COALESCE(bu, 'unknown') AS bu, event_type, COALESCE(decision, 'none') AS decision, -1 AS delta
+    FROM old_rows
+    WHERE event_type <> 'issue_link'
+    UNION ALL
+    SELECT pac.pmo_report_day(created_at), COALESCE(bu, 'unknown'), event_type, COALESCE(decision, 'none'), 1
+    FROM new_rows
+    WHERE event_type <> 'issue_link'
+  ) changes
+  GROUP BY 1, 2, 3, 4
+  HAVING sum(delta) <> 0
+  ORDER BY 1, 2, 3, 4
+  ON CONFLICT (day, bu, event_type, decision)
+  DO UPDATE SET events = d.events + EXCLUDED.events, updated_at = NOW();
+
+  DELETE FROM pac.pmo_events_daily
+  WHERE events <= 0
+    AND day IN (SELECT pac.pmo_report_day(created_at) FROM old_rows);
+
+  PERFORM pac.refresh_pmo_sessions(ARRAY(SELECT session_id FROM old_rows UNION SELECT session_id FROM new_rows));
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION pac.pmo_events_rollup_delete()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = pac, pg_temp
+AS $$
+BEGIN
+  UPDATE pac.pmo_events_daily d
+  SET events = d.events - removed.events, updated_at = NOW()
+  FROM (
+    SELECT pac.pmo_report_day(created_at) AS day, COALESCE(bu, 'unknown') AS bu, event_type, COALESCE(decision, 'none') AS decision, count(*) AS events
+    FROM old_rows
+    WHERE event_type <> 'issue_link'
+    GROUP BY 1, 2, 3, 4
+  ) removed
+  WHERE d.day = removed.day AND d.bu = removed.bu AND d.event_type = removed.event_type AND d.decision = removed.decision;
+
+  DELETE FROM pac.pmo_events_daily
+  WHERE events <= 0
+    AND day IN (SELECT pac.pmo_report_day(created_at) FROM old_rows);
+
+  PERFORM pac.refresh_pmo_sessions(ARRAY(SELECT DISTINCT session_id FROM old_rows));
+  RETURN NULL;
+END;
+$$;
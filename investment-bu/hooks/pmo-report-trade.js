@@ -6,19 +6,20 @@
  * 职责：检测交易执行 → 上报 PMO
  */
 
-const { handleEvent } = require('/Users/liuyishou/usr/pac/pmo/lib/handler');
+const { dispatchEvent } = require('../../pmo/lib/client');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-trade');
 
 let input = '';
 process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
-    main(hookData);
+    const hookData = trace.parse(input);
+    main(hookData).catch(() => {});
   } catch (e) {}
 });
 
-function main(hookData) {
+async function main(hookData) {
   const { tool_name, tool_input, tool_output, session_id } = hookData;
 
   // 只处理 Skill 工具且是 futu-trades
@@ -31,7 +32,7 @@ function main(hookData) {
   // 只追踪实际交易，不追踪查询
   if (!output.includes('买入') && !output.includes('卖出') && !output.includes('成交')) return;
 
-  const result = handleEvent({
+  const result = await dispatchEvent({
     type: 'trade',
     bu: 'investment',
     sessionId: session_id,
@@ -40,7 +41,7 @@ function main(hookData) {
     }
   });
 
-  if (result.result === 'created') {
-    console.log(`✅ PMO: 交易 tracked - ${result.issue?.identifier}`);
+  if (result.result === 'created' || result.result === 'queued') {
+    console.log(`✅ PMO: 交易 tracked - ${result.issue?.identifier || '已入队'}`);
   }
 }
@@ -0,0 +1,212 @@
+#!/usr/bin/env node
+/**
+ * 压测：PMO Agent 调度队列 vs 每事件直接 spawn
+ *
+ * 时间线（时间按比例压缩）：
+ * - SESSIONS 个产品 session，各自连续触发 7 个 superpower 事件，结束时各一次 session_end
+ * - 期间内容事业部先后到达 2 个 session_end、2 条小红书发布，另有 1 条交易
+ *   （第二个内容 session_end 比发布先到，但应排在发布之后执行）
+ *
+ * 两种模式都用 fake-agent.js 代替 claude，按假 Agent 的实际起止时间统计：
+ * - direct：每个事件立即 spawn（旧行为）
+ * - scheduled：经 agent-scheduler 排队（全局 / 事业部上限 + 防抖合并 + 优先级）
+ *
+ * 最后做一次重启检查：队列和 inbox 中的任务在新进程里全部被执行
+ *
+ * 用法：node pmo/bench/agent-scheduler.js [sessions] [agentMs] [stepMs]
+ */
+
+const { spawn, fork } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const SESSIONS = Number(process.argv[2]) || 3;
+const AGENT_MS = Number(process.argv[3]) || 300;
+const STEP_MS = Number(process.argv[4]) || 80;
+
+const WORK_DIR = process.env.BENCH_WORK_DIR || fs.mkdtempSync(path.join(os.tmpdir(), 'pmo-bench-agents-'));
+const FAKE_AGENT = path.join(__dirname, 'fake-agent.js');
+const AGENT_LOG = path.join(WORK_DIR, 'fake-agent.jsonl');
+
+Object.assign(process.env, {
+  PMO_AGENT_DIR: path.join(WORK_DIR, 'agents'),
+  PMO_AGENT_LOG: path.join(WORK_DIR, 'scheduler.log'),
+  PMO_AGENT_CMD: `${process.execPath} ${FAKE_AGENT}`,
+  PMO_AGENT_DEBOUNCE_MS: String(STEP_MS * 4),
+  PMO_AGENT_MAX_DELAY_MS: String(STEP_MS * 40),
+  FAKE_AGENT_MS: String(AGENT_MS),
+  FAKE_AGENT_LOG: AGENT_LOG
+});
+
+const SUPERPOWERS = [
+  'brainstorming', 'writing-plans', 'using-git-worktrees', 'test-driven-development',
+  'requesting-code-review', 'verification-before-completion', 'finishing-a-development-branch'
+];
+
+const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+
+/**
+ * 生成事件时间线：[{ at, job }]
+ */
+function timeline() {
+  const items = [];
+  for (let s = 0; s < SESSIONS; s++) {
+    const sessionId = `bench-product-${s}`;
+    SUPERPOWERS.forEach((skill, i) => {
+      items.push({
+        at: (s * 2 + i) * STEP_MS,
+        job: { kind: 'superpower', bu: 'product', sessionId, event: { type: 'superpower_event', skill: `superpowers:${skill}`, sessionId } }
+      });
+    });
+    items.push({
+      at: (s * 2 + SUPERPOWERS.length + 1) * STEP_MS,
+      job: { kind: 'session_end', bu: 'product', sessionId, prompt: `session_end ${sessionId}` }
+    });
+  }
+  const mid = SUPERPOWERS.length * STEP_MS;
+  items.push({ at: mid - 2 * STEP_MS, job: { kind: 'session_end', bu: 'content', sessionId: 'bench-content-0', prompt: 'session_end content 0' } });
+  items.push({ at: mid - STEP_MS, job: { kind: 'session_end', bu: 'content', sessionId: 'bench-content-1', prompt: 'session_end content 1' } });
+  items.push({ at: mid, job: { kind: 'publish', bu: 'content', sessionId: 'bench-xhs-0', prompt: 'xhs publish 0' } });
+  items.push({ at: mid, job: { kind: 'publish', bu: 'content', sessionId: 'bench-xhs-1', prompt: 'xhs publish 1' } });
+  items.push({ at: mid + STEP_MS, job: { kind: 'trade', bu: 'investment', sessionId: 'bench-trade-0', prompt: 'futu trade' } });
+  return items.sort((a, b) => a.at - b.at);
+}
+
+function readAgentLog() {
+  if (!fs.existsSync(AGENT_LOG)) return [];
+  return fs.readFileSync(AGENT_LOG, 'utf8').trim().split('\n').filter(Boolean).map(l => JSON.parse(l));
+}
+
+function peakConcurrency(runs) {
+  const edges = [];
+  for (const r of runs) edges.push([r.started, 1], [r.finished, -1]);
+  edges.sort((a, b) => a[0] - b[0] || a[1] - b[1]);
+  let current = 0;
+  let peak = 0;
+  for (const [, delta] of edges) {
+    current += delta;
+    peak = Math.max(peak, current);
+  }
+  return peak;
+}
+
+async function replay(submit) {
+  fs.rmSync(AGENT_LOG, { force: true });
+  const start = Date.now();
+  for (const { at, job } of timeline()) {
+    const wait = start + at - Date.now();
+    if (wait > 0) await sleep(wait);
+    submit(job);
+  }
+  return start;
+}
+
+async function runDirect() {
+  const children = [];
+  const start = await replay((job) => {
+    const child = spawn(process.execPath, [FAKE_AGENT], { stdio: ['pipe', 'ignore', 'ignore'] });
+    child.stdin.end(job.prompt || JSON.stringify(job.event));
+    children.push(new Promise(r => child.on('close', r)));
+  });
+  await Promise.all(children);
+  const runs = readAgentLog();
+  return {
+    mode: 'direct',
+    events: timeline().length,
+    agents: runs.length,
+    peakConcurrent: peakConcurrency(runs),
+    wallMs: Math.max(...runs.map(r => r.finished)) - start
+  };
+}
+
+async function runScheduled() {
+  const scheduler = require('../lib/agent-scheduler');
+  const jobs = new Map();
+  scheduler.start();
+  const start = await replay((job) => {
+    const { id } = scheduler.enqueue(job);
+    jobs.set(id, job);
+  });
+
+  while (scheduler.getStats().depth.queued + scheduler.getStats().depth.running > 0) await sleep(50);
+  const stats = scheduler.getStats();
+  scheduler.stop();
+
+  const runs = readAgentLog();
+  const order = runs.sort((a, b) => a.started - b.started).map(r => jobs.get(r.jobId));
+  const position = (sessionId) => order.findIndex(j => j.sessionId === sessionId);
+
+  return {
+    row: {
+      mode: 'scheduled',
+      events: timeline().length,
+      agents: runs.length,
+      peakConcurrent: peakConcurrency(runs),
+      wallMs: Math.max(...runs.map(r => r.finished)) - start
+    },
+    detail: {
+      merged: stats.merged,
+      waitMs: stats.waitMs,
+      runMs: stats.runMs,
+      order: order.map(j => `${j.bu}:${j.kind}`).join(' → '),
+      publishBeforeEarlierSummary: position('bench-content-1') > Math.max(position('bench-xhs-0'), position('bench-xhs-1'))
+    }
+  };
+}
+
+/**
+ * 重启检查（子进程）：收取上一个进程留下的队列 + inbox，全部跑完后回报
+ */
+async function restartWorker() {
+  const scheduler = require('../lib/agent-scheduler');
+  scheduler.start();
+  while (scheduler.getStats().depth.queued + scheduler.getStats().depth.running > 0) await sleep(50);
+  const stats = scheduler.getStats();
+  scheduler.stop();
+  process.send({ spawned: stats.spawned, requeued: stats.requeued }, () => process.disconnect());
+}
+
+async function restartCheck() {
+  // 在一个未启动调度的进程里写入队列（模拟重启前积压）和 inbox（模拟 daemon 离线时提交）
+  const queued = await new Promise((resolve, reject) => {
+    const child = fork(__filename, [], { env: { ...process.env, BENCH_WORKER: 'prepare', BENCH_WORK_DIR: WORK_DIR } });
+    child.on('message', resolve);
+    child.on('error', reject);
+  });
+  fs.rmSync(AGENT_LOG, { force: true });
+  const result = await new Promise((resolve, reject) => {
+    const child = fork(__filename, [], { env: { ...process.env, BENCH_WORKER: 'restart', BENCH_WORK_DIR: WORK_DIR } });
+    child.on('message', resolve);
+    child.on('error', reject);
+  });
+  const ran = readAgentLog().length;
+  return { queued, ...result, ran, ok: ran === queued };
+}
+
+function prepareWorker() {
+  const scheduler = require('../lib/agent-scheduler');
+  scheduler.enqueue({ kind: 'publish', bu: 'content', sessionId: 'restart-0', prompt: 'pending publish' });
+  scheduler.enqueue({ kind: 'session_end', bu: 'product', sessionId: 'restart-1', prompt: 'pending summary' });
+  scheduler.submitOffline({ kind: 'trade', bu: 'investment', sessionId: 'restart-2', prompt: 'offline trade' });
+  process.send(3, () => process.disconnect());
+}
+
+async function main() {
+  const direct = await runDirect();
+  const scheduled = await runScheduled();
+  const restart = await restartCheck();
+  fs.rmSync(WORK_DIR, { recursive: true, force: true });
+
+  console.log(`sessions: ${SESSIONS}, agent run: ${AGENT_MS}ms, event step: ${STEP_MS}ms`);
+  console.table([direct, scheduled.row]);
+  console.log('scheduled:', JSON.stringify(scheduled.detail, null, 2));
+  console.log('restart:', JSON.stringify(restart));
+  if (!restart.ok || !scheduled.detail.publishBeforeEarlierSummary) process.exitCode = 1;
+}
+
+const worker = { prepare: prepareWorker, restart: restartWorker }[process.env.BENCH_WORKER];
+(worker ? Promise.resolve().then(worker) : main()).catch(err => {
+  console.error(err);
+  process.exit(1);
+});
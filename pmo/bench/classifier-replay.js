@@ -0,0 +1,151 @@
+#!/usr/bin/env node
+/**
+ * 压测：规则分类器快速路径 - 回放 hook 事件，统计能省掉多少次 PMO Agent spawn
+ *
+ * 对每条记录按 hook 的实际逻辑跑一遍：
+ * - superpowers-tracker：classify({ eventType: 'superpower_event', cwd, skill })
+ * - pmo-session-end：transcript 落盘 → extractStructuredSummary → classify
+ * - pmo-report-xhs：解析标题 / 标签 / 文案 → classify
+ *
+ * 基线（改造前）：产品事业部的 superpower 事件、每个有效 session_end、每条发布都 spawn 一次 Agent
+ * 另外统计规则编译冷启动 vs 读缓存、分类吞吐
+ *
+ * 用法：node pmo/bench/classifier-replay.js [sessions | payloads.jsonl]
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { generatePayloads, readPayloads } = require('./payloads');
+
+const WORK_DIR = fs.mkdtempSync(path.join(os.tmpdir(), 'pmo-bench-classifier-'));
+process.env.PMO_RULESET_CACHE = path.join(WORK_DIR, 'ruleset.json');
+
+const classifier = require('../lib/classifier');
+const { extractStructuredSummary } = require('../lib/transcript-summary');
+
+const arg = process.argv[2];
+const records = arg && fs.existsSync(arg) ? readPayloads(arg) : generatePayloads(Number(arg) || 500);
+
+function ms(start) {
+  return Number(process.hrtime.bigint() - start) / 1e6;
+}
+
+function timeLoad(options) {
+  const start = process.hrtime.bigint();
+  classifier.loadRuleset(options);
+  return +ms(start).toFixed(2);
+}
+
+function parsePublish(args) {
+  return {
+    title: args.match(/标题[：:]\s*([^\n]+)/)?.[1].trim() || '',
+    tags: (args.match(/标签[：:]?\s*([^\n]+)/)?.[1] || '').split(/[,，\s]+/).filter(Boolean),
+    content: args.match(/文案[：:]\s*([^\n]+)/)?.[1].trim() || ''
+  };
+}
+
+/**
+ * 把一条回放记录变成 classify 输入；返回 null 表示 hook 在分类前就退出
+ * @returns {?{input: Object, baselineSpawn: boolean, scannedBytes: number}}
+ */
+function toClassifierInput(record, index) {
+  const { hook, input } = record;
+
+  if (hook === 'superpowers-tracker') {
+    const skill = input.tool_input?.skill;
+    return {
+      input: { eventType: 'superpower_event', cwd: input.cwd, skill },
+      baselineSpawn: (input.cwd || '').includes('product-bu'),
+      scannedBytes: Buffer.byteLength(input.cwd + skill)
+    };
+  }
+
+  if (hook === 'pmo-session-end') {
+    const transcriptPath = path.join(WORK_DIR, `transcript-${index}.jsonl`);
+    fs.writeFileSync(transcriptPath, record.transcript.map(e => JSON.stringify(e)).join('\n') + '\n');
+    const extracted = extractStructuredSummary(transcriptPath, { checkpoint: false });
+    if (!extracted) return null;
+    const { summary, tools, files, outputs } = extracted;
+    return {
+      input: { eventType: 'session_end', cwd: input.cwd, tools, files, outputs, text: summary },
+      baselineSpawn: true,
+      scannedBytes: Buffer.byteLength(input.cwd + tools.join(' ') + files.join('\n') + summary)
+    };
+  }
+
+  if (hook === 'pmo-report-xhs') {
+    const info = parsePublish(input.tool_input?.args || '');
+    if (!info.title) return null;
+    const text = [info.title, info.tags.join(' '), info.content].join('\n');
+    return {
+      input: { eventType: 'xhs_publish', bu: 'content', skill: input.tool_input.skill, text },
+      baselineSpawn: true,
+      scannedBytes: Buffer.byteLength(text)
+    };
+  }
+
+  return null;
+}
+
+function main() {
+  const load = {
+    coldCompileMs: timeLoad({ force: true }),
+    cachedLoadMs: (() => {
+      // 模拟新进程：丢掉内存缓存，只剩磁盘缓存
+      delete require.cache[require.resolve('../lib/classifier')];
+      const fresh = require('../lib/classifier');
+      const start = process.hrtime.bigint();
+      fresh.loadRuleset();
+      return +ms(start).toFixed(2);
+    })()
+  };
+
+  const inputs = records.map(toClassifierInput).filter(Boolean);
+  const byHook = {};
+  let classifyMs = 0;
+  let scanned = 0;
+
+  inputs.forEach(({ input, baselineSpawn, scannedBytes }) => {
+    const start = process.hrtime.bigint();
+    const verdict = classifier.classify(input);
+    classifyMs += ms(start);
+    scanned += scannedBytes;
+
+    const hook = input.eventType;
+    const row = byHook[hook] || (byHook[hook] = { events: 0, baselineSpawns: 0, spawns: 0, fastReport: 0, fastSkip: 0 });
+    row.events++;
+    if (baselineSpawn) row.baselineSpawns++;
+    // superpowers-tracker 遇到 skip 不看置信度直接退出（与改造前只追踪产品事业部一致）
+    const skipped = verdict.decision === 'skip' && (!verdict.spawnAgent || hook === 'superpower_event');
+    if (skipped) row.fastSkip++;
+    else if (!verdict.spawnAgent) row.fastReport++;
+    else row.spawns++;
+  });
+
+  const rows = Object.entries(byHook).map(([eventType, r]) => ({
+    eventType,
+    ...r,
+    spawnsAvoided: r.baselineSpawns ? `${(100 * (1 - r.spawns / r.baselineSpawns)).toFixed(1)}%` : '-'
+  }));
+  const total = rows.reduce((acc, r) => ({
+    baselineSpawns: acc.baselineSpawns + r.baselineSpawns,
+    spawns: acc.spawns + r.spawns,
+    events: acc.events + r.events
+  }), { baselineSpawns: 0, spawns: 0, events: 0 });
+
+  fs.rmSync(WORK_DIR, { recursive: true, force: true });
+
+  console.log(`records: ${records.length}, classified: ${inputs.length}, threshold: ${classifier.CONFIDENCE_THRESHOLD}`);
+  console.log('ruleset:', JSON.stringify(load));
+  console.table(rows);
+  console.log('total:', JSON.stringify({
+    ...total,
+    spawnsAvoided: `${(100 * (1 - total.spawns / total.baselineSpawns)).toFixed(1)}%`,
+    classifyPerSec: Math.round(inputs.length / (classifyMs / 1000)),
+    meanClassifyUs: +(classifyMs * 1000 / inputs.length).toFixed(1),
+    scanMBPerSec: +(scanned / 1024 / 1024 / (classifyMs / 1000)).toFixed(1)
+  }, null, 2));
+}
+
+main();
@@ -0,0 +1,151 @@
+#!/usr/bin/env node
+/**
+ * 压测：常驻 daemon vs 进程内 handleEvent 的 hook 延迟
+ *
+ * 对本地 Linear 替身分别跑两种模式：
+ * - daemon：hook 通过 Unix socket 投递后立即返回
+ * - inprocess：daemon 不在线，hook 自己 require handler 并等待 Linear 往返
+ *
+ * 每种模式报告两组数字：
+ * - hook 进程墙钟时间（含 Node 启动，即 agent 实际等待的时间）
+ * - 进程内 dispatchEvent 调用耗时（去掉 Node 启动后的投递开销）
+ *
+ * 用法：node pmo/bench/daemon-latency.js [iterations] [latencyMs]
+ */
+
+const { spawn } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { startStandin } = require('./linear-standin');
+
+const ITERATIONS = Number(process.argv[2]) || 30;
+const LATENCY_MS = Number(process.argv[3] ?? 40);
+const ROOT = path.resolve(__dirname, '../..');
+const HOOK = path.join(ROOT, 'content-bu/hooks/pmo-report-x.js');
+const SOCKET = path.join(os.tmpdir(), `pmo-bench-${process.pid}.sock`);
+
+const HOOK_PAYLOAD = JSON.stringify({
+  tool_name: 'Skill',
+  tool_input: { skill: 'x-post', args: 'Claude Code 的 5 个技巧' },
+  tool_output: 'posted https://x.com/status/1',
+  session_id: 'bench-session'
+});
+
+function percentile(sorted, p) {
+  return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+function summarize(label, samples) {
+  const sorted = [...samples].sort((a, b) => a - b);
+  const mean = sorted.reduce((a, b) => a + b, 0) / sorted.length;
+  return {
+    label,
+    n: sorted.length,
+    p50: +percentile(sorted, 0.5).toFixed(2),
+    p99: +percentile(sorted, 0.99).toFixed(2),
+    mean: +mean.toFixed(2)
+  };
+}
+
+// 必须异步 spawn：替身跑在本进程里，spawnSync 会阻塞事件循环导致 hook 等不到响应
+function runHookOnce(env) {
+  return new Promise((resolve) => {
+    const start = process.hrtime.bigint();
+    const child = spawn(process.execPath, [HOOK], { env, stdio: ['pipe', 'ignore', 'ignore'] });
+    child.on('close', () => resolve(Number(process.hrtime.bigint() - start) / 1e6));
+    child.stdin.end(HOOK_PAYLOAD);
+  });
+}
+
+async function runHooks(env) {
+  const samples = [];
+  for (let i = 0; i < ITERATIONS; i++) samples.push(await runHookOnce(env));
+  return samples;
+}
+
+function startDaemon(env) {
+  return new Promise((resolve, reject) => {
+    const child = spawn(process.execPath, [path.join(ROOT, 'pmo/pmo-daemon.js')], { env, stdio: ['ignore', 'pipe', 'inherit'] });
+    child.stdout.once('data', (chunk) => {
+      if (chunk.toString().includes('listening')) resolve(child);
+      else reject(new Error(chunk.toString()));
+    });
+    child.on('error', reject);
+  });
+}
+
+async function waitForDrain(sendToDaemon) {
+  await sendToDaemon({ op: 'flush' }, { ackTimeoutMs: 30000 });
+  return sendToDaemon({ op: 'stats' });
+}
+
+async function main() {
+  const standin = await startStandin({ latencyMs: LATENCY_MS });
+  const env = {
+    ...process.env,
+    LINEAR_API_URL: standin.url,
+    LINEAR_API_KEY: 'bench',
+    PMO_SOCKET: SOCKET,
+    PMO_DAEMON_LOG: path.join(os.tmpdir(), 'pmo-bench-daemon.log'),
+    PMO_SPOOL_DIR: path.join(os.tmpdir(), `pmo-bench-spool-${process.pid}`),
+    PMO_SESSION_INDEX_FILE: path.join(os.tmpdir(), `pmo-bench-index-${process.pid}.json`)
+  };
+  Object.assign(process.env, env);
+  const { dispatchEvent, sendToDaemon } = require('../lib/client');
+
+  const event = {
+    type: 'x_publish',
+    bu: 'content',
+    sessionId: 'bench-session',
+    data: { content: 'bench', output: 'ok' }
+  };
+  const results = [];
+
+  // 1. 进程内模式（daemon 不在线）
+  standin.resetStats();
+  results.push(summarize('hook process / inprocess', await runHooks(env)));
+  const inprocessHookCalls = standin.stats.requests;
+
+  const inprocessDispatch = [];
+  for (let i = 0; i < ITERATIONS; i++) {
+    const start = process.hrtime.bigint();
+    await dispatchEvent(event);
+    inprocessDispatch.push(Number(process.hrtime.bigint() - start) / 1e6);
+  }
+  results.push(summarize('dispatchEvent / inprocess', inprocessDispatch));
+
+  // 2. daemon 模式
+  const daemon = await startDaemon(env);
+  standin.resetStats();
+  results.push(summarize('hook process / daemon', await runHooks(env)));
+
+  const daemonDispatch = [];
+  for (let i = 0; i < ITERATIONS; i++) {
+    const start = process.hrtime.bigint();
+    await dispatchEvent(event);
+    daemonDispatch.push(Number(process.hrtime.bigint() - start) / 1e6);
+  }
+  results.push(summarize('dispatchEvent / daemon', daemonDispatch));
+
+  const daemonStats = await waitForDrain(sendToDaemon);
+  await new Promise(r => { daemon.once('exit', r); daemon.kill('SIGTERM'); });
+  await standin.close();
+  fs.rmSync(env.PMO_SPOOL_DIR, { recursive: true, force: true });
+  fs.rmSync(env.PMO_SESSION_INDEX_FILE, { force: true });
+
+  console.log(`Linear standin latency: ${LATENCY_MS}ms, iterations: ${ITERATIONS}`);
+  console.table(results);
+  console.log(JSON.stringify({
+    linearCallsPerHook: {
+      inprocess: +(inprocessHookCalls / ITERATIONS).toFixed(2),
+      daemon: +(standin.stats.requests / (ITERATIONS * 2)).toFixed(2)
+    },
+    daemon: { processed: daemonStats.processed, failed: daemonStats.failed, spool: daemonStats.spool }
+  }, null, 2));
+}
+
+main().catch(err => {
+  console.error(err);
+  process.exit(1);
+});
@@ -0,0 +1,29 @@
+#!/usr/bin/env node
+/**
+ * 假 PMO Agent - 压测时通过 PMO_AGENT_CMD 替代 claude
+ *
+ * 读完 stdin 的 prompt 后睡 FAKE_AGENT_MS，把起止时间追加到 FAKE_AGENT_LOG
+ */
+
+const fs = require('fs');
+
+const RUN_MS = Number(process.env.FAKE_AGENT_MS) || 200;
+const started = Date.now();
+
+let prompt = '';
+process.stdin.setEncoding('utf8');
+process.stdin.on('data', chunk => prompt += chunk);
+process.stdin.on('end', () => {
+  setTimeout(() => {
+    if (process.env.FAKE_AGENT_LOG) {
+      fs.appendFileSync(process.env.FAKE_AGENT_LOG, JSON.stringify({
+        jobId: process.env.PMO_AGENT_JOB_ID || null,
+        args: process.argv.slice(2),
+        promptChars: prompt.length,
+        started,
+        finished: Date.now()
+      }) + '\n');
+    }
+    console.log('fake agent done');
+  }, RUN_MS);
+});
@@ -0,0 +1,320 @@
+#!/usr/bin/env node
+/**
+ * 回放：把 hook 负载和 transcript 过一遍所有事业部 hook，对着本地 Linear 替身跑完整 PMO 流水线
+ *
+ * 每条记录按 Claude Code 的方式触发（默认 fan-out）：
+ * - PostToolUse：同一工具的所有 hook 并行各起一个进程（Skill 调用会跑 8 个 hook，绝大多数在 match 阶段退出）
+ * - SessionEnd：transcript 落盘后交给 pmo-session-end
+ * --no-fanout 时只跑记录指定的 hook
+ *
+ * 环境：Linear 替身（LINEAR_API_URL）、假 Agent（PMO_AGENT_CMD=fake-agent.js）、独立 HOME / spool / 索引 / 队列目录，
+ * 不读写真实数据；防抖窗口压缩到 PMO_AGENT_DEBOUNCE_MS（默认 1s），回放结束后等 Agent 队列清空
+ * - daemon 模式（默认）：daemon 在线，hook 投递后即返回
+ * - inprocess 模式：daemon 不在线，hook 进程内处理事件、Agent 任务进 inbox，回放完再启动 daemon 收取
+ *
+ * 指标全部来自 trace 文件（lib/tracing.js），hook 进程墙钟时间另外在外部测量：
+ * - hook 延迟 p50 / p99（按 hook，以及每次工具调用 fan-out 的最慢 hook）
+ * - 各阶段耗时（startup / stdin_parse / match / dispatch / agent_submit / summarize / handle）
+ * - 每个投递事件的 Linear 调用数（daemon 里 spool 合并的批量请求按总数摊）
+ * - 每个 session 的 Agent spawn 数
+ *
+ * --json=<file> 保存汇总；--baseline=<file> 与之前保存的汇总比较，超出容差（--tolerance，默认 0.2）时退出码为 1
+ *
+ * 用法：node pmo/bench/hook-replay.js [sessions | payloads.jsonl] [latencyMs] [--mode=daemon|inprocess] [--no-fanout]
+ *                                     [--json=out.json] [--baseline=prev.json] [--tolerance=0.2]
+ * 录制真实负载：hook 运行时设置 PMO_HOOK_CAPTURE=<file>，再把该文件作为第一个参数
+ */
+
+const { spawn } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { startStandin } = require('./linear-standin');
+const { generatePayloads, readPayloads } = require('./payloads');
+
+const ROOT = path.resolve(__dirname, '../..');
+
+// hook 名 → 脚本与触发方式（与 ~/.claude/settings.json 的 matcher 一致）
+const HOOKS = {
+  'superpowers-tracker': { file: 'pmo/hooks/superpowers-tracker.js', trigger: 'Skill' },
+  'pmo-report-xhs': { file: 'content-bu/hooks/pmo-report-xhs.js', trigger: 'Skill' },
+  'pmo-report-x': { file: 'content-bu/hooks/pmo-report-x.js', trigger: 'Skill' },
+  'pmo-report-trade': { file: 'investment-bu/hooks/pmo-report-trade.js', trigger: 'Skill' },
+  'pmo-report-research': { file: 'investment-bu/hooks/pmo-report-research.js', trigger: 'Skill' },
+  'pmo-report-testflight': { file: 'product-bu/hooks/pmo-report-testflight.js', trigger: 'Skill' },
+  'pmo-report-vercel': { file: 'product-bu/hooks/pmo-report-vercel.js', trigger: 'Skill' },
+  'pmo-report-test': { file: 'product-bu/hooks/pmo-report-test.js', trigger: 'Skill' },
+  'pmo-report-bilibili': { file: 'content-bu/hooks/pmo-report-bilibili.js', trigger: 'Bash' },
+  'pmo-report-git': { file: 'product-bu/hooks/pmo-report-git.js', trigger: 'Bash' },
+  'pmo-test-hook': { file: 'product-bu/hooks/pmo-test-hook.js', trigger: 'Write' },
+  'pmo-session-end': { file: 'pmo/pmo-session-end.js', trigger: 'SessionEnd' }
+};
+
+const STAGES = ['startup', 'stdin_parse', 'match', 'summarize', 'dispatch', 'agent_submit', 'handle', 'linear'];
+
+function parseArgs(argv) {
+  const args = { source: null, latencyMs: 40, mode: 'daemon', fanout: true, json: null, baseline: null, tolerance: 0.2 };
+  const positional = [];
+  for (const arg of argv) {
+    if (arg === '--no-fanout') args.fanout = false;
+    else if (arg.startsWith('--mode=')) args.mode = arg.slice('--mode='.length);
+    else if (arg.startsWith('--json=')) args.json = arg.slice('--json='.length);
+    else if (arg.startsWith('--baseline=')) args.baseline = arg.slice('--baseline='.length);
+    else if (arg.startsWith('--tolerance=')) args.tolerance = Number(arg.slice('--tolerance='.length));
+    else positional.push(arg);
+  }
+  if (!['daemon', 'inprocess'].includes(args.mode)) throw new Error(`Unknown mode: ${args.mode}`);
+  args.source = positional[0] || '20';
+  if (positional[1] !== undefined) args.latencyMs = Number(positional[1]);
+  return args;
+}
+
+function percentile(sorted, p) {
+  return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+}
+
+function summarize(samples) {
+  if (samples.length === 0) return { n: 0, p50: null, p99: null };
+  const sorted = [...samples].sort((a, b) => a - b);
+  return { n: sorted.length, p50: +percentile(sorted, 0.5).toFixed(2), p99: +percentile(sorted, 0.99).toFixed(2) };
+}
+
+function hooksFor(record, fanout) {
+  if (!fanout || record.hook === 'pmo-session-end') {
+    return HOOKS[record.hook] ? [record.hook] : [];
+  }
+  return Object.keys(HOOKS).filter(name => HOOKS[name].trigger === record.input.tool_name);
+}
+
+// 必须异步 spawn：替身跑在本进程里，spawnSync 会阻塞事件循环导致 hook 等不到响应
+function runHook(name, payload, env) {
+  return new Promise((resolve) => {
+    const start = process.hrtime.bigint();
+    const child = spawn(process.execPath, [path.join(ROOT, HOOKS[name].file)], { env, stdio: ['pipe', 'ignore', 'ignore'] });
+    child.on('close', (code) => resolve({ name, code, ms: Number(process.hrtime.bigint() - start) / 1e6 }));
+    child.stdin.on('error', () => {});
+    child.stdin.end(payload);
+  });
+}
+
+function startDaemon(env) {
+  return new Promise((resolve, reject) => {
+    const child = spawn(process.execPath, [path.join(ROOT, 'pmo/pmo-daemon.js')], { env, stdio: ['ignore', 'pipe', 'inherit'] });
+    child.stdout.once('data', (chunk) => {
+      if (chunk.toString().includes('listening')) resolve(child);
+      else reject(new Error(chunk.toString()));
+    });
+    child.on('error', reject);
+  });
+}
+
+/**
+ * 等事件处理完、spool 提交完、Agent 队列清空
+ */
+async function waitForIdle(sendToDaemon, timeoutMs = 120000) {
+  const deadline = Date.now() + timeoutMs;
+  for (;;) {
+    await sendToDaemon({ op: 'flush' }, { ackTimeoutMs: 30000 });
+    const stats = await sendToDaemon({ op: 'stats' });
+    const { queued, running } = stats.agents.depth;
+    if (stats.inFlight === 0 && queued === 0 && running === 0) return stats;
+    if (Date.now() > deadline) throw new Error(`Timed out waiting for agents (queued ${queued}, running ${running})`);
+    await new Promise(r => setTimeout(r, 250));
+  }
+}
+
+function readSpans(traceFile) {
+  const spans = [];
+  for (const file of [`${traceFile}.2`, `${traceFile}.1`, traceFile]) {
+    if (!fs.existsSync(file)) continue;
+    for (const line of fs.readFileSync(file, 'utf8').split('\n')) {
+      if (line) spans.push(JSON.parse(line));
+    }
+  }
+  return spans;
+}
+
+function report(spans, walls, toolCalls, sessions, standin) {
+  const byHook = Object.keys(HOOKS).map((name) => {
+    const totals = spans.filter(s => s.span === 'hook' && s.proc === name);
+    if (totals.length === 0) return null;
+    const hookMs = summarize(totals.map(s => s.ms));
+    const wall = summarize(walls.filter(w => w.name === name).map(w => w.ms));
+    return {
+      hook: name,
+      runs: totals.length,
+      matched: totals.filter(s => s.matched).length,
+      hookP50: hookMs.p50,
+      hookP99: hookMs.p99,
+      wallP50: wall.p50,
+      wallP99: wall.p99,
+      matchP50: summarize(spans.filter(s => s.span === 'match' && s.proc === name).map(s => s.ms)).p50
+    };
+  }).filter(Boolean);
+
+  const stages = STAGES.map((stage) => {
+    const samples = spans.filter(s => s.span === stage);
+    return { stage, ...summarize(samples.map(s => s.ms)) };
+  }).filter(s => s.n > 0);
+
+  const events = spans.filter(s => s.span === 'dispatch').length;
+  const linear = spans.filter(s => s.span === 'linear');
+  const linearByOp = {};
+  for (const s of linear) linearByOp[s.op] = (linearByOp[s.op] || 0) + 1;
+
+  const spawns = spans.filter(s => s.span === 'agent_spawn');
+  const spawnsBySession = new Map([...sessions].map(id => [id, 0]));
+  const spawnsByKind = {};
+  for (const s of spawns) {
+    spawnsBySession.set(s.session, (spawnsBySession.get(s.session) || 0) + 1);
+    spawnsByKind[s.kind] = (spawnsByKind[s.kind] || 0) + 1;
+  }
+  const perSession = [...spawnsBySession.values()];
+
+  const allHooks = summarize(spans.filter(s => s.span === 'hook').map(s => s.ms));
+  return {
+    byHook,
+    stages,
+    totals: {
+      hookRuns: allHooks.n,
+      hookP50: allHooks.p50,
+      hookP99: allHooks.p99,
+      toolCalls: toolCalls.length,
+      // 一次工具调用的 hook 并行执行，session 等的是最慢的那个
+      toolCallP50: summarize(toolCalls).p50,
+      toolCallP99: summarize(toolCalls).p99,
+      events,
+      linearCalls: linear.length,
+      linearStandinRequests: standin.stats.requests,
+      apiCallsPerEvent: events ? +(linear.length / events).toFixed(3) : 0,
+      linearByOp,
+      supabaseCalls: spans.filter(s => s.span === 'supabase').length,
+      sessions: sessions.size,
+      spawns: spawns.length,
+      spawnsPerSession: sessions.size ? +(spawns.length / sessions.size).toFixed(3) : 0,
+      maxSpawnsPerSession: perSession.length ? Math.max(...perSession) : 0,
+      spawnsByKind,
+      spawnFailures: spawns.filter(s => s.code !== 0).length
+    }
+  };
+}
+
+/**
+ * 与基线比较；延迟另给 2ms 绝对余量，避免小数值上的抖动误报
+ * @returns {string[]} 回归项
+ */
+function compare(current, baseline, tolerance) {
+  const regressions = [];
+  const check = (label, now, before, slackMs = 0) => {
+    if (before === null || before === undefined || now === null) return;
+    if (now > before * (1 + tolerance) + slackMs) regressions.push(`${label}: ${before} → ${now}`);
+  };
+  check('hook p99 ms', current.totals.hookP99, baseline.totals.hookP99, 2);
+  check('tool call p99 ms', current.totals.toolCallP99, baseline.totals.toolCallP99, 2);
+  check('api calls / event', current.totals.apiCallsPerEvent, baseline.totals.apiCallsPerEvent);
+  check('spawns / session', current.totals.spawnsPerSession, baseline.totals.spawnsPerSession);
+  for (const row of current.byHook) {
+    const before = baseline.byHook.find(r => r.hook === row.hook);
+    if (before) check(`${row.hook} p99 ms`, row.hookP99, before.hookP99, 2);
+  }
+  return regressions;
+}
+
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+  const records = fs.existsSync(args.source) ? readPayloads(args.source) : generatePayloads(Number(args.source) || 20);
+
+  const workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'pmo-bench-replay-'));
+  const standin = await startStandin({ latencyMs: args.latencyMs });
+  const env = {
+    ...process.env,
+    HOME: workDir,
+    LINEAR_API_URL: standin.url,
+    LINEAR_API_KEY: 'bench',
+    SUPABASE_ANON_KEY: '',
+    PMO_SOCKET: path.join(workDir, 'pmo.sock'),
+    PMO_DAEMON_LOG: path.join(workDir, 'daemon.log'),
+    PMO_DAEMON_AUTOSTART: '0',
+    PMO_SPOOL_DIR: path.join(workDir, 'spool'),
+    PMO_SESSION_INDEX_FILE: path.join(workDir, 'session-index.json'),
+    PMO_TRANSCRIPT_CHECKPOINT_DIR: path.join(workDir, 'checkpoints'),
+    PMO_RULESET_CACHE: path.join(workDir, 'ruleset.json'),
+    PMO_AGENT_DIR: path.join(workDir, 'agents'),
+    PMO_AGENT_LOG: path.join(workDir, 'agents.log'),
+    PMO_AGENT_CMD: `${process.execPath} ${path.join(__dirname, 'fake-agent.js')}`,
+    PMO_AGENT_DEBOUNCE_MS: process.env.PMO_AGENT_DEBOUNCE_MS || '1000',
+    PMO_AGENT_MAX_DELAY_MS: process.env.PMO_AGENT_MAX_DELAY_MS || '5000',
+    FAKE_AGENT_MS: process.env.FAKE_AGENT_MS || '50',
+    PMO_TRACE: '1',
+    PMO_TRACE_FILE: path.join(workDir, 'trace.jsonl'),
+    PMO_TRACE_MAX_BYTES: String(512 * 1024 * 1024)
+  };
+  delete env.PMO_TRACE_EVENTS;
+  delete env.PMO_HOOK_CAPTURE;
+  Object.assign(process.env, { PMO_SOCKET: env.PMO_SOCKET });
+  const { sendToDaemon } = require('../lib/client');
+
+  let daemon = args.mode === 'daemon' ? await startDaemon(env) : null;
+
+  const walls = [];
+  const toolCalls = [];
+  const sessions = new Set();
+  const started = Date.now();
+
+  for (const [index, record] of records.entries()) {
+    const input = { ...record.input };
+    if (input.session_id) sessions.add(input.session_id);
+    if (record.transcript) {
+      input.transcript_path = path.join(workDir, `transcript-${index}.jsonl`);
+      fs.writeFileSync(input.transcript_path, record.transcript.map(e => JSON.stringify(e)).join('\n') + '\n');
+    }
+
+    const names = hooksFor(record, args.fanout);
+    if (names.length === 0) continue;
+    const payload = JSON.stringify(input);
+    const runs = await Promise.all(names.map(name => runHook(name, payload, env)));
+    walls.push(...runs);
+    if (HOOKS[names[0]].trigger !== 'SessionEnd') toolCalls.push(Math.max(...runs.map(r => r.ms)));
+  }
+  const replayMs = Date.now() - started;
+
+  // inprocess：回放时 daemon 不在线，Agent 任务都在 inbox 里，现在启动 daemon 收取
+  if (!daemon) daemon = await startDaemon(env);
+  const daemonStats = await waitForIdle(sendToDaemon);
+  await new Promise(r => { daemon.once('exit', r); daemon.kill('SIGTERM'); });
+  await standin.close();
+
+  const summary = report(readSpans(env.PMO_TRACE_FILE), walls, toolCalls, sessions, standin);
+  summary.run = {
+    mode: args.mode,
+    fanout: args.fanout,
+    records: records.length,
+    latencyMs: args.latencyMs,
+    replayMs,
+    failedHooks: walls.filter(w => w.code !== 0).length,
+    daemon: { processed: daemonStats.processed, failed: daemonStats.failed, spool: daemonStats.spool }
+  };
+  fs.rmSync(workDir, { recursive: true, force: true });
+
+  console.log(`records: ${records.length}, mode: ${args.mode}, fanout: ${args.fanout}, Linear standin latency: ${args.latencyMs}ms`);
+  console.table(summary.byHook);
+  console.table(summary.stages);
+  console.log(JSON.stringify({ totals: summary.totals, run: summary.run }, null, 2));
+
+  if (args.json) fs.writeFileSync(args.json, JSON.stringify(summary, null, 2) + '\n');
+  if (args.baseline) {
+    const regressions = compare(summary, JSON.parse(fs.readFileSync(args.baseline, 'utf8')), args.tolerance);
+    if (regressions.length > 0) {
+      console.log(`Regressions vs ${args.baseline} (tolerance ${args.tolerance * 100}%):`);
+      for (const line of regressions) console.log(`  - ${line}`);
+      process.exitCode = 1;
+    } else {
+      console.log(`No regressions vs ${args.baseline}`);
+    }
+  }
+}
+
+main().catch(err => {
+  console.error(err);
+  process.exit(1);
+});
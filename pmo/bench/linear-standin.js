@@ -0,0 +1,189 @@
+#!/usr/bin/env node
+/**
+ * Linear API 本地替身 - 仅供压测/回放使用
+ *
+ * 只实现 handler.js / spool.js 用到的几类 GraphQL 操作（按关键字识别，不做完整解析）：
+ * - issueCreate / issueUpdate（支持客户端指定 input.id）
+ * - issue(id) { description }
+ * - team(id) { issues(filter: description contains) }
+ * - 带别名的批量文档：m0: issueUpdate(...) m1: issueCreate(...) / r0: issue(id: "...")
+ *
+ * 用法：
+ *   const { startStandin } = require('./linear-standin');
+ *   const standin = await startStandin({ latencyMs: 40 });
+ *   process.env.LINEAR_API_URL = standin.url;
+ *
+ * 单独运行：node linear-standin.js [port] [latencyMs]
+ */
+
+const http = require('http');
+const crypto = require('crypto');
+
+function createStore() {
+  return { issues: new Map(), counter: 0 };
+}
+
+function createIssue(store, input) {
+  store.counter++;
+  const issue = {
+    id: input.id || crypto.randomUUID(),
+    identifier: `P-${store.counter}`,
+    url: `https://linear.app/standin/issue/P-${store.counter}`,
+    title: input.title || '',
+    description: input.description || '',
+    teamId: input.teamId,
+    state: { id: input.stateId || 'backlog', name: input.stateId || 'Backlog' }
+  };
+  store.issues.set(issue.id, issue);
+  return issue;
+}
+
+function updateIssue(store, id, input) {
+  const issue = store.issues.get(id);
+  if (!issue) return null;
+  if (input.description !== undefined) issue.description = input.description;
+  if (input.stateId) issue.state = { id: input.stateId, name: input.stateId };
+  if (input.title) issue.title = input.title;
+  return issue;
+}
+
+const ALIASED_FIELD = /(\w+):\s*(issueCreate|issueUpdate|issue)\(([^)]*)\)/g;
+
+function resolveArg(args, name, variables) {
+  const match = args.match(new RegExp(`${name}:\\s*(\\$\\w+|"[^"]*")`));
+  if (!match) return undefined;
+  return match[1].startsWith('$') ? variables[match[1].slice(1)] : JSON.parse(match[1]);
+}
+
+/**
+ * 执行带别名的批量文档
+ * 写操作逐个返回成败；读操作与 Linear 一致：任一 Issue 不存在则整个 data 为 null
+ */
+function executeAliased(store, fields, variables) {
+  const data = {};
+  const errors = [];
+
+  for (const [, alias, op, args] of fields) {
+    if (op === 'issueCreate') {
+      const input = resolveArg(args, 'input', variables) || {};
+      if (input.id && store.issues.has(input.id)) {
+        data[alias] = null;
+        errors.push({ message: 'Entity already exists', path: [alias] });
+      } else {
+        data[alias] = { success: true, issue: createIssue(store, input) };
+      }
+    } else if (op === 'issueUpdate') {
+      const issue = updateIssue(store, resolveArg(args, 'id', variables), resolveArg(args, 'input', variables) || {});
+      data[alias] = issue ? { success: true, issue } : null;
+      if (!issue) errors.push({ message: 'Entity not found', path: [alias] });
+    } else {
+      const issue = store.issues.get(resolveArg(args, 'id', variables)) || null;
+      if (!issue) return { data: null, errors: [{ message: 'Entity not found', path: [alias] }] };
+      data[alias] = issue;
+    }
+  }
+
+  return errors.length ? { data, errors } : { data };
+}
+
+/**
+ * 执行一条 GraphQL 请求，返回 { data } 或 { errors }
+ */
+function execute(store, query, variables = {}) {
+  const aliased = [...query.matchAll(ALIASED_FIELD)];
+  if (aliased.length > 0) return executeAliased(store, aliased, variables);
+
+  if (query.includes('issueCreate')) {
+    const issue = createIssue(store, variables.input || {});
+    return { data: { issueCreate: { success: true, issue } } };
+  }
+
+  if (query.includes('issueUpdate')) {
+    const issue = updateIssue(store, variables.id, variables.input || {});
+    if (!issue) return { errors: [{ message: `Issue ${variables.id} not found` }] };
+    return { data: { issueUpdate: { success: true, issue } } };
+  }
+
+  if (query.includes('issues(filter')) {
+    const needle = variables.filter?.description?.contains || '';
+    const nodes = [...store.issues.values()]
+      .filter(i => i.teamId === variables.teamId && i.description.includes(needle))
+      .slice(0, 5);
+    return { data: { team: { issues: { nodes } } } };
+  }
+
+  const issueMatch = query.match(/issue\(id:\s*"([^"]+)"\)/);
+  if (issueMatch) {
+    return { data: { issue: store.issues.get(issueMatch[1]) || null } };
+  }
+
+  return { errors: [{ message: 'Unsupported operation in standin' }] };
+}
+
+/**
+ * 启动替身服务
+ * @param {Object} [options]
+ * @param {number} [options.port] - 默认随机端口
+ * @param {number} [options.latencyMs] - 模拟网络往返延迟
+ * @returns {Promise<{url: string, stats: Object, store: Object, close: Function}>}
+ */
+function startStandin(options = {}) {
+  const latencyMs = options.latencyMs ?? 40;
+  const store = createStore();
+  const stats = { requests: 0, fields: 0, operations: {} };
+
+  const server = http.createServer((req, res) => {
+    let body = '';
+    req.setEncoding('utf8');
+    req.on('data', chunk => body += chunk);
+    req.on('end', () => {
+      stats.requests++;
+      let payload;
+      try { payload = JSON.parse(body); }
+      catch (e) { payload = { query: '' }; }
+
+      const aliasCount = [...payload.query.matchAll(ALIASED_FIELD)].length;
+      const op = aliasCount > 0
+        ? (payload.query.trim().startsWith('mutation') ? 'batchMutation' : 'batchRead')
+        : (payload.query.match(/(issueCreate|issueUpdate|issues\(filter|issue\(id)/) || ['other'])[0];
+      stats.operations[op] = (stats.operations[op] || 0) + 1;
+      stats.fields += aliasCount || 1;
+
+      const result = execute(store, payload.query, payload.variables);
+      setTimeout(() => {
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify(result));
+      }, latencyMs);
+    });
+  });
+
+  return new Promise((resolve) => {
+    server.listen(options.port || 0, '127.0.0.1', () => {
+      const { port } = server.address();
+      resolve({
+        url: `http://127.0.0.1:${port}/graphql`,
+        stats,
+        store,
+        resetStats() {
+          stats.requests = 0;
+          stats.fields = 0;
+          stats.operations = {};
+        },
+        close() {
+          server.closeAllConnections();
+          return new Promise(r => server.close(r));
+        }
+      });
+    });
+  });
+}
+
+module.exports = { startStandin, execute, createStore };
+
+if (require.main === module) {
+  const port = Number(process.argv[2]) || 4010;
+  const latencyMs = Number(process.argv[3] ?? 40);
+  startStandin({ port, latencyMs }).then(({ url }) => {
+    console.log(`Linear standin listening on ${url} (latency ${latencyMs}ms)`);
+  });
+}
@@ -0,0 +1,261 @@
+/**
+ * 合成 hook 回放数据 - 仿照真实 hook stdin 与 transcript 结构
+ *
+ * 每条记录：{ hook, input, transcript? }
+ * - hook：目标 hook 名（superpowers-tracker | pmo-session-end | pmo-report-xhs | pmo-report-bilibili | ...，
+ *         见 bench/hook-replay.js 的 HOOKS）；post-tool-use 表示不针对任何 hook 的普通工具调用
+ * - input：hook 从 stdin 收到的 JSON（session-end 的 transcript_path 由回放脚本落盘后填入）
+ * - transcript：session-end 用的 transcript 行（对象数组）
+ *
+ * 各事业部其余 hook 的记录（B站 / X / 交易 / 调研 / worktree / 部署 / 测试）和普通工具调用
+ * 用独立的随机序列生成，不影响 superpowers-tracker / session-end / xhs 三类记录的内容
+ *
+ * 固定种子，多次运行结果一致；也可用 writePayloads 导出成 jsonl 供其他回放脚本使用
+ */
+
+const fs = require('fs');
+
+const PAC = '/Users/liuyishou/usr/pac';
+
+const SUPERPOWERS = [
+  'superpowers:brainstorming', 'superpowers:writing-plans', 'superpowers:using-git-worktrees',
+  'superpowers:test-driven-development', 'superpowers:requesting-code-review',
+  'superpowers:verification-before-completion', 'superpowers:finishing-a-development-branch'
+];
+
+const PRODUCT_DIRS = ['viva', 'viva/ios', 'vocab-highlighter', 'VoiceType', 'new-idea'];
+
+const CONTENT_TOPICS = [
+  { intent: '把这条马斯克的名言做成人物语录配图', tags: ['语录', '马斯克'] },
+  { intent: '这个知乎高赞回答改编成小红书图文，先做图再写文案', tags: ['知乎', '高赞'] },
+  { intent: 'n张图讲清楚 DuckDB vs PostgreSQL', tags: ['n张图', '数据库'] },
+  { intent: '随便做一张今天的杂谈封面', tags: ['日常'] },
+  { intent: '写一篇编程入门的科普文案', tags: ['编程', '科普'] }
+];
+
+const CHAT_INTENTS = [
+  '解释一下这个报错是什么意思', '帮我看看这段代码为什么慢', '今天美股为什么大跌', 'Rust 和 Go 哪个适合写 CLI'
+];
+
+function createRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function pick(random, list) {
+  return list[Math.floor(random() * list.length)];
+}
+
+function userEntry(text) {
+  return { type: 'user', message: { role: 'user', content: text } };
+}
+
+function assistantEntry(text, tools = []) {
+  return {
+    type: 'assistant',
+    message: {
+      role: 'assistant',
+      content: [
+        ...(text ? [{ type: 'text', text }] : []),
+        ...tools.map(([name, input]) => ({ type: 'tool_use', id: `toolu_${name}`, name, input }))
+      ]
+    }
+  };
+}
+
+/**
+ * 生成一个 session 的 transcript
+ * @param {string} intent - 首条用户消息
+ * @param {Array<[string, Object]>} tools - 依次出现的工具调用
+ */
+function transcript(random, intent, tools, closing) {
+  const entries = [userEntry(intent)];
+  for (const tool of tools) {
+    entries.push(assistantEntry(random() < 0.5 ? '好的，我来处理。' : '', [tool]));
+    entries.push(userEntry([{ type: 'tool_result', content: 'ok' }]));
+  }
+  while (entries.length < 12) {
+    entries.push(assistantEntry('继续分析中……', [['Read', { file_path: '/tmp/context.md' }]]));
+    entries.push(userEntry([{ type: 'tool_result', content: 'ok' }]));
+  }
+  entries.push(assistantEntry(closing));
+  return entries;
+}
+
+function productSession(random, n, records, extra) {
+  const dir = pick(random, PRODUCT_DIRS);
+  const cwd = `${PAC}/product-bu/${dir}`;
+  const sessionId = `replay-product-${n}`;
+  const phases = 2 + Math.floor(random() * (SUPERPOWERS.length - 1));
+  const tool = (hook, toolName, toolInput, toolOutput) => records.push({
+    hook,
+    input: { tool_name: toolName, tool_input: toolInput, tool_output: toolOutput, session_id: sessionId, cwd }
+  });
+
+  for (const skill of SUPERPOWERS.slice(0, phases)) {
+    records.push({ hook: 'superpowers-tracker', input: { tool_name: 'Skill', tool_input: { skill }, session_id: sessionId, cwd } });
+    if (skill === 'superpowers:using-git-worktrees') {
+      tool('pmo-report-git', 'Bash', { command: `git worktree add ../${dir.replace('/', '-')}-settings -b feat/P-${10 + n}-settings` }, 'Preparing worktree');
+    }
+    if (skill === 'superpowers:test-driven-development') {
+      tool('post-tool-use', 'Write', { file_path: `${cwd}/src/Settings.test.tsx`, content: 'test()' }, 'ok');
+      tool('post-tool-use', 'Bash', { command: 'npm test' }, 'Tests: 12 passed');
+      if (extra() < 0.3) tool('pmo-report-test', 'Skill', { skill: 'playwright-skill', args: '回归设置页面' }, 'passed');
+    }
+  }
+  if (phases === SUPERPOWERS.length && extra() < 0.5) {
+    if (dir.includes('ios')) tool('pmo-report-testflight', 'Skill', { skill: 'api-deploy-testflight' }, 'Uploaded build 42');
+    else tool('pmo-report-vercel', 'Skill', { skill: 'api-deploy-static' }, 'Deployed to https://viva.vercel.app');
+  }
+  if (extra() < 0.02) {
+    tool('pmo-test-hook', 'Write', { file_path: `${PAC}/product-bu/.pmo-test`, content: 'ping' }, 'ok');
+  }
+  records.push({
+    hook: 'pmo-session-end',
+    input: { session_id: sessionId, cwd, reason: 'exit' },
+    transcript: transcript(random, `给 ${dir} 加一个设置页面`, [
+      ['Skill', { skill: SUPERPOWERS[0] }],
+      ['Write', { file_path: `${cwd}/src/Settings.tsx` }],
+      ['Edit', { file_path: `${cwd}/src/App.tsx` }],
+      ['Bash', { command: 'npm test' }]
+    ], '设置页面完成，前端测试通过。')
+  });
+}
+
+function contentSession(random, n, records, extra) {
+  const topic = pick(random, CONTENT_TOPICS);
+  const cwd = `${PAC}/content-bu`;
+  const sessionId = `replay-content-${n}`;
+
+  records.push({
+    hook: 'post-tool-use',
+    input: { tool_name: 'Skill', tool_input: { skill: 'api-draw' }, tool_output: 'ok', session_id: sessionId, cwd }
+  });
+  if (extra() < 0.3) {
+    const command = `biliup upload /tmp/${n}.mp4 --title "${topic.intent.slice(0, 20)}" --tag "${topic.tags.join(',')}" --tid 208`;
+    records.push({
+      hook: 'pmo-report-bilibili',
+      input: { tool_name: 'Bash', tool_input: { command }, tool_output: `上传成功 BV1xx${n}`, session_id: sessionId, cwd }
+    });
+  }
+  if (extra() < 0.3) {
+    records.push({
+      hook: 'pmo-report-x',
+      input: { tool_name: 'Skill', tool_input: { skill: 'x-post', args: topic.intent }, tool_output: `posted https://x.com/status/${n}`, session_id: sessionId, cwd }
+    });
+  }
+
+  records.push({
+    hook: 'pmo-session-end',
+    input: { session_id: sessionId, cwd, reason: 'exit' },
+    transcript: transcript(random, topic.intent, [
+      ['Skill', { skill: 'api-draw' }],
+      ['Bash', { command: `python draw.py > ${cwd}/output/cover-${n}.png` }],
+      ['Write', { file_path: `${cwd}/drafts/${n}.md` }]
+    ], '封面和文案都做好了。')
+  });
+
+  if (random() < 0.6) {
+    const args = `标题：${topic.intent.slice(0, 14)}\n文案：${topic.intent}\n标签：${topic.tags.join('，')}\n图片：/tmp/${n}.png`;
+    records.push({
+      hook: 'pmo-report-xhs',
+      input: { tool_name: 'Skill', tool_input: { skill: 'xiaohongshu', args }, session_id: sessionId, cwd }
+    });
+  }
+}
+
+function researchSession(random, n, records) {
+  const cwd = `${PAC}/research-bu`;
+  const topic = pick(random, ['AI 英语学习 App 竞品分析', 'Remotion vs Motion Canvas 技术选型', 'NVIDIA 财报解读']);
+  records.push({
+    hook: 'pmo-session-end',
+    input: { session_id: `replay-research-${n}`, cwd, reason: 'exit' },
+    transcript: transcript(random, `调研一下 ${topic}`, [
+      ['Skill', { skill: 'research' }],
+      ['WebFetch', { url: 'https://example.com' }],
+      ['Write', { file_path: `${cwd}/reports/${n}.md` }]
+    ], `${topic} 报告已输出。`)
+  });
+}
+
+function chatSession(random, n, records) {
+  const cwd = pick(random, [`${PAC}/product-bu/viva`, `${PAC}/investment-bu`, '/Users/liuyishou']);
+  records.push({
+    hook: 'pmo-session-end',
+    input: { session_id: `replay-chat-${n}`, cwd, reason: 'exit' },
+    transcript: transcript(random, pick(random, CHAT_INTENTS), [
+      ['Read', { file_path: `${cwd}/README.md` }],
+      ['Grep', { pattern: 'error' }]
+    ], '原因是依赖版本不一致。')
+  });
+}
+
+function strayWorkSession(random, n, records, extra) {
+  const cwd = pick(random, [`${PAC}/investment-bu`, '/Users/liuyishou/Downloads']);
+  if (cwd.endsWith('investment-bu')) {
+    const sessionId = `replay-stray-${n}`;
+    if (extra() < 0.5) {
+      records.push({
+        hook: 'pmo-report-trade',
+        input: { tool_name: 'Skill', tool_input: { skill: 'futu-trades', args: 'NVDA 100' }, tool_output: '买入 NVDA 100 股 已成交', session_id: sessionId, cwd }
+      });
+    }
+    if (extra() < 0.3) {
+      records.push({
+        hook: 'pmo-report-research',
+        input: { tool_name: 'Skill', tool_input: { skill: 'research', args: 'NVIDIA 财报解读' }, tool_output: '报告已输出', session_id: sessionId, cwd }
+      });
+    }
+  }
+  records.push({
+    hook: 'pmo-session-end',
+    input: { session_id: `replay-stray-${n}`, cwd, reason: 'exit' },
+    transcript: transcript(random, '整理一下这个表格', [
+      ['Write', { file_path: `${cwd}/notes-${n}.md` }]
+    ], '整理好了。')
+  });
+}
+
+/**
+ * 生成回放数据
+ * @param {number} sessions - session 数量
+ * @param {number} [seed]
+ */
+function generatePayloads(sessions, seed = 42) {
+  const random = createRandom(seed);
+  const extra = createRandom(seed ^ 0x5bd1e995);
+  const records = [];
+  const mix = [
+    [0.35, productSession],
+    [0.25, contentSession],
+    [0.1, researchSession],
+    [0.2, chatSession],
+    [0.1, strayWorkSession]
+  ];
+  for (let n = 0; n < sessions; n++) {
+    let roll = random();
+    const [, make] = mix.find(([p]) => (roll -= p) < 0) || mix[0];
+    make(random, n, records, extra);
+  }
+  return records;
+}
+
+function writePayloads(file, records) {
+  fs.writeFileSync(file, records.map(r => JSON.stringify(r)).join('\n') + '\n');
+}
+
+function readPayloads(file) {
+  return fs.readFileSync(file, 'utf8').split('\n').filter(Boolean).map(line => JSON.parse(line));
+}
+
+module.exports = {
+  generatePayloads,
+  writePayloads,
+  readPayloads
+};
@@ -0,0 +1,118 @@
+#!/usr/bin/env node
+/**
+ * 压测：session 索引前后的每事件 Linear 往返次数
+ *
+ * 每个 session 依次触发一条完整的 superpower 生命周期：
+ * brainstorming → writing-plans → using-git-worktrees → TDD → code-review → verification
+ * 替身预置 SEED_ISSUES 条无关 Issue，模拟团队 Issue 规模增长后的全文搜索
+ *
+ * 两种模式各跑在独立子进程里（索引开关在模块加载时读取）：
+ * - search：PMO_SESSION_INDEX=0，每个事件都做 description contains 搜索
+ * - index：本地索引命中，只在 createIssue 时写入
+ *
+ * 用法：node pmo/bench/session-index.js [sessions] [seedIssues] [latencyMs]
+ */
+
+const { fork } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { startStandin } = require('./linear-standin');
+
+const SESSIONS = Number(process.argv[2]) || 10;
+const SEED_ISSUES = Number(process.argv[3] ?? 2000);
+const LATENCY_MS = Number(process.argv[4] ?? 20);
+
+const LIFECYCLE = [
+  { skill: 'superpowers:brainstorming', phase: 'requirements', action: 'create_or_update_issue', description: '需求分析完成' },
+  { skill: 'superpowers:writing-plans', phase: 'planning', action: 'update_issue_with_plan', description: '实施计划写好' },
+  { skill: 'superpowers:using-git-worktrees', phase: 'development', action: 'set_in_progress', description: '开发分支创建' },
+  { skill: 'superpowers:test-driven-development', phase: 'development', action: 'log_activity', description: 'TDD 开发中' },
+  { skill: 'superpowers:requesting-code-review', phase: 'review', action: 'set_in_review', description: '请求代码审查' },
+  { skill: 'superpowers:verification-before-completion', phase: 'verification', action: 'log_verification', description: '验证完成' }
+];
+
+// 子进程：按模式跑完所有 session，把耗时回传给父进程
+async function runWorker() {
+  const { handleEvent } = require('../lib/handler');
+  const spool = require('../lib/spool');
+  const runId = process.env.BENCH_RUN_ID;
+  const eventMs = [];
+
+  for (let s = 0; s < SESSIONS; s++) {
+    const sessionId = `${runId}-session-${s}`;
+    for (const step of LIFECYCLE) {
+      const start = process.hrtime.bigint();
+      await handleEvent({ type: 'superpower_event', sessionId, cwd: '/Users/x/usr/pac/product-bu/viva', ...step });
+      // 逐事件提交，只看查找路径的差异（批量合并见 spool-batching.js）
+      await spool.flush({ force: true });
+      eventMs.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+  }
+
+  process.send({ eventMs });
+}
+
+function runMode(mode, env) {
+  return new Promise((resolve, reject) => {
+    const child = fork(__filename, process.argv.slice(2), {
+      env: { ...env, BENCH_WORKER: '1', BENCH_RUN_ID: mode, PMO_SESSION_INDEX: mode === 'search' ? '0' : '1' }
+    });
+    child.on('message', resolve);
+    child.on('error', reject);
+    child.on('exit', (code) => { if (code) reject(new Error(`${mode} worker exited ${code}`)); });
+  });
+}
+
+async function main() {
+  const standin = await startStandin({ latencyMs: LATENCY_MS });
+  const teamId = 'fcaf8084-612e-43e2-b4e4-fe81ae523627';
+  for (let i = 0; i < SEED_ISSUES; i++) {
+    standin.store.issues.set(`seed-${i}`, {
+      id: `seed-${i}`, identifier: `P-seed-${i}`, teamId,
+      description: `sessionId: seed-${i}\n\n${'历史 Issue 描述 '.repeat(20)}`, state: { id: 'done', name: 'Done' }
+    });
+  }
+
+  const indexFile = path.join(os.tmpdir(), `pmo-bench-session-index-${process.pid}.json`);
+  const spoolDir = path.join(os.tmpdir(), `pmo-bench-session-spool-${process.pid}`);
+  const env = {
+    ...process.env,
+    LINEAR_API_URL: standin.url,
+    LINEAR_API_KEY: 'bench',
+    SUPABASE_ANON_KEY: '',
+    PMO_SESSION_INDEX_FILE: indexFile,
+    PMO_SPOOL_DIR: spoolDir
+  };
+
+  const rows = [];
+  for (const mode of ['search', 'index']) {
+    standin.resetStats();
+    const { eventMs } = await runMode(mode, env);
+    const events = eventMs.length;
+    const sorted = [...eventMs].sort((a, b) => a - b);
+    rows.push({
+      mode,
+      events,
+      roundTripsPerEvent: +(standin.stats.requests / events).toFixed(2),
+      searches: standin.stats.operations['issues(filter'] || 0,
+      reads: standin.stats.operations['issue(id'] || 0,
+      writes: (standin.stats.operations.issueUpdate || 0) + (standin.stats.operations.issueCreate || 0),
+      p50Ms: +sorted[Math.floor(events * 0.5)].toFixed(2),
+      meanMs: +(eventMs.reduce((a, b) => a + b, 0) / events).toFixed(2)
+    });
+  }
+
+  await standin.close();
+  fs.rmSync(indexFile, { force: true });
+  fs.rmSync(spoolDir, { recursive: true, force: true });
+
+  console.log(`sessions: ${SESSIONS}, events/session: ${LIFECYCLE.length}, seeded issues: ${SEED_ISSUES}, latency: ${LATENCY_MS}ms`);
+  console.table(rows);
+}
+
+if (process.env.BENCH_WORKER) {
+  runWorker().catch(err => { console.error(err); process.exit(1); });
+} else {
+  main().catch(err => { console.error(err); process.exit(1); });
+}
@@ -0,0 +1,137 @@
+#!/usr/bin/env node
+/**
+ * 压测：spool 合并批量提交前后的 Linear 往返次数
+ *
+ * 场景：
+ * 1. 产品 session 生命周期（brainstorming → … → finishing，7 个 superpower 事件）
+ * 2. 批量发布（BURST 条 xhs_publish 连续到达）
+ *
+ * 每个场景比较两种 flush 策略：
+ * - per-event：每个事件后立即 flush（等价于逐步直写，只有同一事件内的操作被合并）
+ * - windowed：合并窗口结束后统一 flush（daemon 的默认行为）
+ *
+ * 最后做一次崩溃重放检查：请求已到达替身但 commit 记录未写入，重放后不应产生重复 Issue 或重复追加
+ *
+ * 用法：node pmo/bench/spool-batching.js [sessions] [burst] [latencyMs]
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { startStandin } = require('./linear-standin');
+
+const SESSIONS = Number(process.argv[2]) || 5;
+const BURST = Number(process.argv[3]) || 8;
+const LATENCY_MS = Number(process.argv[4] ?? 20);
+
+const WORK_DIR = fs.mkdtempSync(path.join(os.tmpdir(), 'pmo-bench-spool-'));
+process.env.PMO_SPOOL_DIR = path.join(WORK_DIR, 'spool');
+process.env.PMO_SESSION_INDEX_FILE = path.join(WORK_DIR, 'session-index.json');
+process.env.LINEAR_API_KEY = 'bench';
+process.env.SUPABASE_ANON_KEY = '';
+
+const LIFECYCLE = [
+  ['superpowers:brainstorming', 'requirements', 'create_or_update_issue', '需求分析完成'],
+  ['superpowers:writing-plans', 'planning', 'update_issue_with_plan', '实施计划写好'],
+  ['superpowers:using-git-worktrees', 'development', 'set_in_progress', '开发分支创建'],
+  ['superpowers:test-driven-development', 'development', 'log_activity', 'TDD 开发中'],
+  ['superpowers:requesting-code-review', 'review', 'set_in_review', '请求代码审查'],
+  ['superpowers:verification-before-completion', 'verification', 'log_verification', '验证完成'],
+  ['superpowers:finishing-a-development-branch', 'completion', 'set_ready_for_release', '分支开发完成']
+].map(([skill, phase, action, description]) => ({ type: 'superpower_event', skill, phase, action, description }));
+
+function lifecycleEvents(tag) {
+  const events = [];
+  for (let s = 0; s < SESSIONS; s++) {
+    for (const step of LIFECYCLE) {
+      events.push({ ...step, sessionId: `${tag}-session-${s}`, cwd: '/Users/x/usr/pac/product-bu/viva' });
+    }
+  }
+  return events;
+}
+
+function burstEvents(tag) {
+  return Array.from({ length: BURST }, (_, i) => ({
+    type: 'xhs_publish',
+    bu: 'content',
+    sessionId: `${tag}-batch-publish`,
+    data: { title: `批量发布 #${i}`, tags: ['AI'], content: '正文', imageCount: 3 }
+  }));
+}
+
+async function runScenario(standin, handleEvent, spool, events, strategy) {
+  standin.resetStats();
+  for (const event of events) {
+    await handleEvent(event);
+    if (strategy === 'per-event') await spool.flush({ force: true });
+  }
+  await spool.flush({ force: true });
+  return {
+    events: events.length,
+    roundTrips: standin.stats.requests,
+    perEvent: +(standin.stats.requests / events.length).toFixed(2),
+    fields: standin.stats.fields
+  };
+}
+
+/**
+ * 崩溃重放检查：第一次提交到达替身后抛错（模拟 commit 前崩溃），再次 flush 应幂等
+ */
+async function replayCheck(standin, handleEvent, spool, handler) {
+  const sessionId = 'replay-session';
+  await handleEvent({ ...LIFECYCLE[0], sessionId, cwd: '/Users/x/usr/pac/product-bu/viva' });
+  await handleEvent(burstEvents('replay')[0]);
+
+  const realCall = handler.callLinear;
+  let crashed = false;
+  handler.callLinear = async (query, variables) => {
+    const result = await realCall(query, variables);
+    if (!crashed && query.startsWith('mutation SpoolFlush')) {
+      crashed = true;
+      throw new Error('simulated crash after request reached server');
+    }
+    return result;
+  };
+  const first = await spool.flush({ force: true });
+  handler.callLinear = realCall;
+
+  await handleEvent({ ...LIFECYCLE[1], sessionId, cwd: '/Users/x/usr/pac/product-bu/viva' });
+  await spool.flush({ force: true });
+
+  const issues = [...standin.store.issues.values()].filter(i => /sessionId: replay-/.test(i.description));
+  const sessionIssue = issues.find(i => i.description.includes(`sessionId: ${sessionId}`));
+  const planAppends = (sessionIssue?.description.match(/ - 实施计划\n/g) || []).length;
+  return {
+    firstFlushError: first.error || null,
+    issuesCreated: issues.length,
+    planAppends,
+    ok: issues.length === 2 && planAppends === 1
+  };
+}
+
+async function main() {
+  const standin = await startStandin({ latencyMs: LATENCY_MS });
+  process.env.LINEAR_API_URL = standin.url;
+  const handler = require('../lib/handler');
+  const spool = require('../lib/spool');
+
+  const rows = [];
+  for (const strategy of ['per-event', 'windowed']) {
+    rows.push({ scenario: 'lifecycle', strategy, ...(await runScenario(standin, handler.handleEvent, spool, lifecycleEvents(strategy), strategy)) });
+    rows.push({ scenario: 'burst', strategy, ...(await runScenario(standin, handler.handleEvent, spool, burstEvents(strategy), strategy)) });
+  }
+
+  const replay = await replayCheck(standin, handler.handleEvent, spool, handler);
+  await standin.close();
+  fs.rmSync(WORK_DIR, { recursive: true, force: true });
+
+  console.log(`sessions: ${SESSIONS}, burst: ${BURST}, latency: ${LATENCY_MS}ms`);
+  console.table(rows);
+  console.log('crash replay:', JSON.stringify(replay));
+  if (!replay.ok) process.exitCode = 1;
+}
+
+main().catch(err => {
+  console.error(err);
+  process.exit(1);
+});
@@ -0,0 +1,239 @@
+#!/usr/bin/env node
+/**
+ * 压测：流式 + checkpoint 摘要提取 vs 整文件读取（改造前的 extractStructuredSummary）
+ *
+ * 合成 FILES 个 SIZE_MB 的 transcript：用户消息、assistant 文本 + tool_use、
+ * 大块 tool_result（2KB–400KB）、progress / snapshot 等无关行，外加一条 12MB 的超长工具返回
+ *
+ * 每种模式在独立子进程里跑，记录 wall time 和峰值 RSS：
+ * - legacy：readFileSync → split → 每行 JSON.parse
+ * - stream：流式读取，不读写 checkpoint（冷启动）
+ * - incremental：先建 checkpoint，再追加 ~256KB 后只读新增部分（Scanner 的常态）
+ * - scanner pass：FILES 个 transcript，legacy 串行 vs worker 池（冷启动）
+ *
+ * 用法：node pmo/bench/transcript-summary.js [sizeMB] [files]
+ */
+
+const { fork } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const SIZE_MB = Number(process.argv[2]) || 100;
+const FILES = Number(process.argv[3]) || 4;
+
+const WORK_DIR = process.env.BENCH_WORK_DIR || fs.mkdtempSync(path.join(os.tmpdir(), 'pmo-bench-transcripts-'));
+process.env.PMO_TRANSCRIPT_CHECKPOINT_DIR = path.join(WORK_DIR, 'checkpoints');
+
+// ============ 合成 transcript ============
+
+function createRandom(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+const FILLER = '这一段是工具返回的内容，模拟文件内容、命令输出和网页抓取结果。 const x = require("y"); ';
+const BYTES_PER_CHAR = Buffer.byteLength(FILLER) / FILLER.length;
+const FILLER_POOL = FILLER.repeat(Math.ceil(13 * 1024 * 1024 / Buffer.byteLength(FILLER)));
+
+function filler(bytes) {
+  return FILLER_POOL.substring(0, Math.floor(bytes / BYTES_PER_CHAR));
+}
+
+function turnLines(random, n, cwd) {
+  const base = { sessionId: 'bench', cwd, timestamp: new Date(1700000000000 + n * 1000).toISOString() };
+  const lines = [];
+  if (n % 10 === 0) {
+    lines.push({ ...base, type: 'user', message: { role: 'user', content: `第 ${n} 轮：继续把 viva 的设置页做完，顺便看看性能问题` } });
+  }
+  const tool = ['Read', 'Write', 'Edit', 'Bash', 'Grep'][Math.floor(random() * 5)];
+  const input = tool === 'Bash' ? { command: `npm run build > dist/build-${n}.log` } : { file_path: `${cwd}/src/file-${n % 50}.ts` };
+  lines.push({
+    ...base,
+    type: 'assistant',
+    message: { role: 'assistant', content: [{ type: 'text', text: `第 ${n} 步完成，下一步调用 ${tool}。` }, { type: 'tool_use', id: `toolu_${n}`, name: tool, input }] }
+  });
+  const resultBytes = random() < 0.8 ? 2048 + Math.floor(random() * 30000) : 100000 + Math.floor(random() * 300000);
+  lines.push({ ...base, type: 'user', message: { role: 'user', content: [{ type: 'tool_result', tool_use_id: `toolu_${n}`, content: filler(resultBytes) }] } });
+  if (random() < 0.3) lines.push({ ...base, type: 'progress', data: { message: { type: 'user', content: filler(2000) } } });
+  if (random() < 0.1) lines.push({ type: 'file-history-snapshot', snapshot: { files: filler(8000) } });
+  return lines;
+}
+
+/**
+ * 写出一个约 sizeMB 的 transcript
+ */
+function writeTranscript(file, sizeMB, seed) {
+  const random = createRandom(seed);
+  const cwd = '/Users/liuyishou/usr/pac/product-bu/viva';
+  const fd = fs.openSync(file, 'w');
+  const target = sizeMB * 1024 * 1024;
+  let written = 0;
+  let n = 0;
+  const write = (entry) => { written += fs.writeSync(fd, JSON.stringify(entry) + '\n'); };
+
+  while (written < target) {
+    turnLines(random, n, cwd).forEach(write);
+    // 中途一条超长工具返回（整个读文件 / 大日志）
+    if (n === 100) {
+      write({ type: 'assistant', cwd, message: { role: 'assistant', content: [{ type: 'tool_use', id: 'toolu_big', name: 'Write', input: { file_path: `${cwd}/fixtures/huge.json`, content: filler(12 * 1024 * 1024) } }] } });
+      write({ type: 'user', cwd, message: { role: 'user', content: [{ type: 'tool_result', tool_use_id: 'toolu_big', content: filler(12 * 1024 * 1024) }] } });
+    }
+    n++;
+  }
+  write({ type: 'assistant', cwd, message: { role: 'assistant', content: [{ type: 'text', text: '设置页完成，构建通过，性能问题定位到列表渲染。' }] } });
+  fs.closeSync(fd);
+  return written;
+}
+
+function appendTurns(file, bytes, seed) {
+  const random = createRandom(seed);
+  let written = 0;
+  let n = 100000;
+  const fd = fs.openSync(file, 'a');
+  while (written < bytes) {
+    for (const entry of turnLines(random, n++, '/Users/liuyishou/usr/pac/product-bu/viva')) {
+      written += fs.writeSync(fd, JSON.stringify(entry) + '\n');
+    }
+  }
+  fs.closeSync(fd);
+  return written;
+}
+
+// ============ 改造前实现（整文件读取） ============
+
+function legacySummary(transcriptPath) {
+  const content = fs.readFileSync(transcriptPath, 'utf8');
+  const lines = content.trim().split('\n');
+  if (lines.length < 10) return null;
+
+  const userMessages = [];
+  const toolNames = new Set();
+  const filePaths = new Set();
+  let lastAssistantText = '';
+
+  for (const line of lines) {
+    let entry;
+    try { entry = JSON.parse(line); } catch (e) { continue; }
+    if (entry.type === 'user' && entry.message?.content) {
+      const text = typeof entry.message.content === 'string' ? entry.message.content : JSON.stringify(entry.message.content);
+      userMessages.push(text.substring(0, 500));
+    }
+    if (entry.type === 'assistant' && Array.isArray(entry.message?.content)) {
+      for (const block of entry.message.content) {
+        if (block.type === 'tool_use') {
+          toolNames.add(block.name);
+          const input = block.input || {};
+          if (input.file_path) filePaths.add(input.file_path);
+          const match = input.command?.match(/>\s*(\S+)/);
+          if (match) filePaths.add(match[1]);
+        }
+      }
+      const text = entry.message.content.filter(c => c.type === 'text').map(c => c.text).join(' ');
+      if (text.trim()) lastAssistantText = text;
+    }
+  }
+  if (userMessages.length === 0) return null;
+  return { intent: userMessages[0], tools: [...toolNames], files: [...filePaths], lastAssistantText };
+}
+
+// ============ 子进程 ============
+
+async function runWorker() {
+  const { extractStructuredSummary, summarizeTranscript } = require('../lib/transcript-summary');
+  const { summarizeMany } = require('../lib/transcript-pool');
+  const files = JSON.parse(process.env.BENCH_FILES);
+  const mode = process.env.BENCH_WORKER;
+  const start = process.hrtime.bigint();
+  let output;
+
+  if (mode === 'legacy') {
+    output = files.map(legacySummary);
+  } else if (mode === 'stream') {
+    output = files.map(f => extractStructuredSummary(f, { checkpoint: false }));
+  } else if (mode === 'checkpoint') {
+    output = files.map(f => summarizeTranscript(f).bytesRead);
+  } else if (mode === 'pool') {
+    const results = await summarizeMany(files, { checkpoint: false, concurrency: Number(process.env.BENCH_POOL) || undefined });
+    output = files.map(f => results.get(f).extracted);
+  }
+
+  const wallMs = Number(process.hrtime.bigint() - start) / 1e6;
+  // worker 线程的内存算在同一进程的 maxRSS 里
+  process.send({ wallMs, peakRssMB: process.resourceUsage().maxRSS / 1024, output }, () => process.disconnect());
+}
+
+function runMode(mode, files, extraEnv = {}) {
+  return new Promise((resolve, reject) => {
+    const child = fork(__filename, [], {
+      env: { ...process.env, ...extraEnv, BENCH_WORKER: mode, BENCH_FILES: JSON.stringify(files), BENCH_WORK_DIR: WORK_DIR }
+    });
+    child.on('message', resolve);
+    child.on('error', reject);
+    child.on('exit', (code) => { if (code) reject(new Error(`${mode} worker exited ${code}`)); });
+  });
+}
+
+function row(label, files, result) {
+  return { mode: label, transcripts: files.length, wallMs: Math.round(result.wallMs), peakRssMB: Math.round(result.peakRssMB) };
+}
+
+function sameSummary(legacy, stream) {
+  if (!legacy || !stream) return legacy === stream;
+  return legacy.intent === stream.intent
+    && JSON.stringify(legacy.tools) === JSON.stringify(stream.tools)
+    && JSON.stringify(legacy.files.slice(0, 200)) === JSON.stringify(stream.files);
+}
+
+async function main() {
+  const files = [];
+  let totalBytes = 0;
+  const genStart = Date.now();
+  for (let i = 0; i < FILES; i++) {
+    const file = path.join(WORK_DIR, `transcript-${i}.jsonl`);
+    totalBytes += writeTranscript(file, SIZE_MB, 1000 + i);
+    files.push(file);
+  }
+  console.log(`generated ${FILES} × ${SIZE_MB}MB transcripts (${(totalBytes / 1024 / 1024).toFixed(0)}MB) in ${Date.now() - genStart}ms`);
+
+  const single = [files[0]];
+  const legacy = await runMode('legacy', single);
+  const stream = await runMode('stream', single);
+  await runMode('checkpoint', single);
+  const appended = appendTurns(files[0], 256 * 1024, 7);
+  const incremental = await runMode('checkpoint', single);
+
+  const legacyPass = await runMode('legacy', files);
+  const poolPass = await runMode('pool', files);
+
+  const rows = [
+    row('legacy (1 file)', single, legacy),
+    row('stream (1 file)', single, stream),
+    row(`incremental +${Math.round(appended / 1024)}KB`, single, incremental),
+    row('scanner pass: legacy serial', files, legacyPass),
+    row(`scanner pass: worker pool`, files, poolPass)
+  ];
+
+  fs.rmSync(WORK_DIR, { recursive: true, force: true });
+
+  console.table(rows);
+  const equivalent = legacyPass.output.every((l, i) => sameSummary(l, poolPass.output[i])) && sameSummary(legacy.output[0], stream.output[0]);
+  console.log(JSON.stringify({
+    incrementalBytesRead: incremental.output[0],
+    equivalent,
+    cpus: os.cpus().length
+  }));
+  if (!equivalent) process.exitCode = 1;
+}
+
+if (process.env.BENCH_WORKER) {
+  runWorker().catch(err => { console.error(err); process.exit(1); });
+} else {
+  main().catch(err => { console.error(err); process.exit(1); });
+}
@@ -5,11 +5,14 @@
  * 触发时机：PostToolUse (Skill)
  * 职责：检测 superpowers skill 调用，启动 PMO agent 处理
  *
- * 架构原则：Hook 只负责检测和投递，所有 Linear 操作通过 PMO Agent 实现
+ * 架构原则：Hook 只负责检测和投递；归属明确的事件由 handler 直接更新 Linear，其余交给 PMO Agent
  */
 
-const { spawn } = require('child_process');
 const fs = require('fs');
+const { submitAgentJob, dispatchEvent } = require('../lib/client');
+// 规则分类器：高置信事件直接走 handler 的确定性路径，不启动 Agent
+const classifier = require('../lib/classifier');
+const trace = require('../lib/tracing').hook('superpowers-tracker');
 
 // 需要追踪的 superpowers（影响 Linear 状态的关键节点）
 const TRACKED_SUPERPOWERS = {
@@ -51,7 +54,6 @@ const TRACKED_SUPERPOWERS = {
 };
 
 const LOG_FILE = '/tmp/superpowers-tracker.log';
-const PMO_DIR = '/Users/liuyishou/usr/pac/pmo';
 
 function log(msg) {
   fs.appendFileSync(LOG_FILE, `[${new Date().toISOString()}] ${msg}\n`);
@@ -66,20 +68,12 @@ async function readInput() {
       while ((chunk = process.stdin.read()) !== null) data += chunk;
     });
     process.stdin.on('end', () => {
-      try { resolve(JSON.parse(data)); }
+      try { resolve(trace.parse(data)); }
       catch (e) { resolve({}); }
     });
   });
 }
 
-function detectBu(cwd) {
-  if (!cwd) return 'unknown';
-  if (cwd.includes('product-bu')) return 'product';
-  if (cwd.includes('content-bu')) return 'content';
-  if (cwd.includes('investment-bu')) return 'investment';
-  return 'unknown';
-}
-
 async function main() {
   const input = await readInput();
   log(`Input: ${JSON.stringify(input)}`);
@@ -100,10 +94,11 @@ async function main() {
     return;
   }
 
-  const bu = detectBu(cwd);
+  const verdict = classifier.classify({ eventType: 'superpower_event', cwd, skill: skillName });
+  const bu = verdict.bu;
 
-  // 只追踪产品事业部的 superpowers
-  if (bu !== 'product') {
+  // 只追踪产品事业部的 superpowers（事业部只按 cwd 目录判断）
+  if (bu !== 'product' || verdict.decision === 'skip') {
     console.log(JSON.stringify({ result: 'skipped', reason: `BU ${bu} not tracked` }));
     return;
   }
@@ -120,42 +115,28 @@ async function main() {
     timestamp: new Date().toISOString()
   };
 
-  log(`Dispatching to PMO Agent: ${JSON.stringify(event)}`);
-
-  // 通过 PMO Agent 处理（异步，不阻塞）
-  const prompt = `处理 superpower 事件：
-${JSON.stringify(event, null, 2)}
+  // 快速路径：归属明确时由 handler 直接更新 Linear
+  if (!verdict.spawnAgent) {
+    log(`Fast path (${verdict.rule}, confidence ${verdict.confidence}): ${JSON.stringify(event)}`);
+    const result = await dispatchEvent(event);
+    console.log(JSON.stringify({
+      result: 'dispatched',
+      skill: skillName,
+      phase: tracked.phase,
+      action: tracked.linearAction,
+      bu: bu,
+      handledBy: 'rules',
+      outcome: result?.result
+    }));
+    return;
+  }
 
-请根据 CLAUDE.md 中的规则处理此事件，更新 Linear Issue。`;
+  log(`Dispatching to PMO Agent (confidence ${verdict.confidence}): ${JSON.stringify(event)}`);
 
+  // 通过 PMO Agent 处理（由调度队列合并同 session 的阶段事件后再启动）
   try {
-    // 移除 ANTHROPIC_API_KEY，让 claude 使用 Pro 订阅认证而非 API key
-    const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
-
-    // 启动 PMO Agent（后台运行，不阻塞 hook）
-    const child = spawn('claude', [
-      '--dangerously-skip-permissions',
-      '--print',
-      '-p', prompt
-    ], {
-      cwd: PMO_DIR,
-      detached: true,
-      stdio: ['ignore', 'pipe', 'pipe'],
-      env: cleanEnv
-    });
-
-    // 捕获输出用于日志（可选）
-    let output = '';
-    child.stdout.on('data', (data) => { output += data.toString(); });
-    child.stderr.on('data', (data) => { output += data.toString(); });
-
-    child.on('close', (code) => {
-      log(`PMO Agent finished with code ${code}`);
-      if (output) log(`PMO Agent output: ${output.substring(0, 500)}`);
-    });
-
-    // 让子进程在后台运行
-    child.unref();
+    const scheduled = await submitAgentJob({ kind: 'superpower', bu, sessionId: session_id, event });
+    log(`Agent job ${scheduled.result}: ${JSON.stringify(scheduled)}`);
 
     console.log(JSON.stringify({
       result: 'dispatched',
@@ -163,10 +144,11 @@ ${JSON.stringify(event, null, 2)}
       phase: tracked.phase,
       action: tracked.linearAction,
       bu: bu,
-      message: 'Event dispatched to PMO Agent'
+      merged: scheduled.merged || false,
+      message: 'Event queued for PMO Agent'
     }));
   } catch (e) {
-    log(`Error spawning PMO Agent: ${e.message}`);
+    log(`Error scheduling PMO Agent: ${e.message}`);
     console.log(JSON.stringify({
       result: 'error',
       skill: skillName,
@@ -0,0 +1,465 @@
+/**
+ * Agent Scheduler - PMO Agent（claude -p）调度队列
+ *
+ * 职责：
+ * 1. 并发上限：全局 MAX_CONCURRENT，单个事业部 MAX_PER_BU；同一 session 同时只跑一个 Agent
+ * 2. 防抖合并：同一 session 的 superpower 事件在 DEBOUNCE_MS 窗口内合并成一次调用，
+ *    prompt 中按到达顺序携带完整事件列表（最长推迟 MAX_DELAY_MS）
+ * 3. 优先级：发布 / 交易 > 测试 > superpower > session 总结
+ * 4. 持久化：队列落盘为 queue.json，重启后继续；被打断的任务重新排队
+ * 5. 失败重试：非 0 退出 / 超时 / 被打断的任务按 RETRY_MS 指数退避重新排队，
+ *    共 MAX_ATTEMPTS 次仍失败的转入 dead.jsonl（daemon stats 的 agents.deadLetters 报告）
+ *
+ * 由 daemon 托管；daemon 不在线时 hook 把任务追加到 inbox.jsonl，daemon 启动时收入队列
+ * Agent 命令可用 PMO_AGENT_CMD 替换（压测 / 回放用假 Agent）
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { spawn } = require('child_process');
+const tracing = require('./tracing');
+
+const AGENT_DIR = process.env.PMO_AGENT_DIR
+  || path.join(process.env.HOME || '/tmp', '.claude/pmo/agents');
+const QUEUE_FILE = path.join(AGENT_DIR, 'queue.json');
+const INBOX_FILE = path.join(AGENT_DIR, 'inbox.jsonl');
+const DEAD_FILE = path.join(AGENT_DIR, 'dead.jsonl');
+const LOG_FILE = process.env.PMO_AGENT_LOG || '/tmp/pmo-agents.log';
+
+const PMO_DIR = path.resolve(__dirname, '..');
+// 默认用 PATH 上的 claude；daemon 由 launchd 启动、PATH 里没有时用 CLAUDE_BIN 指定绝对路径
+const CLAUDE_BIN = process.env.CLAUDE_BIN || 'claude';
+
+const MAX_CONCURRENT = Number(process.env.PMO_AGENT_MAX_CONCURRENT) || 2;
+const MAX_PER_BU = Number(process.env.PMO_AGENT_MAX_PER_BU) || 1;
+const DEBOUNCE_MS = Number(process.env.PMO_AGENT_DEBOUNCE_MS ?? 90 * 1000);
+const MAX_DELAY_MS = Number(process.env.PMO_AGENT_MAX_DELAY_MS ?? 10 * 60 * 1000);
+const RUN_TIMEOUT_MS = Number(process.env.PMO_AGENT_TIMEOUT_MS) || 15 * 60 * 1000;
+const INBOX_POLL_MS = 10 * 1000;
+const RETRY_MS = Number(process.env.PMO_AGENT_RETRY_MS ?? 60 * 1000);
+const MAX_ATTEMPTS = 3;
+const SAMPLE_SIZE = 200;
+
+// 数字越小越先跑
+const PRIORITY = {
+  publish: 0,
+  trade: 0,
+  test: 1,
+  superpower: 2,
+  session_end: 3
+};
+
+// 可合并的任务类型：同一 session 未开始的任务直接追加事件
+const MERGEABLE = new Set(['superpower']);
+
+const state = {
+  jobs: null,            // 排队中 + 运行中（持久化）
+  running: new Map(),    // jobId → { child, timer }
+  spans: new Map(),      // jobId → agent_spawn span（不落盘）
+  wakeTimer: null,
+  inboxTimer: null,
+  started: false
+};
+
+const stats = {
+  submitted: 0,
+  merged: 0,
+  spawned: 0,
+  completed: 0,
+  failed: 0,
+  requeued: 0,
+  dead: 0,
+  waitMs: [],
+  runMs: []
+};
+
+function log(msg) {
+  fs.appendFileSync(LOG_FILE, `[${new Date().toISOString()}] ${msg}\n`);
+}
+
+function agentCommand() {
+  if (process.env.PMO_AGENT_CMD) {
+    const [cmd, ...args] = process.env.PMO_AGENT_CMD.trim().split(/\s+/);
+    return { cmd, args };
+  }
+  return { cmd: CLAUDE_BIN, args: [] };
+}
+
+/**
+ * 记一次失败：未到上限则退避后重新排队，否则转入 dead.jsonl
+ * @returns {boolean} 是否重新排队
+ */
+function retryOrBury(job, reason, now) {
+  job.status = 'queued';
+  job.attempts = (job.attempts || 0) + 1;
+  job.lastError = reason;
+  if (job.attempts < MAX_ATTEMPTS) {
+    job.notBefore = now + RETRY_MS * 2 ** (job.attempts - 1);
+    stats.requeued++;
+    log(`Requeue job ${job.id} (${job.kind} ${job.sessionId}) after attempt ${job.attempts}: ${reason}`);
+    return true;
+  }
+  try {
+    fs.mkdirSync(AGENT_DIR, { recursive: true });
+    fs.appendFileSync(DEAD_FILE, JSON.stringify({ ...job, status: 'dead', deadAt: now }) + '\n');
+  } catch (e) {
+    log(`Dead-letter write error: ${e.message}`);
+  }
+  stats.dead++;
+  log(`Dead-letter job ${job.id} (${job.kind} ${job.sessionId}) after ${job.attempts} attempts: ${reason}`);
+  return false;
+}
+
+function load() {
+  if (state.jobs) return state.jobs;
+  state.jobs = [];
+  try {
+    const saved = JSON.parse(fs.readFileSync(QUEUE_FILE, 'utf8'));
+    const now = Date.now();
+    for (const job of saved.jobs || []) {
+      // 上次运行被打断（重启 / daemon 退出）：算一次失败
+      if (job.status === 'running' && !retryOrBury(job, 'interrupted', now)) continue;
+      state.jobs.push(job);
+    }
+  } catch (e) {
+    // 文件不存在或损坏：从空队列开始
+  }
+  return state.jobs;
+}
+
+function save() {
+  try {
+    fs.mkdirSync(AGENT_DIR, { recursive: true });
+    const tmpFile = `${QUEUE_FILE}.${process.pid}.tmp`;
+    fs.writeFileSync(tmpFile, JSON.stringify({ jobs: state.jobs }));
+    fs.renameSync(tmpFile, QUEUE_FILE);
+  } catch (e) {
+    log(`Queue save error: ${e.message}`);
+  }
+}
+
+/**
+ * 规范化 hook 提交的任务
+ * @param {Object} spec
+ * @param {string} spec.kind - publish | trade | test | superpower | session_end
+ * @param {string} [spec.bu]
+ * @param {string} [spec.sessionId]
+ * @param {string} [spec.prompt] - 完整 prompt（superpower 任务由 event 渲染）
+ * @param {Object} [spec.event] - superpower 事件
+ * @param {string[]} [spec.args] - 额外的 claude 参数（--model、--max-turns 等）
+ * @param {string} [spec.trace] - 提交任务的 hook trace，agent_spawn span 记在它下面
+ */
+function normalize(spec, now) {
+  return {
+    id: crypto.randomUUID(),
+    kind: spec.kind,
+    bu: spec.bu || 'unknown',
+    sessionId: spec.sessionId || 'unknown',
+    priority: PRIORITY[spec.kind] ?? PRIORITY.session_end,
+    prompt: spec.prompt || null,
+    events: spec.event ? [spec.event] : [],
+    args: spec.args || [],
+    trace: spec.trace || null,
+    status: 'queued',
+    attempts: 0,
+    enqueuedAt: spec.submittedAt || now,
+    notBefore: MERGEABLE.has(spec.kind) ? now + DEBOUNCE_MS : now
+  };
+}
+
+/**
+ * 加入队列；可合并的任务并入同一 session 尚未开始的任务，并顺延防抖窗口
+ * @returns {{id: string, merged: boolean, events: number}}
+ */
+function enqueue(spec) {
+  const now = Date.now();
+  const jobs = load();
+  stats.submitted++;
+
+  if (MERGEABLE.has(spec.kind) && spec.event) {
+    // 重试中的任务不再并入新事件（否则防抖窗口会顶掉退避时间）
+    const pending = jobs.find(j => j.status === 'queued' && !j.attempts && j.kind === spec.kind && j.sessionId === spec.sessionId);
+    if (pending) {
+      pending.events.push(spec.event);
+      pending.notBefore = Math.min(now + DEBOUNCE_MS, pending.enqueuedAt + MAX_DELAY_MS);
+      stats.merged++;
+      save();
+      pump();
+      return { id: pending.id, merged: true, events: pending.events.length };
+    }
+  }
+
+  const job = normalize(spec, now);
+  jobs.push(job);
+  save();
+  pump();
+  return { id: job.id, merged: false, events: job.events.length };
+}
+
+function renderPrompt(job) {
+  if (job.kind !== 'superpower') return job.prompt;
+
+  return `处理 superpower 事件（同一 session 按发生顺序合并，共 ${job.events.length} 个）：
+${JSON.stringify(job.events, null, 2)}
+
+请根据 CLAUDE.md 中的规则按顺序处理这些事件，更新同一个 Linear Issue：
+每个阶段的记录按顺序追加，状态只需设置为最后一个事件对应的状态。`;
+}
+
+/**
+ * 按优先级挑选可运行的任务：到期、全局/事业部名额未满、同 session 没有在跑的任务
+ * 同一 session 内同类任务按提交顺序执行，不同类任务互不等待（发布不会排在仍在防抖的
+ * superpower 后面）；session 总结例外，等同 session 所有更早的任务，不会抢在阶段事件之前
+ */
+function pickRunnable(now) {
+  const running = state.jobs.filter(j => j.status === 'running');
+  if (running.length >= MAX_CONCURRENT) return [];
+
+  const perBu = {};
+  const busySessions = new Set();
+  for (const job of running) {
+    perBu[job.bu] = (perBu[job.bu] || 0) + 1;
+    busySessions.add(job.sessionId);
+  }
+
+  const sessionHead = new Map();
+  const kindHead = new Map();
+  const setHead = (heads, key, job) => {
+    const head = heads.get(key);
+    if (!head || job.enqueuedAt < head.enqueuedAt) heads.set(key, job);
+  };
+  for (const job of state.jobs) {
+    if (job.status !== 'queued' || job.sessionId === 'unknown') continue;
+    setHead(sessionHead, job.sessionId, job);
+    setHead(kindHead, `${job.sessionId}:${job.kind}`, job);
+  }
+  const isHead = (job) => {
+    if (job.sessionId === 'unknown') return true;
+    if (job.kind === 'session_end') return sessionHead.get(job.sessionId) === job;
+    return kindHead.get(`${job.sessionId}:${job.kind}`) === job;
+  };
+
+  const ready = state.jobs
+    .filter(j => j.status === 'queued' && j.notBefore <= now)
+    .filter(isHead)
+    .sort((a, b) => a.priority - b.priority || a.enqueuedAt - b.enqueuedAt);
+
+  const picked = [];
+  let slots = MAX_CONCURRENT - running.length;
+  for (const job of ready) {
+    if (slots === 0) break;
+    if ((perBu[job.bu] || 0) >= MAX_PER_BU) continue;
+    if (job.sessionId !== 'unknown' && busySessions.has(job.sessionId)) continue;
+    perBu[job.bu] = (perBu[job.bu] || 0) + 1;
+    busySessions.add(job.sessionId);
+    picked.push(job);
+    slots--;
+  }
+  return picked;
+}
+
+function recordSample(list, value) {
+  list.push(value);
+  if (list.length > SAMPLE_SIZE) list.shift();
+}
+
+function runJob(job) {
+  const now = Date.now();
+  const { cmd, args } = agentCommand();
+  // 移除 ANTHROPIC_API_KEY，让 claude 使用 Pro 订阅认证
+  const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
+
+  job.status = 'running';
+  job.startedAt = now;
+  const waitMs = now - job.enqueuedAt;
+  recordSample(stats.waitMs, waitMs);
+  stats.spawned++;
+  // 覆盖 Agent 整个生命周期，finishJob 时结束
+  state.spans.set(job.id, tracing.startSpan('agent_spawn', {
+    trace: job.trace,
+    session: job.sessionId,
+    kind: job.kind,
+    bu: job.bu,
+    events: job.events.length,
+    waitMs
+  }));
+
+  let child;
+  try {
+    child = spawn(cmd, [...args, '--dangerously-skip-permissions', '--print', ...job.args], {
+      cwd: PMO_DIR,
+      stdio: ['pipe', 'pipe', 'pipe'],
+      env: { ...cleanEnv, PMO_AGENT_JOB_ID: job.id }
+    });
+  } catch (e) {
+    finishJob(job, null, `spawn error: ${e.message}`);
+    return;
+  }
+
+  let output = '';
+  const collect = (data) => { if (output.length < 2000) output += data.toString(); };
+  child.stdout.on('data', collect);
+  child.stderr.on('data', collect);
+  child.stdin.on('error', () => {});
+  child.on('error', (err) => finishJob(job, null, `spawn error: ${err.message}`));
+  child.on('close', (code) => finishJob(job, code, output));
+
+  const entry = { child, timer: null, timedOut: false };
+  entry.timer = setTimeout(() => {
+    log(`Agent ${job.id} timed out after ${RUN_TIMEOUT_MS}ms, killing`);
+    entry.timedOut = true;
+    child.kill('SIGTERM');
+  }, RUN_TIMEOUT_MS);
+  state.running.set(job.id, entry);
+
+  child.stdin.end(renderPrompt(job));
+  log(`Agent ${job.id} started: ${job.kind} bu=${job.bu} session=${job.sessionId} events=${job.events.length} waited=${waitMs}ms`);
+}
+
+function finishJob(job, code, output) {
+  const entry = state.running.get(job.id);
+  if (job.status !== 'running') return;
+  if (entry) clearTimeout(entry.timer);
+  state.running.delete(job.id);
+
+  const runMs = Date.now() - job.startedAt;
+  recordSample(stats.runMs, runMs);
+  state.spans.get(job.id)?.end({ code });
+  state.spans.delete(job.id);
+  if (code === 0) stats.completed++;
+  else stats.failed++;
+
+  log(`Agent ${job.id} finished with code ${code} in ${runMs}ms`);
+  if (output) log(`Agent ${job.id} output: ${output.substring(0, 500)}`);
+
+  const reason = entry?.timedOut ? 'timeout' : code === null ? 'spawn error / killed' : `exit ${code}`;
+  const requeued = code !== 0 && retryOrBury(job, reason, Date.now());
+  if (!requeued) {
+    job.status = 'done';
+    state.jobs = state.jobs.filter(j => j !== job);
+  }
+  save();
+  pump();
+}
+
+function pump() {
+  if (!state.started) return;
+  const now = Date.now();
+  const picked = pickRunnable(now);
+  if (picked.length > 0) {
+    for (const job of picked) runJob(job);
+    save();
+  }
+
+  // 下一个防抖窗口到期时再唤醒
+  clearTimeout(state.wakeTimer);
+  const next = state.jobs
+    .filter(j => j.status === 'queued' && j.notBefore > now)
+    .reduce((min, j) => Math.min(min, j.notBefore), Infinity);
+  if (next !== Infinity) {
+    state.wakeTimer = setTimeout(pump, next - now);
+    state.wakeTimer.unref();
+  }
+}
+
+/**
+ * 收取 daemon 离线期间 hook 写入 inbox 的任务（先改名再读，避免与写入方竞争）
+ */
+function drainInbox() {
+  const claimed = `${INBOX_FILE}.${process.pid}.draining`;
+  try { fs.renameSync(INBOX_FILE, claimed); }
+  catch (e) { return 0; }
+
+  let count = 0;
+  for (const line of fs.readFileSync(claimed, 'utf8').split('\n')) {
+    if (!line.trim()) continue;
+    try { enqueue(JSON.parse(line)); count++; }
+    catch (e) { log(`Inbox parse error: ${e.message}`); }
+  }
+  fs.unlinkSync(claimed);
+  if (count) log(`Drained ${count} job(s) from inbox`);
+  return count;
+}
+
+/**
+ * daemon 离线时的提交方式：追加到 inbox，由下次启动的 daemon 收取
+ */
+function submitOffline(spec) {
+  fs.mkdirSync(AGENT_DIR, { recursive: true });
+  fs.appendFileSync(INBOX_FILE, JSON.stringify({ ...spec, submittedAt: Date.now() }) + '\n');
+}
+
+function start() {
+  if (state.started) return;
+  load();
+  state.started = true;
+  drainInbox();
+  state.inboxTimer = setInterval(drainInbox, INBOX_POLL_MS);
+  state.inboxTimer.unref();
+  pump();
+}
+
+/**
+ * 停止调度：终止运行中的 Agent，保留其 running 状态，下次启动时重新排队
+ */
+function stop() {
+  state.started = false;
+  clearTimeout(state.wakeTimer);
+  clearInterval(state.inboxTimer);
+  for (const { child, timer } of state.running.values()) {
+    clearTimeout(timer);
+    child.removeAllListeners();
+    child.kill('SIGTERM');
+  }
+  state.running.clear();
+  for (const span of state.spans.values()) span.end({ interrupted: true });
+  state.spans.clear();
+  if (state.jobs) save();
+}
+
+function summarize(samples) {
+  if (samples.length === 0) return { count: 0 };
+  const sorted = [...samples].sort((a, b) => a - b);
+  const at = (q) => sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * q))];
+  return { count: sorted.length, p50: at(0.5), p95: at(0.95), max: sorted[sorted.length - 1] };
+}
+
+function countDead() {
+  try {
+    return fs.readFileSync(DEAD_FILE, 'utf8').split('\n').filter(Boolean).length;
+  } catch (e) {
+    return 0;
+  }
+}
+
+function getStats() {
+  const jobs = load();
+  const depth = { queued: 0, running: 0, byBu: {}, byKind: {} };
+  for (const job of jobs) {
+    depth[job.status === 'running' ? 'running' : 'queued']++;
+    depth.byBu[job.bu] = (depth.byBu[job.bu] || 0) + 1;
+    depth.byKind[job.kind] = (depth.byKind[job.kind] || 0) + 1;
+  }
+  const { waitMs, runMs, ...counters } = stats;
+  return {
+    ...counters,
+    depth,
+    deadLetters: { file: DEAD_FILE, total: countDead() },
+    waitMs: summarize(waitMs),
+    runMs: summarize(runMs),
+    limits: { maxConcurrent: MAX_CONCURRENT, maxPerBu: MAX_PER_BU, debounceMs: DEBOUNCE_MS, maxAttempts: MAX_ATTEMPTS }
+  };
+}
+
+module.exports = {
+  AGENT_DIR,
+  PRIORITY,
+  enqueue,
+  submitOffline,
+  drainInbox,
+  start,
+  stop,
+  getStats,
+  renderPrompt
+};
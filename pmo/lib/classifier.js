@@ -0,0 +1,533 @@
+/**
+ * PMO Classifier - 规则编译 + 确定性快速分类
+ *
+ * 职责：
+ * 1. 把 pmo/rules/*-bu.md 中的 Team / Project 关键词 / Labels / 触发 skill 编译成一个
+ *    多模式匹配器（Aho-Corasick），一次扫描 cwd、skill、工具名、摘要文本
+ * 2. 按决策表给出 事业部 / Team / Project / Labels / 上报或跳过 的结论和置信度
+ * 3. 置信度低于 CONFIDENCE_THRESHOLD 才需要启动 PMO Agent
+ *
+ * 置信度阈值沿用规则文件的「匹配度：高（>0.8）自动关联」
+ * 编译结果缓存到 ruleset.json，规则文件 mtime / size 变化时才重新编译
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const RULES_DIR = process.env.PMO_RULES_DIR || path.join(__dirname, '..', 'rules');
+const CACHE_FILE = process.env.PMO_RULESET_CACHE
+  || path.join(process.env.HOME || '/tmp', '.claude/pmo/ruleset.json');
+const CONFIDENCE_THRESHOLD = 0.8;
+const RULES_CHECK_MS = 2000;       // 常驻进程里最多每 2s 检查一次规则文件
+const COMPILER_VERSION = 1;
+
+// 各来源的模式在各字段命中的权重：cwd 最可靠，摘要文本最弱
+const WEIGHTS = {
+  dir: { cwd: 3, text: 0.5 },
+  skill: { skill: 1.5 },
+  tool: { tool: 0.3 },
+  project: { cwd: 2, skill: 1, text: 1 },
+  projectBu: { cwd: 1, skill: 0.5, text: 0.5 },
+  label: { skill: 1, text: 1 }
+};
+
+// 会产生文件产出的工具（rules：纯聊天/咨询不需要建 Issue，有实际产出的才需要）
+const OUTPUT_TOOLS = new Set(['Write', 'Edit', 'MultiEdit', 'NotebookEdit']);
+
+// hook 已确认发生的外部动作，本身就值得上报
+const PUBLISH_EVENTS = new Set(['xhs_publish', 'bilibili_publish', 'x_publish', 'trade', 'deploy_testflight', 'deploy_web']);
+
+// 缺 Project 时允许兜底的事业部（content-bu.md：不属于明确系列的内容归入「随机探索系列」仍需确认）
+const PROJECT_REQUIRED = new Set(['product', 'content']);
+
+// ============ Aho-Corasick ============
+
+const ASCII_WORD = /^[a-z0-9]+$/;
+const isWordChar = (ch) => ch !== undefined && /[a-z0-9]/.test(ch);
+
+/**
+ * 构建自动机：goto 表用 Map，fail 指针 BFS 计算，output 沿 fail 链合并
+ * @param {string[]} words - 已小写
+ */
+function buildAutomaton(words) {
+  const next = [new Map()];
+  const fail = [0];
+  const output = [[]];
+
+  words.forEach((word, index) => {
+    let state = 0;
+    for (const ch of word) {
+      let target = next[state].get(ch);
+      if (target === undefined) {
+        target = next.length;
+        next.push(new Map());
+        fail.push(0);
+        output.push([]);
+        next[state].set(ch, target);
+      }
+      state = target;
+    }
+    output[state].push(index);
+  });
+
+  const queue = [...next[0].values()];
+  while (queue.length > 0) {
+    const state = queue.shift();
+    for (const [ch, target] of next[state]) {
+      let f = fail[state];
+      while (f !== 0 && !next[f].has(ch)) f = fail[f];
+      const candidate = next[f].get(ch);
+      fail[target] = candidate !== undefined && candidate !== target ? candidate : 0;
+      output[target] = output[target].concat(output[fail[target]]);
+      queue.push(target);
+    }
+  }
+
+  return { next, fail, output, words };
+}
+
+/**
+ * 扫描一段文本，返回命中的模式下标
+ * - ASCII 模式要求词边界，避免 ai 命中 detail
+ * - 被更长命中完整覆盖的短词丢弃（vocab-highlighter 不再额外算一次 vocab）
+ * @returns {Set<number>}
+ */
+function scan(automaton, text) {
+  const hits = new Set();
+  if (!text) return hits;
+  const { next, fail, output, words } = automaton;
+  const lower = text.toLowerCase();
+
+  const matches = [];
+  let state = 0;
+  for (let i = 0; i < lower.length; i++) {
+    const ch = lower[i];
+    while (state !== 0 && !next[state].has(ch)) state = fail[state];
+    state = next[state].get(ch) ?? 0;
+    for (const index of output[state]) {
+      const word = words[index];
+      const start = i - word.length + 1;
+      if (ASCII_WORD.test(word) && (isWordChar(lower[start - 1]) || isWordChar(lower[i + 1]))) continue;
+      matches.push({ index, start, end: i });
+    }
+  }
+
+  // 按结束位置倒序、同结束位置长词在前；已保留的命中都不早于当前结束，起点更靠前即完整覆盖
+  matches.sort((a, b) => b.end - a.end || a.start - b.start);
+  let minStart = Infinity;
+  for (const { index, start } of matches) {
+    if (minStart <= start) continue;
+    hits.add(index);
+    minStart = start;
+  }
+  return hits;
+}
+
+// ============ 规则编译 ============
+
+function splitRow(line) {
+  return line.trim().replace(/^\||\|$/g, '').split('|').map(cell => cell.trim());
+}
+
+const stripTicks = (cell) => cell.replace(/`/g, '').trim();
+const UUID = /[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/;
+
+/**
+ * 取出 markdown 中的所有表格：[{ header: [...], rows: [[...]] }]
+ */
+function parseTables(markdown) {
+  const tables = [];
+  const lines = markdown.split('\n');
+  for (let i = 0; i < lines.length - 1; i++) {
+    if (!lines[i].trim().startsWith('|') || !/^\s*\|[\s|:-]+\|\s*$/.test(lines[i + 1])) continue;
+    const table = { header: splitRow(lines[i]), rows: [] };
+    let j = i + 2;
+    while (j < lines.length && lines[j].trim().startsWith('|')) {
+      table.rows.push(splitRow(lines[j]));
+      j++;
+    }
+    tables.push(table);
+    i = j - 1;
+  }
+  return tables;
+}
+
+function section(markdown, heading) {
+  const start = markdown.indexOf(heading);
+  if (start === -1) return '';
+  const level = heading.match(/^#+/)[0];
+  const rest = markdown.slice(start + heading.length);
+  const end = rest.search(new RegExp(`\\n${level} `));
+  return end === -1 ? rest : rest.slice(0, end);
+}
+
+function splitTerms(text) {
+  return text
+    .replace(/[（(][^）)]*[）)]/g, '')
+    .split(/[、,，/]/)
+    .map(t => t.trim())
+    .filter(t => t.length >= 2);
+}
+
+/**
+ * 编译单个事业部规则文件
+ */
+function compileBu(bu, markdown) {
+  const teamId = (markdown.match(/\|\s*Team ID\s*\|([^|\n]*)\|/)?.[1] || '').match(UUID)?.[0] || null;
+  const key = markdown.match(/\|\s*Key\s*\|\s*(\w+)\s*\|/)?.[1] || null;
+  const tables = parseTables(markdown);
+
+  // Project：优先「项目名单」表（含关键词），否则取「Project =」章节的列表项
+  const projects = [];
+  const projectTable = tables.find(t => t.header.includes('项目名') && t.header.includes('关键词'));
+  if (projectTable) {
+    const col = (name) => projectTable.header.indexOf(name);
+    for (const row of projectTable.rows) {
+      const name = row[col('项目名')];
+      const projectId = (row[col('Linear Project ID')] || '').match(UUID)?.[0] || null;
+      const keywords = row[col('关键词')].split(/[,，]/).map(k => k.trim()).filter(Boolean);
+      projects.push({ name, projectId, keywords: [...new Set([name, ...keywords])] });
+    }
+  } else {
+    const list = markdown.match(/## 二、Project[^\n]*\n([\s\S]*?)\n## /)?.[1] || '';
+    for (const [, name] of list.matchAll(/^- `([^`]+)`/gm)) {
+      projects.push({ name, projectId: null, keywords: [name] });
+    }
+  }
+
+  // Labels：首列为 Label 的表；说明列拆成提示词
+  const labels = [];
+  for (const table of tables.filter(t => t.header[0] === 'Label' || t.header[0] === '标签')) {
+    const idCol = table.header.findIndex(h => /ID/.test(h));
+    const descCol = table.header.indexOf('说明');
+    for (const row of table.rows) {
+      const name = stripTicks(row[0]);
+      const id = idCol === -1 ? null : (row[idCol].match(UUID)?.[0] || null);
+      const hints = descCol === -1 ? [] : splitTerms(row[descCol]);
+      labels.push({ name, id, hints: [...new Set([name, ...hints])] });
+    }
+  }
+
+  // 触发 skill / 工具：「触发时机」中的反引号和括号内名称
+  const skills = new Set();
+  const tools = new Set();
+  for (const line of section(markdown, '### 5.1 触发时机').split('\n')) {
+    const scope = line.trim().startsWith('|') ? splitRow(line)[0] : line;
+    const names = [
+      ...[...scope.matchAll(/`([^`]+)`/g)].map(m => m[1]),
+      ...[...scope.matchAll(/[（(]([^）)]+)[）)]/g)].flatMap(m => m[1].split('/'))
+    ].map(n => n.trim()).filter(n => /^[\w.:-]+$/.test(n));
+    for (const name of names) (/^[A-Z]/.test(name) ? tools : skills).add(name);
+  }
+
+  return { bu, teamId, key, projects, labels, triggers: { skills: [...skills], tools: [...tools] } };
+}
+
+/**
+ * 把所有事业部规则编译成模式表（可 JSON 序列化，自动机在加载时构建）
+ */
+function compileRules(files) {
+  const bus = {};
+  const patterns = [];
+  const add = (word, payload) => {
+    const lower = word.toLowerCase().trim();
+    if (lower.length < 2) return;
+    patterns.push({ word: lower, ...payload });
+  };
+
+  for (const file of files) {
+    const bu = path.basename(file, '.md').replace(/-bu$/, '');
+    const compiled = compileBu(bu, fs.readFileSync(file, 'utf8'));
+    bus[bu] = compiled;
+
+    add(`${bu}-bu`, { type: 'bu', bu, source: 'dir' });
+    for (const skill of compiled.triggers.skills) add(skill, { type: 'bu', bu, source: 'skill' });
+    for (const tool of compiled.triggers.tools) add(tool, { type: 'bu', bu, source: 'tool' });
+    compiled.projects.forEach((project, i) => {
+      for (const keyword of project.keywords) {
+        add(keyword, { type: 'project', bu, target: i, source: 'project' });
+        add(keyword, { type: 'bu', bu, source: 'projectBu' });
+      }
+    });
+    compiled.labels.forEach((label, i) => {
+      for (const hint of label.hints) add(hint, { type: 'label', bu, target: i, source: 'label' });
+    });
+  }
+
+  return { version: COMPILER_VERSION, bus, patterns };
+}
+
+// ============ 缓存 ============
+
+let cached = null;   // { signature, ruleset, automaton, payloads, checkedAt }
+
+function ruleFiles() {
+  return fs.readdirSync(RULES_DIR)
+    .filter(f => f.endsWith('-bu.md'))
+    .sort()
+    .map(f => path.join(RULES_DIR, f));
+}
+
+function signatureOf(files) {
+  return files.map(f => {
+    const stat = fs.statSync(f);
+    return `${path.basename(f)}:${stat.size}:${stat.mtimeMs}`;
+  }).join('|') + `|v${COMPILER_VERSION}`;
+}
+
+function activate(signature, ruleset) {
+  // 相同词只进自动机一次，命中后展开到全部 payload
+  const payloads = new Map();
+  for (const pattern of ruleset.patterns) {
+    if (!payloads.has(pattern.word)) payloads.set(pattern.word, []);
+    payloads.get(pattern.word).push(pattern);
+  }
+  const words = [...payloads.keys()];
+  cached = {
+    signature,
+    ruleset,
+    automaton: buildAutomaton(words),
+    payloads: words.map(w => payloads.get(w)),
+    checkedAt: Date.now()
+  };
+  return cached;
+}
+
+/**
+ * 取编译后的规则：内存 → 磁盘缓存 → 重新编译
+ * @param {Object} [options]
+ * @param {boolean} [options.force] - 忽略缓存重新编译
+ */
+function loadRuleset(options = {}) {
+  const now = Date.now();
+  if (cached && !options.force && now - cached.checkedAt < RULES_CHECK_MS) return cached;
+
+  const files = ruleFiles();
+  const signature = signatureOf(files);
+  if (cached && !options.force && cached.signature === signature) {
+    cached.checkedAt = now;
+    return cached;
+  }
+
+  if (!options.force) {
+    try {
+      const disk = JSON.parse(fs.readFileSync(CACHE_FILE, 'utf8'));
+      if (disk.signature === signature) return activate(signature, disk.ruleset);
+    } catch (e) {
+      // 缓存不存在或损坏：重新编译
+    }
+  }
+
+  const ruleset = compileRules(files);
+  try {
+    fs.mkdirSync(path.dirname(CACHE_FILE), { recursive: true });
+    const tmpFile = `${CACHE_FILE}.${process.pid}.tmp`;
+    fs.writeFileSync(tmpFile, JSON.stringify({ signature, ruleset }));
+    fs.renameSync(tmpFile, CACHE_FILE);
+  } catch (e) {
+    // 写缓存失败不影响分类
+  }
+  return activate(signature, ruleset);
+}
+
+// ============ 分类 ============
+
+/**
+ * 命中分数 → 置信度：总量越大越可信，和第二名越接近越不可信
+ */
+function confidenceOf(scores) {
+  const sorted = Object.entries(scores).sort((a, b) => b[1] - a[1]);
+  if (sorted.length === 0) return { winner: null, confidence: 0 };
+  const [winner, top] = sorted[0];
+  const second = sorted[1]?.[1] || 0;
+  const confidence = (1 - Math.exp(-top)) * (top / (top + second));
+  return { winner, confidence: +confidence.toFixed(3) };
+}
+
+function collectHits(compiled, fields) {
+  const hits = [];
+  for (const [field, text] of Object.entries(fields)) {
+    for (const index of scan(compiled.automaton, text)) {
+      for (const pattern of compiled.payloads[index]) {
+        const weight = WEIGHTS[pattern.source][field];
+        if (weight) hits.push({ ...pattern, field, weight });
+      }
+    }
+  }
+  return hits;
+}
+
+/**
+ * 汇总某类命中的分数；同一个词在多个字段命中只取最高权重
+ */
+function tally(hits, type, bu) {
+  const best = new Map();
+  for (const hit of hits) {
+    if (hit.type !== type || (bu && hit.bu !== bu)) continue;
+    const key = type === 'bu' ? hit.bu : hit.target;
+    const id = `${key}\u0000${hit.source}\u0000${hit.word}`;
+    if (!best.has(id) || best.get(id).weight < hit.weight) best.set(id, { key, weight: hit.weight });
+  }
+  const scores = {};
+  for (const { key, weight } of best.values()) scores[key] = (scores[key] || 0) + weight;
+  return scores;
+}
+
+/**
+ * 决策表：自上而下第一条命中的规则生效
+ * confidence 为该规则自身的把握，最终置信度还要和事业部 / Project 置信度取最小
+ */
+const DECISION_TABLE = [
+  {
+    rule: 'external-action',
+    when: (c) => PUBLISH_EVENTS.has(c.eventType),
+    decision: 'report',
+    confidence: 1,
+    needsProject: (c) => PROJECT_REQUIRED.has(c.bu)
+  },
+  {
+    rule: 'product-lifecycle',
+    when: (c) => c.eventType === 'superpower_event' && c.bu === 'product',
+    decision: 'report',
+    confidence: 1,
+    // 没有 Project 规则命中的目录（inbox 新项目等）交给 Agent 判断归属
+    needsProject: () => true
+  },
+  {
+    rule: 'untracked-superpower',
+    when: (c) => c.eventType === 'superpower_event',
+    decision: 'skip',
+    confidence: 1,
+    needsProject: () => false
+  },
+  {
+    rule: 'chat-only',
+    when: (c) => c.eventType === 'session_end' && c.outputs.length === 0 && !c.tools.some(t => OUTPUT_TOOLS.has(t)),
+    decision: 'skip',
+    confidence: 0.9,
+    needsProject: () => false
+  },
+  {
+    rule: 'session-output',
+    when: (c) => c.eventType === 'session_end',
+    decision: 'report',
+    confidence: 1,
+    needsProject: (c) => PROJECT_REQUIRED.has(c.bu)
+  }
+];
+
+/**
+ * 分类一个事件
+ * @param {Object} input
+ * @param {string} input.eventType - superpower_event | session_end | xhs_publish | ...
+ * @param {string} [input.bu] - hook 已知的事业部（发布类 hook 直接给出）
+ * @param {string} [input.cwd]
+ * @param {string} [input.skill]
+ * @param {string[]} [input.tools] - 工具名
+ * @param {string[]} [input.files] - 涉及的文件路径（参与 Project 匹配）
+ * @param {string[]} [input.outputs] - 写入的文件路径（Write / Edit 目标与 Bash 重定向）
+ * @param {string} [input.text] - 摘要 / 标题 / 标签等自由文本
+ * @returns {{bu: string, teamId: ?string, project: ?Object, labels: Object[], decision: string,
+ *   rule: ?string, confidence: number, spawnAgent: boolean, scores: Object}}
+ */
+function classify(input) {
+  const compiled = loadRuleset();
+  const tools = input.tools || [];
+  const files = input.files || [];
+  // 产出判断只看写入目标；调用方没给 outputs 时退回 files
+  const outputs = input.outputs || files;
+  const hits = collectHits(compiled, {
+    cwd: input.cwd || '',
+    skill: input.skill || '',
+    tool: tools.join(' '),
+    text: [input.text || '', ...files].join('\n')
+  });
+
+  // 事业部：hook 明确给出则直接采信；superpower 事件只看 cwd 目录，
+  // 项目关键词（pmo / dashboard 等）不参与投票，避免把产品事业部以外的目录判成 product
+  let buVote;
+  if (input.bu && compiled.ruleset.bus[input.bu]) {
+    buVote = { winner: input.bu, confidence: 1 };
+  } else if (input.eventType === 'superpower_event') {
+    buVote = confidenceOf(tally(hits.filter(h => h.source === 'dir' && h.field === 'cwd'), 'bu'));
+  } else {
+    buVote = confidenceOf(tally(hits, 'bu'));
+  }
+  const bu = buVote.winner || detectBu(input.cwd);
+  const rules = compiled.ruleset.bus[bu];
+
+  const projectVote = rules ? confidenceOf(tally(hits, 'project', bu)) : { winner: null, confidence: 0 };
+  const project = projectVote.winner !== null ? rules.projects[projectVote.winner] : null;
+
+  const labelScores = rules ? tally(hits, 'label', bu) : {};
+  const labels = Object.keys(labelScores)
+    .filter(i => labelScores[i] >= 1)
+    .map(i => ({ name: rules.labels[i].name, id: rules.labels[i].id }));
+
+  const context = { ...input, bu, tools, files, outputs };
+  const row = DECISION_TABLE.find(r => r.when(context));
+
+  let confidence = 0;
+  if (row) {
+    confidence = Math.min(row.confidence, row.decision === 'report' ? buVote.confidence : 1);
+    if (row.decision === 'report' && row.needsProject(context)) confidence = Math.min(confidence, projectVote.confidence);
+    // 规则文件里没有 Team ID 的事业部无法直接建 Issue
+    if (row.decision === 'report' && !rules?.teamId) confidence = Math.min(confidence, 0.5);
+  }
+
+  return {
+    bu,
+    teamId: rules?.teamId || null,
+    project: project ? { name: project.name, projectId: project.projectId, confidence: projectVote.confidence } : null,
+    labels,
+    decision: row ? row.decision : 'agent',
+    rule: row?.rule || null,
+    confidence: +confidence.toFixed(3),
+    spawnAgent: !row || confidence < CONFIDENCE_THRESHOLD,
+    scores: { bu: buVote.confidence, project: projectVote.confidence }
+  };
+}
+
+/**
+ * 只看 cwd 的事业部判断（替代各 hook 里重复的 detectBu）
+ */
+function detectBu(cwd) {
+  if (!cwd) return 'unknown';
+  const compiled = loadRuleset();
+  const scores = {};
+  for (const index of scan(compiled.automaton, cwd)) {
+    for (const pattern of compiled.payloads[index]) {
+      if (pattern.source === 'dir') scores[pattern.bu] = 1;
+    }
+  }
+  const [bu] = Object.keys(scores);
+  if (bu) return bu;
+  if (cwd.includes('pmo')) return 'pmo';
+  return 'unknown';
+}
+
+/**
+ * 按关键词匹配事业部内的 Project（cwd 目录名 / 路径优先）
+ * @returns {?{name: string, projectId: ?string, confidence: number}}
+ */
+function matchProject(bu, fields) {
+  const compiled = loadRuleset();
+  const rules = compiled.ruleset.bus[bu];
+  if (!rules) return null;
+  const vote = confidenceOf(tally(collectHits(compiled, fields), 'project', bu));
+  if (vote.winner === null) return null;
+  const project = rules.projects[vote.winner];
+  return { name: project.name, projectId: project.projectId, confidence: vote.confidence };
+}
+
+module.exports = {
+  CONFIDENCE_THRESHOLD,
+  CACHE_FILE,
+  classify,
+  detectBu,
+  matchProject,
+  loadRuleset,
+  compileRules,
+  buildAutomaton,
+  scan
+};
@@ -0,0 +1,162 @@
+/**
+ * PMO Client - Hook 侧的轻量投递客户端
+ *
+ * 职责：
+ * 1. 通过 Unix socket 把事件交给常驻 PMO daemon（约 1ms 返回）
+ * 2. daemon 不在线时回退到进程内 handleEvent，并在退出前 flush spool；提交不了的交给拉起的 daemon
+ * 3. PMO Agent 任务交给 daemon 的调度队列；离线时写入 inbox 并拉起 daemon
+ * 4. 投递时结束 hook 的 match 阶段，并把 trace 随消息带给 daemon（见 lib/tracing.js）
+ *
+ * 刻意不在顶层 require handler.js：daemon 在线时 hook 无需加载处理逻辑
+ */
+
+const net = require('net');
+const path = require('path');
+const { spawn } = require('child_process');
+const tracing = require('./tracing');
+
+const SOCKET_PATH = process.env.PMO_SOCKET || '/tmp/pmo-daemon.sock';
+const CONNECT_TIMEOUT_MS = 200;
+const ACK_TIMEOUT_MS = 1000;
+const FLUSH_RETRIES = 3;
+const FLUSH_RETRY_BASE_MS = 100;
+
+/**
+ * 向 daemon 发送一条消息并等待一行应答
+ * 连接失败时 reject（err.code 为 ENOENT / ECONNREFUSED / ETIMEDOUT）
+ * @param {Object} message
+ * @param {Object} [options]
+ * @param {number} [options.ackTimeoutMs] - 写入后等待应答的上限
+ * @returns {Promise<Object>} daemon 应答；写入后超时则视为已投递
+ */
+function sendToDaemon(message, options = {}) {
+  const ackTimeoutMs = options.ackTimeoutMs || ACK_TIMEOUT_MS;
+
+  return new Promise((resolve, reject) => {
+    const socket = net.createConnection(SOCKET_PATH);
+    let written = false;
+    let buffer = '';
+
+    const finish = (err, reply) => {
+      clearTimeout(timer);
+      socket.destroy();
+      if (err) reject(err);
+      else resolve(reply);
+    };
+
+    let timer = setTimeout(() => {
+      const err = new Error('PMO daemon connect timeout');
+      err.code = 'ETIMEDOUT';
+      finish(err);
+    }, CONNECT_TIMEOUT_MS);
+
+    socket.setEncoding('utf8');
+    socket.on('connect', () => {
+      written = true;
+      socket.write(JSON.stringify(message) + '\n');
+      clearTimeout(timer);
+      timer = setTimeout(() => finish(null, { result: 'queued', acked: false }), ackTimeoutMs);
+    });
+    socket.on('data', (chunk) => {
+      buffer += chunk;
+      const newline = buffer.indexOf('\n');
+      if (newline === -1) return;
+      try { finish(null, JSON.parse(buffer.slice(0, newline))); }
+      catch (e) { finish(null, { result: 'queued', acked: false }); }
+    });
+    socket.on('error', (err) => {
+      // 已写入后出错：daemon 可能已收下事件，不能再回退以免重复处理
+      if (written) finish(null, { result: 'queued', acked: false });
+      else finish(err);
+    });
+  });
+}
+
+/**
+ * 进程内提交 spool：锁被其他进程占着时退避重试
+ * @returns {Promise<Object>} spool.flush 的结果
+ */
+async function flushSpool() {
+  const spool = require('./spool');
+  let summary = await spool.flush();
+  for (let attempt = 0; attempt < FLUSH_RETRIES && summary.skipped === 'locked'; attempt++) {
+    await new Promise(resolve => setTimeout(resolve, FLUSH_RETRY_BASE_MS * 2 ** attempt));
+    summary = await spool.flush();
+  }
+  return summary;
+}
+
+/**
+ * 投递事件 - hook 统一入口
+ * @param {Object} event - 同 handleEvent 的事件结构
+ * @returns {Promise<Object>} daemon 在线时为 { result: 'queued' }，否则为 handleEvent 的结果；
+ *   写操作没能当场提交时另带 spool: { pending: true, reason }
+ */
+async function dispatchEvent(event) {
+  tracing.matched({ bu: event.bu, type: event.type });
+  const { trace, session } = tracing.context();
+
+  return tracing.wrap('dispatch', { type: event.type }, async (span) => {
+    try {
+      const reply = await sendToDaemon({ op: 'event', event, trace: { trace, session } });
+      span.set({ via: 'daemon' });
+      return reply;
+    } catch (e) {
+      // daemon 不在线：回退到进程内处理；没有后台 flusher，自己把 spool 提交掉
+      span.set({ via: 'inprocess' });
+      const { handleEvent } = require('./handler');
+      const result = await handleEvent(event);
+      const flushed = await flushSpool();
+      const pending = flushed.skipped || flushed.error || (flushed.failed ? `${flushed.failed} ops failed` : null);
+      if (!pending) return result;
+      // 没提交完的 op 留在 spool：拉起 daemon，由它的 flusher 退避重试
+      span.set({ spool: 'pending' });
+      startDaemon();
+      return { ...result, spool: { pending: true, reason: pending } };
+    }
+  });
+}
+
+/**
+ * 后台拉起 daemon（已有实例在线时新进程会自行退出）
+ */
+function startDaemon() {
+  if (process.env.PMO_DAEMON_AUTOSTART === '0') return;
+  const child = spawn(process.execPath, [path.join(__dirname, '..', 'pmo-daemon.js')], {
+    detached: true,
+    stdio: 'ignore',
+    env: process.env
+  });
+  child.unref();
+}
+
+/**
+ * 提交 PMO Agent 任务 - 替代 hook 内直接 spawn claude
+ * @param {Object} job - 见 agent-scheduler.js 的 enqueue
+ * @returns {Promise<Object>} { result: 'scheduled', id, merged } 或离线时 { result: 'inboxed' }
+ */
+async function submitAgentJob(job) {
+  tracing.matched({ bu: job.bu, kind: job.kind });
+  const traced = { ...job, trace: tracing.context().trace };
+
+  return tracing.wrap('agent_submit', { kind: job.kind }, async (span) => {
+    try {
+      const reply = await sendToDaemon({ op: 'agent', job: traced });
+      span.set({ via: 'daemon', merged: reply.merged || false });
+      return reply;
+    } catch (e) {
+      // daemon 不在线：任务先落盘，由 daemon 启动后收取，并发上限仍由 daemon 保证
+      span.set({ via: 'inbox' });
+      require('./agent-scheduler').submitOffline(traced);
+      startDaemon();
+      return { result: 'inboxed' };
+    }
+  });
+}
+
+module.exports = {
+  SOCKET_PATH,
+  sendToDaemon,
+  dispatchEvent,
+  submitAgentJob
+};
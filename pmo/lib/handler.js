@@ -7,9 +7,25 @@
  * 3. 创建或更新 Linear Issue
  */
 
-const { execSync } = require('child_process');
 const fs = require('fs');
+const http = require('http');
+const https = require('https');
 const path = require('path');
+const sessionIndex = require('./session-index');
+const spool = require('./spool');
+const classifier = require('./classifier');
+const tracing = require('./tracing');
+
+// Linear GraphQL 入口（可用 LINEAR_API_URL 指向本地替身做压测）
+const LINEAR_API_URL = process.env.LINEAR_API_URL || 'https://api.linear.app/graphql';
+const REQUEST_TIMEOUT_MS = 15000;
+const SUPABASE_URL = process.env.SUPABASE_URL || 'http://127.0.0.1:54321';
+
+// keep-alive 连接池：常驻 daemon 里复用 TLS 连接，空闲 socket 会被 unref，不阻塞 hook 进程退出
+const AGENTS = {
+  'http:': new http.Agent({ keepAlive: true, maxSockets: 4 }),
+  'https:': new https.Agent({ keepAlive: true, maxSockets: 4 })
+};
 
 // Team IDs
 const TEAMS = {
@@ -30,16 +46,6 @@ const PRODUCT_STATES = {
   done: '05f950b5-1121-44e2-b60c-cdf923df4b28'
 };
 
-// Superpower Action 到状态的映射
-const ACTION_TO_STATE = {
-  'create_or_update_issue': PRODUCT_STATES.backlog,
-  'set_in_progress': PRODUCT_STATES.in_progress,
-  'set_in_review': PRODUCT_STATES.in_review,
-  'set_ready_for_qa': PRODUCT_STATES.ready_for_qa,
-  'set_ready_for_release': PRODUCT_STATES.ready_for_release,
-  'set_done': PRODUCT_STATES.done
-};
-
 // Initiative IDs（战略层：Initiative → Project → Issue）
 const INITIATIVES = {
   product: '9e5a045c-c886-4bc6-96a0-ebb62177b044',  // 代码杠杆
@@ -69,121 +75,222 @@ const PROJECTS = {
 };
 
 /**
- * 获取 Linear API Key
+ * 读取密钥：优先环境变量，其次 ~/.claude/secrets.env
+ * 只缓存读到的值，daemon 运行中补写 secrets.env 后可生效
  */
-function getLinearApiKey() {
+const secretCache = {};
+
+function getSecret(name) {
+  if (secretCache[name]) return secretCache[name];
+
   const secretsPath = path.join(process.env.HOME, '.claude/secrets.env');
-  let key = process.env.LINEAR_API_KEY;
+  let value = process.env[name];
 
-  if (!key && fs.existsSync(secretsPath)) {
+  if (!value && fs.existsSync(secretsPath)) {
     const secrets = fs.readFileSync(secretsPath, 'utf8');
-    const match = secrets.match(/LINEAR_API_KEY=["']?([^"'\n]+)["']?/);
-    if (match) key = match[1];
+    const match = secrets.match(new RegExp(`${name}=["']?([^"'\n]+)["']?`));
+    if (match) value = match[1];
   }
 
-  return key;
+  if (value) secretCache[name] = value;
+  return value;
+}
+
+/**
+ * 获取 Linear API Key
+ */
+function getLinearApiKey() {
+  return getSecret('LINEAR_API_KEY');
 }
 
 /**
- * 调用 Linear GraphQL API
+ * 发送 JSON 请求（复用 keep-alive 连接池）
+ * @param {string} urlString
+ * @param {Object} options
+ * @param {string} [options.method]
+ * @param {Object} [options.headers]
+ * @param {string} [options.body]
+ * @returns {Promise<Object>} 解析后的 JSON 响应
+ */
+function requestJson(urlString, { method = 'GET', headers = {}, body } = {}) {
+  const url = new URL(urlString);
+  const transport = url.protocol === 'http:' ? http : https;
+
+  return new Promise((resolve, reject) => {
+    const req = transport.request(url, {
+      method,
+      agent: AGENTS[url.protocol],
+      timeout: REQUEST_TIMEOUT_MS,
+      headers: body === undefined ? headers : { ...headers, 'Content-Length': Buffer.byteLength(body) }
+    }, (res) => {
+      let data = '';
+      res.setEncoding('utf8');
+      res.on('data', chunk => data += chunk);
+      res.on('end', () => {
+        if (!data && res.statusCode < 300) return resolve(null);
+        try { resolve(JSON.parse(data)); }
+        catch (e) { reject(new Error(`${url.host} ${res.statusCode}: ${data.substring(0, 200)}`)); }
+      });
+    });
+
+    req.on('timeout', () => req.destroy(new Error(`${url.host} timeout`)));
+    req.on('error', reject);
+    req.end(body);
+  });
+}
+
+/**
+ * GraphQL 操作名（span 的 op 字段）：具名操作取名字，匿名取第一个字段
+ */
+function operationName(query) {
+  const match = query.match(/^\s*(?:query|mutation)\s*(\w+)?\s*(?:\([^)]*\))?\s*\{\s*(\w+)/);
+  return match ? (match[1] || match[2]) : 'unknown';
+}
+
+/**
+ * 调用 Linear GraphQL API（每次往返记一个 linear span）
+ * @returns {Promise<Object>} GraphQL 响应体
  */
 function callLinear(query, variables = {}) {
   const apiKey = getLinearApiKey();
-  if (!apiKey) throw new Error('LINEAR_API_KEY not found');
+  if (!apiKey) return Promise.reject(new Error('LINEAR_API_KEY not found'));
 
-  // 用文件传递 payload 避免 shell 转义问题
-  const payloadFile = `/tmp/linear-payload-${Date.now()}.json`;
-  fs.writeFileSync(payloadFile, JSON.stringify({ query, variables }));
+  return tracing.wrap('linear', { op: operationName(query) }, async (span) => {
+    const result = await requestJson(LINEAR_API_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', 'Authorization': apiKey },
+      body: JSON.stringify({ query, variables })
+    });
+    if (result?.errors) span.set({ errors: result.errors.length });
+    return result;
+  });
+}
+
+/**
+ * 调用本地 Supabase REST（pac schema）
+ * 未配置 SUPABASE_ANON_KEY 时返回 null，调用方按未命中处理
+ */
+async function callSupabase(pathAndQuery, { method = 'GET', body } = {}) {
+  const key = getSecret('SUPABASE_ANON_KEY');
+  if (!key) return null;
+
+  const profileHeader = method === 'GET' ? 'Accept-Profile' : 'Content-Profile';
+  const span = tracing.startSpan('supabase', { method, table: pathAndQuery.split(/[?/]/)[0] });
+  return requestJson(`${SUPABASE_URL}/rest/v1/${pathAndQuery}`, {
+    method,
+    headers: {
+      'Content-Type': 'application/json',
+      'apikey': key,
+      'Authorization': `Bearer ${key}`,
+      [profileHeader]: 'pac',
+      'Prefer': 'return=minimal'
+    },
+    body: body === undefined ? undefined : JSON.stringify(body)
+  }).finally(() => span.end());
+}
 
+/**
+ * 从 pac.pmo_sessions（pmo_events 的 session 汇总，主键查找）查 session 已关联的 Linear Issue
+ * @returns {Promise<?string>} Issue identifier/id
+ */
+async function findIssueKeyInPmoEvents(sessionId) {
   try {
-    const response = execSync(`curl -s -X POST https://api.linear.app/graphql \
-      -H "Content-Type: application/json" \
-      -H "Authorization: ${apiKey}" \
-      -d @${payloadFile}`,
-      { encoding: 'utf8', timeout: 15000 }
+    const rows = await callSupabase(
+      `pmo_sessions?select=linear_issue_id&session_id=eq.${encodeURIComponent(sessionId)}` +
+      '&linear_issue_id=not.is.null&limit=1'
     );
-    return JSON.parse(response);
-  } finally {
-    try { fs.unlinkSync(payloadFile); } catch (e) {}
+    return rows?.[0]?.linear_issue_id || null;
+  } catch (e) {
+    console.error('findIssueKeyInPmoEvents error:', e.message);
+    return null;
   }
 }
 
 /**
- * 按 sessionId 搜索已有 Issue
+ * 把 session → Issue 关联写入 pac.pmo_events（event_type = issue_link，不计入汇总表的事件数）
  */
-function searchIssueBySessionId(teamId, sessionId) {
-  const query = `
-    query SearchIssues($teamId: String!, $filter: IssueFilter) {
-      team(id: $teamId) {
-        issues(filter: $filter, first: 5) {
-          nodes { id identifier title description state { id name } }
-        }
-      }
-    }
-  `;
-
+async function recordIssueInPmoEvents(sessionId, teamId, issue, summary) {
+  const bu = Object.keys(TEAMS).find(key => TEAMS[key] === teamId) || 'unknown';
   try {
-    const result = callLinear(query, {
-      teamId,
-      filter: { description: { contains: `sessionId: ${sessionId}` } }
+    // 出错时 PostgREST 返回 { code, message }（如 CHECK 约束不通过），成功（return=minimal）无 body
+    const error = await callSupabase('pmo_events', {
+      method: 'POST',
+      body: {
+        session_id: sessionId,
+        event_type: 'issue_link',
+        bu,
+        summary,
+        linear_issue_id: issue.identifier || issue.id
+      }
     });
-    return result.data?.team?.issues?.nodes || [];
+    if (error) throw new Error(error.message || JSON.stringify(error));
   } catch (e) {
-    console.error('searchIssueBySessionId error:', e.message);
-    return [];
+    console.error('recordIssueInPmoEvents error:', e.message);
   }
 }
 
 /**
- * 更新 Issue 状态
+ * 读取单个 Issue（id 或 identifier 均可）
  */
-function updateIssueState(issueId, stateId) {
-  const mutation = `
-    mutation UpdateIssue($id: String!, $input: IssueUpdateInput!) {
-      issueUpdate(id: $id, input: $input) {
-        success
-        issue { id identifier state { name } }
-      }
-    }
-  `;
-
+async function fetchIssue(issueKey) {
   try {
-    const result = callLinear(mutation, {
-      id: issueId,
-      input: { stateId }
-    });
+    const result = await callLinear(`query { issue(id: "${issueKey}") { id identifier description state { id name } } }`);
+    return result.data?.issue || null;
+  } catch (e) {
+    console.error('fetchIssue error:', e.message);
+    return null;
+  }
+}
 
-    if (result.data?.issueUpdate?.success) {
-      return { result: 'updated', issue: result.data.issueUpdate.issue };
+/**
+ * 查找 session 对应的 Issue
+ *
+ * 顺序：本地索引 → pac.pmo_events.linear_issue_id → Linear 全文搜索
+ * 后两者命中后回写本地索引
+ * @returns {Promise<Object[]>} 同 searchIssueBySessionId 的 nodes 结构
+ */
+async function findIssuesForSession(teamId, sessionId) {
+  const cached = sessionIndex.lookup(sessionId);
+  if (cached) return [cached];
+
+  const issueKey = await findIssueKeyInPmoEvents(sessionId);
+  if (issueKey) {
+    const issue = await fetchIssue(issueKey);
+    if (issue) {
+      sessionIndex.remember(sessionId, issue);
+      return [issue];
     }
-    return { result: 'failed', error: result.errors };
-  } catch (e) {
-    return { result: 'error', error: e.message };
   }
+
+  const nodes = await searchIssueBySessionId(teamId, sessionId);
+  if (nodes.length > 0) sessionIndex.remember(sessionId, nodes[0]);
+  return nodes;
 }
 
 /**
- * 追加内容到 Issue description
+ * 按 sessionId 搜索已有 Issue
  */
-function appendToIssueDescription(issueId, appendContent) {
-  // 先获取当前 description
-  const query = `query { issue(id: "${issueId}") { description } }`;
-  const current = callLinear(query);
-  const currentDesc = current.data?.issue?.description || '';
-
-  const mutation = `
-    mutation UpdateIssue($id: String!, $input: IssueUpdateInput!) {
-      issueUpdate(id: $id, input: $input) {
-        success
-        issue { id identifier }
+async function searchIssueBySessionId(teamId, sessionId) {
+  const query = `
+    query SearchIssues($teamId: String!, $filter: IssueFilter) {
+      team(id: $teamId) {
+        issues(filter: $filter, first: 5) {
+          nodes { id identifier title description state { id name } }
+        }
       }
     }
   `;
 
-  return callLinear(mutation, {
-    id: issueId,
-    input: { description: currentDesc + '\n\n' + appendContent }
-  });
+  try {
+    const result = await callLinear(query, {
+      teamId,
+      filter: { description: { contains: `sessionId: ${sessionId}` } }
+    });
+    return result.data?.team?.issues?.nodes || [];
+  } catch (e) {
+    console.error('searchIssueBySessionId error:', e.message);
+    return [];
+  }
 }
 
 /**
@@ -217,8 +324,20 @@ function getShanghaiTime() {
  * @param {string} event.bu - 事业部 (content, product)
  * @param {string} event.sessionId - Session ID
  * @param {Object} event.data - 事件数据
+ * @returns {Promise<Object>} 处理结果（整个处理过程记一个 handle span）
  */
-function handleEvent(event) {
+async function handleEvent(event) {
+  return tracing.wrap('handle', { type: event.type }, async (span) => {
+    const result = await routeEvent(event);
+    span.set({ result: result?.result });
+    return result;
+  });
+}
+
+/**
+ * 按事件类型分发
+ */
+function routeEvent(event) {
   const { type, bu, sessionId, data } = event;
 
   switch (type) {
@@ -247,6 +366,10 @@ function handleEvent(event) {
     // 全局
     case 'session_end':
       return handleSessionEnd(bu, sessionId, data);
+    case 'session_report':
+      return handleSessionReport(bu, sessionId, data);
+    case 'session_resume':
+      return handleSessionResume(bu, sessionId, data);
     default:
       return { result: 'ignored', reason: `Unknown event type: ${type}` };
   }
@@ -255,14 +378,15 @@ function handleEvent(event) {
 /**
  * 处理 Superpower 事件 - 产品生命周期状态流转核心
  */
-function handleSuperpowerEvent(event) {
+async function handleSuperpowerEvent(event) {
   const { skill, phase, action, description, sessionId, cwd } = event;
 
   // 确定 Team（目前只支持产品事业部）
   const teamId = TEAMS.product;
 
-  // 搜索同 sessionId 的已有 Issue
-  const existingIssues = searchIssueBySessionId(teamId, sessionId);
+  // 查找同 sessionId 的已有 Issue（本地索引优先）
+  // 状态变更与时间线追加写入 spool，由 flusher 合并为一次 issueUpdate
+  const existingIssues = await findIssuesForSession(teamId, sessionId);
 
   switch (action) {
     case 'create_or_update_issue':
@@ -270,20 +394,21 @@ function handleSuperpowerEvent(event) {
       if (existingIssues.length > 0) {
         // 已有 Issue，追加需求分析结果
         const issue = existingIssues[0];
-        appendToIssueDescription(issue.id, `\n## ${getShanghaiTime()} - 需求分析\n${description}`);
+        spool.queueAppend(issue.id, `\n## ${getShanghaiTime()} - 需求分析\n${description}`);
         return { result: 'updated', issue: { id: issue.id, identifier: issue.identifier }, action };
       } else {
         // 创建新 Issue
         const title = `【${getDatePrefix()}】${extractProjectFromCwd(cwd)}功能开发`;
         const desc = `sessionId: ${sessionId}\n\n## 阶段: ${phase}\n\n${description}\n\n## 时间线\n- ${getShanghaiTime()}: 需求分析完成`;
-        return createIssue(teamId, title, desc);
+        const project = classifier.matchProject('product', { cwd });
+        return createIssue(teamId, title, desc, { sessionId, projectId: project?.projectId });
       }
 
     case 'update_issue_with_plan':
       // writing-plans 完成 - 追加实施计划
       if (existingIssues.length > 0) {
         const issue = existingIssues[0];
-        appendToIssueDescription(issue.id, `\n## ${getShanghaiTime()} - 实施计划\n${description}`);
+        spool.queueAppend(issue.id, `\n## ${getShanghaiTime()} - 实施计划\n${description}`);
         return { result: 'plan_added', issue: { id: issue.id, identifier: issue.identifier } };
       }
       return { result: 'skipped', reason: 'No existing issue for plan' };
@@ -292,8 +417,8 @@ function handleSuperpowerEvent(event) {
       // using-git-worktrees - 开发开始
       if (existingIssues.length > 0) {
         const issue = existingIssues[0];
-        updateIssueState(issue.id, PRODUCT_STATES.in_progress);
-        appendToIssueDescription(issue.id, `\n- ${getShanghaiTime()}: 开发开始`);
+        spool.queueState(issue.id, PRODUCT_STATES.in_progress);
+        spool.queueAppend(issue.id, `\n- ${getShanghaiTime()}: 开发开始`);
         return { result: 'state_changed', state: 'In Progress', issue: { identifier: issue.identifier } };
       }
       return { result: 'skipped', reason: 'No existing issue to update' };
@@ -302,8 +427,8 @@ function handleSuperpowerEvent(event) {
       // requesting-code-review - 进入代码审查
       if (existingIssues.length > 0) {
         const issue = existingIssues[0];
-        updateIssueState(issue.id, PRODUCT_STATES.in_review);
-        appendToIssueDescription(issue.id, `\n- ${getShanghaiTime()}: 代码审查中`);
+        spool.queueState(issue.id, PRODUCT_STATES.in_review);
+        spool.queueAppend(issue.id, `\n- ${getShanghaiTime()}: 代码审查中`);
         return { result: 'state_changed', state: 'In Review', issue: { identifier: issue.identifier } };
       }
       return { result: 'skipped', reason: 'No existing issue to update' };
@@ -313,8 +438,8 @@ function handleSuperpowerEvent(event) {
       if (existingIssues.length > 0) {
         const issue = existingIssues[0];
         // 根据是否有 GUI 决定下一状态（暂时默认进入待发布）
-        updateIssueState(issue.id, PRODUCT_STATES.ready_for_release);
-        appendToIssueDescription(issue.id, `\n- ${getShanghaiTime()}: 验证通过，待发布`);
+        spool.queueState(issue.id, PRODUCT_STATES.ready_for_release);
+        spool.queueAppend(issue.id, `\n- ${getShanghaiTime()}: 验证通过，待发布`);
         return { result: 'state_changed', state: '待发布', issue: { identifier: issue.identifier } };
       }
       return { result: 'skipped', reason: 'No existing issue to update' };
@@ -323,8 +448,8 @@ function handleSuperpowerEvent(event) {
       // finishing-a-development-branch - 分支开发完成
       if (existingIssues.length > 0) {
         const issue = existingIssues[0];
-        updateIssueState(issue.id, PRODUCT_STATES.ready_for_release);
-        appendToIssueDescription(issue.id, `\n- ${getShanghaiTime()}: 分支开发完成，待发布`);
+        spool.queueState(issue.id, PRODUCT_STATES.ready_for_release);
+        spool.queueAppend(issue.id, `\n- ${getShanghaiTime()}: 分支开发完成，待发布`);
         return { result: 'state_changed', state: '待发布', issue: { identifier: issue.identifier } };
       }
       return { result: 'skipped', reason: 'No existing issue to update' };
@@ -333,7 +458,7 @@ function handleSuperpowerEvent(event) {
       // test-driven-development 等 - 仅记录活动
       if (existingIssues.length > 0) {
         const issue = existingIssues[0];
-        appendToIssueDescription(issue.id, `\n- ${getShanghaiTime()}: ${description}`);
+        spool.queueAppend(issue.id, `\n- ${getShanghaiTime()}: ${description}`);
         return { result: 'logged', issue: { identifier: issue.identifier } };
       }
       return { result: 'skipped', reason: 'No existing issue to log' };
@@ -353,21 +478,15 @@ function extractProjectFromCwd(cwd) {
   const match = cwd.match(/product-bu\/([^\/]+)/);
   if (match) return match[1];
 
-  // 匹配已知项目关键词
-  for (const [name, config] of Object.entries(PROJECTS.product || {})) {
-    if (config.keywords.some(k => cwd.toLowerCase().includes(k.toLowerCase()))) {
-      return name;
-    }
-  }
-
-  return '产品';
+  // 匹配 rules/product-bu.md 项目名单中的关键词
+  return classifier.matchProject('product', { cwd })?.name || '产品';
 }
 
 /**
  * 处理小红书发布事件
  */
 function handleXhsPublish(bu, sessionId, data) {
-  const { title, tags, content, imageCount } = data;
+  const { title, tags, content, imageCount, projectId, labelIds } = data;
 
   const issueTitle = `【${getDatePrefix()}】小红书：${title}`;
   const contentPreview = content?.length > 100 ? content.substring(0, 100) + '...' : content;
@@ -392,32 +511,11 @@ ${contentPreview || '(无)'}
 | 发布时 | - | - | - |
 `;
 
-  const mutation = `
-    mutation CreateIssue($input: IssueCreateInput!) {
-      issueCreate(input: $input) {
-        success
-        issue { id identifier url }
-      }
-    }
-  `;
-
-  const result = callLinear(mutation, {
-    input: {
-      teamId: TEAMS.content,
-      title: issueTitle,
-      description,
-      labelIds: [CONTENT_LABELS.publish]
-    }
+  return createIssue(TEAMS.content, issueTitle, description, {
+    labelIds: [...new Set([CONTENT_LABELS.publish, ...(labelIds || [])])],
+    projectId,
+    sessionId
   });
-
-  if (result.data?.issueCreate?.success) {
-    return {
-      result: 'created',
-      issue: result.data.issueCreate.issue
-    };
-  }
-
-  return { result: 'failed', error: result.errors };
 }
 
 /**
@@ -529,34 +627,25 @@ ${data.output || '(无)'}
 
 /**
  * 通用创建 Issue 函数
+ * 写入 spool 后立即返回客户端生成的 Issue id；创建提交后 spool 回写 identifier 并记录 session 关联
  * @param {string} teamId
  * @param {string} title
  * @param {string} description
  * @param {Object} [options] - 可选参数
  * @param {string[]} [options.labelIds] - Label IDs
  * @param {string} [options.projectId] - Project ID
+ * @param {string} [options.sessionId] - 记入 session 索引，后续同 session 事件直接命中
  */
-function createIssue(teamId, title, description, options = {}) {
-  const mutation = `
-    mutation CreateIssue($input: IssueCreateInput!) {
-      issueCreate(input: $input) {
-        success
-        issue { id identifier url }
-      }
-    }
-  `;
-
+async function createIssue(teamId, title, description, options = {}) {
   const input = { teamId, title, description };
   if (options.labelIds?.length) input.labelIds = options.labelIds;
   if (options.projectId) input.projectId = options.projectId;
 
   try {
-    const result = callLinear(mutation, { input });
-
-    if (result.data?.issueCreate?.success) {
-      return { result: 'created', issue: result.data.issueCreate.issue };
-    }
-    return { result: 'failed', error: result.errors };
+    const issueId = spool.queueCreate(input, options.sessionId);
+    // 先记本地索引，flush 前同 session 的追加能合并进这次创建；pmo_events 关联等创建提交后由 spool 写入
+    if (options.sessionId) sessionIndex.remember(options.sessionId, { id: issueId });
+    return { result: 'queued', issue: { id: issueId } };
   } catch (e) {
     return { result: 'error', error: e.message };
   }
@@ -574,8 +663,8 @@ function handleSessionEnd(bu, sessionId, data) {
   }
 
   // 根据 cwd 判断事业部
-  const detectedBu = cwd?.includes('content-bu') ? 'content' :
-                     cwd?.includes('product-bu') ? 'product' : 'pmo';
+  const cwdBu = classifier.detectBu(cwd);
+  const detectedBu = cwdBu === 'content' || cwdBu === 'product' ? cwdBu : 'pmo';
 
   return {
     result: 'needs_processing',
@@ -585,18 +674,76 @@ function handleSessionEnd(bu, sessionId, data) {
   };
 }
 
+/**
+ * 处理规则分类器已高置信归类的 session（pmo-session-end.js 的快速路径，不启动 PMO Agent）
+ * @param {Object} data - { intent, files, tools, cwd, classification: { teamId, project, labels } }
+ */
+function handleSessionReport(bu, sessionId, data) {
+  const { intent, files = [], tools = [], cwd, classification = {} } = data;
+  const teamId = classification.teamId || TEAMS[bu];
+  if (!teamId) return { result: 'skipped', reason: `No team for BU ${bu}` };
+
+  const topic = (intent || '').replace(/\s+/g, ' ').trim().substring(0, 40) || 'Session 产出';
+  const prefix = classification.project?.name ? `${classification.project.name}：` : '';
+  const issueTitle = `【${getDatePrefix()}】${prefix}${topic}`;
+  const description = `sessionId: ${sessionId}
+
+## 摘要
+${intent || '(无)'}
+
+## 产出文件
+${files.slice(0, 20).map(f => `- ${f}`).join('\n') || '(无)'}
+
+## 使用的工具
+${tools.join(', ') || '(无)'}
+
+## 归类
+- **目录**: ${cwd || '未知'}
+- **规则**: 自动归类（置信度 ${classification.confidence ?? '-'}）
+`;
+
+  return createIssue(teamId, issueTitle, description, {
+    labelIds: (classification.labels || []).map(l => l.id).filter(Boolean),
+    projectId: classification.project?.projectId,
+    sessionId
+  });
+}
+
+/**
+ * 处理已上报后又恢复的 session：找到已有 Issue 追加新进展，不重复建 Issue
+ * @param {Object} data - { intent, files, classification: { teamId } }
+ */
+async function handleSessionResume(bu, sessionId, data) {
+  const { intent, files = [], classification = {} } = data;
+  const teamId = classification.teamId || TEAMS[bu];
+  if (!teamId) return { result: 'skipped', reason: `No team for BU ${bu}` };
+
+  const existingIssues = await findIssuesForSession(teamId, sessionId);
+  if (existingIssues.length === 0) {
+    return { result: 'skipped', reason: 'No existing issue for resumed session' };
+  }
+
+  const issue = existingIssues[0];
+  const topic = (intent || '').replace(/\s+/g, ' ').trim().substring(0, 200) || '(无)';
+  const fileList = files.slice(0, 20).map(f => `- ${f}`).join('\n') || '(无)';
+  spool.queueAppend(issue.id, `\n## ${getShanghaiTime()} - Session 继续\n${topic}\n\n产出文件：\n${fileList}`);
+  return { result: 'updated', issue: { id: issue.id, identifier: issue.identifier } };
+}
+
 module.exports = {
   handleEvent,
   handleSuperpowerEvent,
   getLinearApiKey,
+  getSecret,
   callLinear,
+  callSupabase,
   searchIssueBySessionId,
-  updateIssueState,
+  findIssuesForSession,
+  recordIssueInPmoEvents,
   createIssue,
   TEAMS,
   INITIATIVES,
   PROJECTS,
   PRODUCT_STATES,
-  CONTENT_LABELS,
-  ACTION_TO_STATE
+  CONTENT_LABELS
 };
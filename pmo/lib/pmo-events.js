@@ -0,0 +1,117 @@
+/**
+ * PMO Events - pac.pmo_events 留痕写入（批量多行 INSERT）
+ *
+ * record() 只往内存攒，flush() 按 BATCH_SIZE 切批，每批一次 POST /rest/v1/pmo_events（数组 body）。
+ * PostgREST 把数组 body 翻成一条多行 INSERT，表上的汇总触发器是语句级的，每批只聚合一次
+ * （见 infrastructure/supabase/migrations/20261017000000_partition_pmo_events.sql）。
+ *
+ * 用法：
+ *   pmoEvents.record({ session_id, event_type: 'session_end', bu, decision, summary, ... });
+ *   await pmoEvents.flush({ ensurePartitions: true });  // Scanner 每轮一次
+ *
+ * 未配置 SUPABASE_ANON_KEY 时 flush 直接丢弃（与 handler 的 Supabase 调用一致）
+ */
+
+const { callSupabase, getSecret } = require('./handler');
+
+const BATCH_SIZE = Number(process.env.PMO_EVENTS_BATCH_SIZE) || 500;
+
+// 每行都带齐这些列，PostgREST 按同一列清单生成 INSERT
+const COLUMNS = [
+  'session_id', 'event_type', 'bu', 'cwd', 'summary', 'decision',
+  'linear_issue_id', 'transcript_path', 'metadata', 'created_at'
+];
+
+// 与表上的 CHECK 约束保持一致
+const BUS = new Set(['product', 'content', 'investment', 'research', 'pmo', 'unknown']);
+
+// hook / Scanner 输出的 result → pmo_events.decision
+const DECISIONS = {
+  skipped: 'skipped',
+  reported_by_rules: 'reported',
+  appended_to_issue: 'reported',
+  agent_scheduled: 'pending'
+};
+
+const pending = [];
+
+/**
+ * 攒一行；created_at 取记录时间，保证批量写入后时间线不变
+ */
+function record(row) {
+  pending.push({
+    session_id: row.session_id,
+    event_type: row.event_type,
+    bu: BUS.has(row.bu) ? row.bu : 'unknown',
+    cwd: row.cwd || null,
+    summary: row.summary ? row.summary.substring(0, 4000) : null,
+    decision: row.decision || null,
+    linear_issue_id: row.linear_issue_id || null,
+    transcript_path: row.transcript_path || null,
+    metadata: row.metadata || {},
+    created_at: row.created_at || new Date().toISOString()
+  });
+}
+
+/**
+ * 把 hook / Scanner 的输出转成一行 session_end 留痕
+ */
+function recordSessionOutcome({ session_id, transcript_path, cwd, summary }, output, source) {
+  const decision = DECISIONS[output.result];
+  if (!decision) return;
+  record({
+    session_id,
+    event_type: 'session_end',
+    bu: output.bu,
+    cwd,
+    summary,
+    decision,
+    transcript_path,
+    metadata: { source, result: output.result, reason: output.reason }
+  });
+}
+
+/**
+ * @param {Object} [options]
+ * @param {boolean} [options.ensurePartitions] - 先确保当月及后两个月的分区存在
+ * @returns {Promise<{inserted: number, batches: number, failed: number, dropped: number}>}
+ */
+async function flush(options = {}) {
+  const stats = { inserted: 0, batches: 0, failed: 0, dropped: 0 };
+  if (pending.length === 0) return stats;
+
+  if (!getSecret('SUPABASE_ANON_KEY')) {
+    stats.dropped = pending.splice(0).length;
+    return stats;
+  }
+
+  if (options.ensurePartitions) {
+    try {
+      await callSupabase('rpc/ensure_pmo_events_partitions', { method: 'POST', body: {} });
+    } catch (e) {
+      console.error('ensure_pmo_events_partitions error:', e.message);
+    }
+  }
+
+  while (pending.length > 0) {
+    const batch = pending.splice(0, BATCH_SIZE);
+    stats.batches++;
+    try {
+      // 出错时 PostgREST 返回 { code, message }，成功（return=minimal）无 body
+      const error = await callSupabase(`pmo_events?columns=${COLUMNS.join(',')}`, { method: 'POST', body: batch });
+      if (error) throw new Error(error.message || JSON.stringify(error));
+      stats.inserted += batch.length;
+    } catch (e) {
+      console.error('pmo_events insert error:', e.message);
+      stats.failed += batch.length;
+    }
+  }
+  return stats;
+}
+
+module.exports = {
+  BATCH_SIZE,
+  record,
+  recordSessionOutcome,
+  flush
+};
@@ -0,0 +1,200 @@
+/**
+ * Session Index - sessionId → Linear Issue 本地索引
+ *
+ * 职责：
+ * 1. 替代每个 superpower 事件都做一次 `description contains` 全文搜索
+ * 2. 缓存 Issue 的 identifier / state（description 不缓存：追加前由 spool 批量读取当前值）
+ *
+ * 淘汰策略：
+ * - LRU：最多 MAX_ENTRIES 条，按最近访问顺序淘汰
+ * - TTL：映射 ENTRY_TTL_MS 后过期
+ *
+ * 持久化为单个 JSON 文件，daemon 常驻内存，进程内回退路径每次加载
+ *
+ * 多进程：daemon 和 hook 进程都会写。保存时在 INDEX_FILE.lock 下重新读盘，
+ * 只把本进程改过的条目合并进去再 rename，不会覆盖其他进程的写入
+ */
+
+const fs = require('fs');
+const path = require('path');
+
+const INDEX_FILE = process.env.PMO_SESSION_INDEX_FILE
+  || path.join(process.env.HOME || '/tmp', '.claude/pmo/session-index.json');
+const ENABLED = process.env.PMO_SESSION_INDEX !== '0';
+const MAX_ENTRIES = 500;
+const ENTRY_TTL_MS = 7 * 24 * 60 * 60 * 1000;      // 7 天
+const LOCK_FILE = `${INDEX_FILE}.lock`;
+const LOCK_WAIT_MS = 200;
+
+// Map 保持插入顺序：越靠后越新，淘汰时从头部删
+let entries = null;
+// 上次保存后本进程改过的条目：sessionId → entry，null 表示删除
+const dirty = new Map();
+
+function readFromDisk() {
+  const result = new Map();
+  try {
+    const saved = JSON.parse(fs.readFileSync(INDEX_FILE, 'utf8'));
+    const now = Date.now();
+    for (const [sessionId, entry] of saved) {
+      if (now - entry.touchedAt < ENTRY_TTL_MS) result.set(sessionId, entry);
+    }
+  } catch (e) {
+    // 文件不存在或损坏：从空索引开始
+  }
+  return result;
+}
+
+function load() {
+  if (!entries) entries = readFromDisk();
+  return entries;
+}
+
+function trim(map) {
+  while (map.size > MAX_ENTRIES) {
+    map.delete(map.keys().next().value);
+  }
+}
+
+function isProcessAlive(pid) {
+  try { process.kill(pid, 0); return true; }
+  catch (e) { return e.code === 'EPERM'; }
+}
+
+function sleepSync(ms) {
+  Atomics.wait(new Int32Array(new SharedArrayBuffer(4)), 0, 0, ms);
+}
+
+/**
+ * 取保存锁：持锁时间只有一次读 + 写，短暂等待；持锁进程已退出则抢锁
+ */
+function acquireLock() {
+  const deadline = Date.now() + LOCK_WAIT_MS;
+  for (;;) {
+    try {
+      fs.writeFileSync(LOCK_FILE, String(process.pid), { flag: 'wx' });
+      return true;
+    } catch (e) {
+      if (e.code !== 'EEXIST') throw e;
+    }
+    let holder = 0;
+    try { holder = Number(fs.readFileSync(LOCK_FILE, 'utf8')); } catch (e) {}
+    if (holder && !isProcessAlive(holder)) {
+      try { fs.unlinkSync(LOCK_FILE); } catch (e) {}
+      continue;
+    }
+    if (Date.now() >= deadline) return false;
+    sleepSync(5);
+  }
+}
+
+function releaseLock() {
+  try { fs.unlinkSync(LOCK_FILE); } catch (e) {}
+}
+
+/**
+ * 锁内重新读盘，合并本进程的改动后原子替换；合并结果同时成为新的内存索引
+ * 拿不到锁时保留改动，下次保存再合并
+ */
+function save() {
+  try {
+    fs.mkdirSync(path.dirname(INDEX_FILE), { recursive: true });
+    if (!acquireLock()) {
+      console.error('session-index save skipped: lock busy');
+      return;
+    }
+    try {
+      const merged = readFromDisk();
+      for (const [sessionId, entry] of dirty) {
+        merged.delete(sessionId);
+        if (entry) merged.set(sessionId, entry);
+      }
+      trim(merged);
+
+      const tmpFile = `${INDEX_FILE}.${process.pid}.tmp`;
+      fs.writeFileSync(tmpFile, JSON.stringify([...merged]));
+      fs.renameSync(tmpFile, INDEX_FILE);
+      entries = merged;
+      dirty.clear();
+    } finally {
+      releaseLock();
+    }
+  } catch (e) {
+    console.error('session-index save error:', e.message);
+  }
+}
+
+function touch(sessionId, entry) {
+  entry.touchedAt = Date.now();
+  entries.delete(sessionId);
+  entries.set(sessionId, entry);
+  dirty.set(sessionId, entry);
+  trim(entries);
+}
+
+/**
+ * 查询 sessionId 对应的 Issue
+ * @returns {{id: string, identifier: string, state: ?Object}|null}
+ */
+function lookup(sessionId) {
+  if (!ENABLED || !sessionId) return null;
+  const entry = load().get(sessionId);
+  if (!entry) return null;
+
+  const now = Date.now();
+  if (now - entry.touchedAt >= ENTRY_TTL_MS) {
+    entries.delete(sessionId);
+    return null;
+  }
+
+  touch(sessionId, entry);
+  return {
+    id: entry.id,
+    identifier: entry.identifier,
+    state: entry.state || null
+  };
+}
+
+/**
+ * 记录/合并 sessionId 对应的 Issue 信息
+ * @param {string} sessionId
+ * @param {Object} issue - 至少包含 id；identifier / state 可选
+ */
+function remember(sessionId, issue) {
+  if (!ENABLED || !sessionId || !issue?.id) return;
+  const current = load().get(sessionId);
+  const entry = current && current.id === issue.id ? current : { id: issue.id };
+
+  if (issue.identifier) entry.identifier = issue.identifier;
+  if (issue.state) entry.state = issue.state;
+
+  touch(sessionId, entry);
+  save();
+}
+
+/**
+ * 按 issueId 更新缓存（调用方只知道 issueId 时使用）
+ */
+function rememberByIssueId(issueId, patch) {
+  if (!ENABLED || !issueId) return;
+  for (const [sessionId, entry] of load()) {
+    if (entry.id === issueId) return remember(sessionId, { id: issueId, ...patch });
+  }
+}
+
+/**
+ * 删除映射（Issue 已删除或写入失败时）
+ */
+function forget(sessionId) {
+  if (!ENABLED || !load().delete(sessionId)) return;
+  dirty.set(sessionId, null);
+  save();
+}
+
+module.exports = {
+  INDEX_FILE,
+  lookup,
+  remember,
+  rememberByIssueId,
+  forget
+};
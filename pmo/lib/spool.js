@@ -0,0 +1,645 @@
+/**
+ * Event Spool - Linear 写操作的预写日志 + 合并批量提交
+ *
+ * 职责：
+ * 1. handler 的写操作（建 Issue / 改状态 / 追加时间线）先追加到磁盘 WAL，立即返回
+ * 2. 后台 flusher 把同一 Issue 的所有待写操作合并成一次 issueCreate / issueUpdate
+ * 3. 不同 Issue 的写操作打包进同一个带别名的 GraphQL 文档，一次往返；
+ *    有追加的 Issue 先用同样带别名的查询读一次当前 description（每批一次往返）
+ *
+ * 崩溃恢复（exactly-once）：
+ * - 发送前先写 prepare 记录，内容是算好的「绝对值」输入（完整 description、目标 state）
+ * - 收到响应后写 commit 记录；prepare 无 commit 的批次在下次 flush 时原样重放
+ * - issueUpdate 写的是绝对值，重放幂等；issueCreate 使用客户端生成的 id，重放前先查是否已存在
+ *
+ * WAL 记录（每行一个 JSON）：
+ *   { t: 'op', id, ts, kind: 'create' | 'state' | 'append', issueId, ... }
+ *   { t: 'prepare', batch, ops, requests }
+ *   { t: 'commit', batch, ops }          // 成功的 op
+ *   { t: 'fail', batch, ops, error }     // 失败的 op（含读不到基准 description 的追加），回到待写队列
+ *   { t: 'dead', ops }                   // 超过重试上限，转入 dead.jsonl
+ *
+ * 多进程：任何进程都可 enqueue（O_APPEND 追加），flush 由 flush.lock 互斥
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const sessionIndex = require('./session-index');
+
+const SPOOL_DIR = process.env.PMO_SPOOL_DIR
+  || path.join(process.env.HOME || '/tmp', '.claude/pmo/spool');
+const WAL_FILE = path.join(SPOOL_DIR, 'wal.jsonl');
+const LOCK_FILE = path.join(SPOOL_DIR, 'flush.lock');
+const DEAD_FILE = path.join(SPOOL_DIR, 'dead.jsonl');
+
+const FLUSH_DELAY_MS = 1500;          // 合并窗口：窗口内的事件进同一批
+const FLUSH_INTERVAL_MS = 30000;      // 兜底轮询（重试 / 其他进程留下的积压）
+const MAX_ALIASES_PER_REQUEST = 25;
+const MAX_ATTEMPTS = 5;
+const BACKOFF_BASE_MS = 1000;
+const BACKOFF_MAX_MS = 60000;
+
+const flusher = {
+  enabled: false,
+  timer: null,
+  interval: null,
+  running: null,
+  runningFrom: 0,     // 进行中这一轮开始时的 stats.enqueued
+  failures: 0,
+  backoffUntil: 0
+};
+
+const stats = { enqueued: 0, flushes: 0, requests: 0, committed: 0, failed: 0, dead: 0 };
+
+function appendRecord(record) {
+  fs.mkdirSync(SPOOL_DIR, { recursive: true });
+  fs.appendFileSync(WAL_FILE, JSON.stringify(record) + '\n');
+}
+
+function enqueue(op) {
+  const record = { t: 'op', id: crypto.randomUUID(), ts: Date.now(), ...op };
+  appendRecord(record);
+  stats.enqueued++;
+  if (flusher.enabled) scheduleFlush();
+  return record.id;
+}
+
+/**
+ * 排队创建 Issue
+ * @param {Object} input - IssueCreateInput（不含 id）
+ * @param {string} [sessionId] - 提交后把 identifier 回写 session 索引
+ * @returns {string} 客户端生成的 Issue id，flush 前即可用于后续追加
+ */
+function queueCreate(input, sessionId) {
+  const issueId = crypto.randomUUID();
+  enqueue({ kind: 'create', issueId, sessionId, input: { ...input, id: issueId } });
+  return issueId;
+}
+
+/**
+ * 排队修改 Issue 状态
+ */
+function queueState(issueId, stateId) {
+  return enqueue({ kind: 'state', issueId, stateId });
+}
+
+/**
+ * 排队追加 Issue description
+ */
+function queueAppend(issueId, text) {
+  return enqueue({ kind: 'append', issueId, text });
+}
+
+// ============================================
+// WAL 读取与状态重建
+// ============================================
+
+function listSegments() {
+  try {
+    return fs.readdirSync(SPOOL_DIR)
+      .filter(f => f.startsWith('segment-') && f.endsWith('.jsonl'))
+      .sort()
+      .map(f => path.join(SPOOL_DIR, f));
+  } catch (e) {
+    return [];
+  }
+}
+
+function readRecords(file) {
+  let content;
+  try { content = fs.readFileSync(file, 'utf8'); } catch (e) { return []; }
+  const records = [];
+  for (const line of content.split('\n')) {
+    if (!line) continue;
+    // 崩溃时可能留下半行，跳过
+    try { records.push(JSON.parse(line)); } catch (e) {}
+  }
+  return records;
+}
+
+/**
+ * 从全部记录重建待写状态
+ * @returns {{pending: Object[], prepared: Object[], attempts: Map}}
+ */
+function rebuildState(records) {
+  const ops = new Map();
+  const prepared = new Map();
+  const resolved = new Set();
+  const attempts = new Map();
+
+  for (const r of records) {
+    if (r.t === 'op') {
+      ops.set(r.id, r);
+      if (r.attempts) attempts.set(r.id, r.attempts);
+    } else if (r.t === 'prepare') {
+      prepared.set(r.batch, r);
+    } else if (r.t === 'commit') {
+      prepared.delete(r.batch);
+      r.ops.forEach(id => resolved.add(id));
+    } else if (r.t === 'fail') {
+      prepared.delete(r.batch);
+      r.ops.forEach(id => attempts.set(id, (attempts.get(id) || 0) + 1));
+    } else if (r.t === 'dead') {
+      r.ops.forEach(id => resolved.add(id));
+    }
+  }
+
+  const inFlight = new Set();
+  for (const batch of prepared.values()) batch.ops.forEach(id => inFlight.add(id));
+
+  const pending = [...ops.values()].filter(op => !resolved.has(op.id) && !inFlight.has(op.id));
+  return { ops, pending, prepared: [...prepared.values()], attempts };
+}
+
+// ============================================
+// 合并：同一 Issue 的待写操作 → 一个请求
+// ============================================
+
+/**
+ * 按 Issue 分组（保持 enqueue 顺序）
+ */
+function groupByIssue(pending) {
+  const groups = new Map();
+  for (const op of pending) {
+    if (!groups.has(op.issueId)) groups.set(op.issueId, []);
+    groups.get(op.issueId).push(op);
+  }
+  return [...groups.entries()].map(([issueId, ops]) => ({ issueId, ops }));
+}
+
+function joinAppends(base, ops) {
+  return ops.filter(op => op.kind === 'append')
+    .reduce((desc, op) => desc + '\n\n' + op.text, base);
+}
+
+/**
+ * 把一组操作折叠成一个绝对值请求
+ * @param {Object} group
+ * @param {?string} baseDescription - 更新类请求的当前 description（创建类忽略）；有追加时必须是读到的字符串
+ */
+function coalesce(group, baseDescription) {
+  const create = group.ops.find(op => op.kind === 'create');
+  const lastState = group.ops.filter(op => op.kind === 'state').pop();
+  const hasAppend = group.ops.some(op => op.kind === 'append');
+
+  if (create) {
+    const input = { ...create.input, description: joinAppends(create.input.description || '', group.ops) };
+    if (lastState) input.stateId = lastState.stateId;
+    return { kind: 'create', issueId: group.issueId, input, sessionId: create.sessionId };
+  }
+
+  // 追加只能接在真实读到的 description 后面，否则 issueUpdate 会用几行时间线覆盖整个 description
+  if (hasAppend && typeof baseDescription !== 'string') {
+    throw new Error(`No base description for issue ${group.issueId}`);
+  }
+  const input = {};
+  if (lastState) input.stateId = lastState.stateId;
+  if (hasAppend) input.description = joinAppends(baseDescription, group.ops);
+  return { kind: 'update', issueId: group.issueId, input };
+}
+
+// ============================================
+// GraphQL 文档构建
+// ============================================
+
+const ISSUE_FIELDS = 'id identifier url description state { id name }';
+
+function buildMutation(requests) {
+  const params = [];
+  const fields = [];
+  const variables = {};
+
+  requests.forEach((req, i) => {
+    if (req.kind === 'create') {
+      params.push(`$c${i}: IssueCreateInput!`);
+      fields.push(`m${i}: issueCreate(input: $c${i}) { success issue { ${ISSUE_FIELDS} } }`);
+      variables[`c${i}`] = req.input;
+    } else {
+      params.push(`$i${i}: String!`, `$u${i}: IssueUpdateInput!`);
+      fields.push(`m${i}: issueUpdate(id: $i${i}, input: $u${i}) { success issue { ${ISSUE_FIELDS} } }`);
+      variables[`i${i}`] = req.issueId;
+      variables[`u${i}`] = req.input;
+    }
+  });
+
+  return {
+    query: `mutation SpoolFlush(${params.join(', ')}) {\n  ${fields.join('\n  ')}\n}`,
+    variables
+  };
+}
+
+function buildRead(issueIds, fields) {
+  const parts = issueIds.map((id, i) => `r${i}: issue(id: ${JSON.stringify(id)}) { ${fields} }`);
+  return `query SpoolRead {\n  ${parts.join('\n  ')}\n}`;
+}
+
+/**
+ * 一次往返读取多个 Issue；不存在的返回 null
+ * @returns {Promise<Map<string, ?Object>>}
+ */
+async function readIssues(callLinear, issueIds, fields) {
+  const found = new Map();
+  if (issueIds.length === 0) return found;
+
+  stats.requests++;
+  const result = await callLinear(buildRead(issueIds, fields));
+  if (!result?.data && issueIds.length > 1) {
+    // issue(id) 非空字段：任一 id 不存在会让整个 data 为 null，退回逐个读取
+    for (const id of issueIds) {
+      const single = await readIssues(callLinear, [id], fields);
+      found.set(id, single.get(id));
+    }
+    return found;
+  }
+  issueIds.forEach((id, i) => found.set(id, result?.data?.[`r${i}`] || null));
+  return found;
+}
+
+/**
+ * 发送一批请求，返回每个请求的成败
+ * @returns {Promise<Array<{ok: boolean, issue?: Object, error?: string}>>}
+ */
+async function sendBatch(callLinear, requests) {
+  const { query, variables } = buildMutation(requests);
+  stats.requests++;
+  const result = await callLinear(query, variables);
+
+  const aliasErrors = new Map();
+  for (const err of result?.errors || []) {
+    const alias = err.path?.[0];
+    if (alias) aliasErrors.set(alias, err.message);
+  }
+  if (!result?.data && result?.errors?.length) {
+    // 整个文档被拒（如校验失败）：视为全部失败
+    const message = result.errors.map(e => e.message).join('; ');
+    return requests.map(() => ({ ok: false, error: message }));
+  }
+
+  return requests.map((req, i) => {
+    const payload = result.data?.[`m${i}`];
+    if (payload?.success) return { ok: true, issue: payload.issue };
+    return { ok: false, error: aliasErrors.get(`m${i}`) || 'not successful' };
+  });
+}
+
+/**
+ * 创建提交后才写 session → Issue 关联（dead-letter 的创建不会留下指向不存在 Issue 的关联）
+ */
+async function linkCreated(requests, issues) {
+  const { recordIssueInPmoEvents } = require('./handler');
+  for (let i = 0; i < requests.length; i++) {
+    const { sessionId, input } = requests[i];
+    if (sessionId) await recordIssueInPmoEvents(sessionId, input.teamId, issues[i], input.title);
+  }
+}
+
+function rememberIssue(request, issue) {
+  if (request.kind === 'create' && request.sessionId) {
+    sessionIndex.remember(request.sessionId, issue);
+  } else {
+    sessionIndex.rememberByIssueId(request.issueId, { identifier: issue.identifier, state: issue.state });
+  }
+}
+
+/**
+ * 提交一个已 prepare 的批次，写 commit / fail 记录
+ * written 为提交后 Linear 返回的 [issueId, description]，本轮后续追加可直接以此为基准
+ */
+async function commitBatch(callLinear, batch) {
+  const results = await sendBatch(callLinear, batch.requests);
+  const committed = [];
+  const failed = [];
+  const errors = [];
+  const created = { requests: [], issues: [] };
+  const written = [];
+
+  results.forEach((res, i) => {
+    const opIds = batch.requests[i].opIds;
+    if (res.ok) {
+      committed.push(...opIds);
+      rememberIssue(batch.requests[i], res.issue);
+      if (typeof res.issue?.description === 'string') written.push([batch.requests[i].issueId, res.issue.description]);
+      if (batch.requests[i].kind === 'create') {
+        created.requests.push(batch.requests[i]);
+        created.issues.push(res.issue);
+      }
+    } else {
+      failed.push(...opIds);
+      errors.push(`${batch.requests[i].issueId}: ${res.error}`);
+    }
+  });
+
+  if (committed.length) appendRecord({ t: 'commit', batch: batch.batch, ops: committed });
+  if (failed.length) appendRecord({ t: 'fail', batch: batch.batch, ops: failed, error: errors.join('; ') });
+  await linkCreated(created.requests, created.issues);
+
+  stats.committed += committed.length;
+  stats.failed += failed.length;
+  return { committed: committed.length, failed: failed.length, errors, written };
+}
+
+/**
+ * 重放崩溃前已 prepare 但未 commit 的批次
+ * 已存在的 issueCreate 直接视为成功，其余请求原样重发
+ */
+async function replayPrepared(callLinear, batch) {
+  const createIds = batch.requests.filter(r => r.kind === 'create').map(r => r.issueId);
+  const existing = await readIssues(callLinear, createIds, ISSUE_FIELDS);
+
+  const alreadyCreated = batch.requests.filter(r => r.kind === 'create' && existing.get(r.issueId));
+  const remaining = batch.requests.filter(r => !alreadyCreated.includes(r));
+
+  if (alreadyCreated.length) {
+    alreadyCreated.forEach(r => rememberIssue(r, existing.get(r.issueId)));
+    appendRecord({ t: 'commit', batch: batch.batch, ops: alreadyCreated.flatMap(r => r.opIds) });
+    await linkCreated(alreadyCreated, alreadyCreated.map(r => existing.get(r.issueId)));
+  }
+  const written = alreadyCreated
+    .map(r => [r.issueId, existing.get(r.issueId).description])
+    .filter(([, description]) => typeof description === 'string');
+  if (remaining.length === 0) {
+    return { committed: alreadyCreated.length, failed: 0, errors: [], written };
+  }
+  const result = await commitBatch(callLinear, { ...batch, requests: remaining });
+  return { ...result, committed: result.committed + alreadyCreated.length, written: [...written, ...result.written] };
+}
+
+function needsBase(group) {
+  return !group.ops.some(op => op.kind === 'create') && group.ops.some(op => op.kind === 'append');
+}
+
+/**
+ * 为更新类请求准备基准 description：本轮 flush 自己刚写过的直接用，其余在 mutation 前一次批量读取
+ * （不信任更早的缓存：人 / PMO Agent / 其他进程可能改过，拿旧值拼接会覆盖他们的修改）
+ * 读取失败（限流 / 4xx 时 data 为 null）或 Issue 不存在的不放进结果，由调用方记为失败重试
+ * @param {Map<string, string>} written - 本轮已提交的 issueId → description
+ */
+async function resolveBaseDescriptions(callLinear, groups, written) {
+  const bases = new Map();
+  const missing = [];
+
+  for (const group of groups) {
+    if (!needsBase(group)) continue;
+    if (written.has(group.issueId)) bases.set(group.issueId, written.get(group.issueId));
+    else missing.push(group.issueId);
+  }
+
+  const fetched = await readIssues(callLinear, missing, 'id description');
+  for (const [issueId, issue] of fetched) {
+    // Issue 存在但从未写过 description 时 Linear 返回 null
+    if (issue) bases.set(issueId, issue.description || '');
+  }
+  return bases;
+}
+
+// ============================================
+// Flush
+// ============================================
+
+function isProcessAlive(pid) {
+  try { process.kill(pid, 0); return true; }
+  catch (e) { return e.code === 'EPERM'; }
+}
+
+function acquireLock() {
+  fs.mkdirSync(SPOOL_DIR, { recursive: true });
+  try {
+    fs.writeFileSync(LOCK_FILE, String(process.pid), { flag: 'wx' });
+    return true;
+  } catch (e) {
+    const holder = Number(fs.readFileSync(LOCK_FILE, 'utf8'));
+    if (holder && isProcessAlive(holder)) return false;
+    // 持锁进程已退出：抢锁
+    fs.writeFileSync(LOCK_FILE, String(process.pid));
+    return true;
+  }
+}
+
+function releaseLock() {
+  try { fs.unlinkSync(LOCK_FILE); } catch (e) {}
+}
+
+/**
+ * 把 WAL 切成只读 segment，之后的追加写入新 WAL
+ */
+function rotateWal() {
+  try {
+    if (fs.statSync(WAL_FILE).size === 0) return;
+  } catch (e) {
+    return;
+  }
+  const segment = path.join(SPOOL_DIR, `segment-${Date.now()}-${process.pid}.jsonl`);
+  fs.renameSync(WAL_FILE, segment);
+}
+
+/**
+ * 压缩：segment 里已解决的记录丢弃，只把未决 op / 未决批次写进一个新 segment
+ * 解决状态以 segment + 当前 WAL（本轮的 commit/fail 记录）为准；WAL 本身不动，
+ * 其他进程在 flush 期间追加的 op 留给下一轮
+ * segment 在读取后被追加过（极少见的并发追加）则跳过本轮
+ */
+function compact(segments, sizes) {
+  for (let i = 0; i < segments.length; i++) {
+    try {
+      if (fs.statSync(segments[i]).size !== sizes[i]) return;
+    } catch (e) {
+      return;
+    }
+  }
+
+  const segmentRecords = segments.flatMap(readRecords);
+  const all = rebuildState([...segmentRecords, ...readRecords(WAL_FILE)]);
+  const local = rebuildState(segmentRecords);
+
+  const openBatches = new Set(all.prepared.map(b => b.batch));
+  const openOps = new Set([...all.pending.map(op => op.id), ...all.prepared.flatMap(b => b.ops)]);
+  const keep = [];
+  for (const op of local.ops.values()) {
+    // attempts 只折算 segment 内的 fail 记录，WAL 里的 fail 记录下轮还会再算一次
+    if (openOps.has(op.id)) keep.push({ ...op, attempts: local.attempts.get(op.id) || 0 });
+  }
+  keep.push(...local.prepared.filter(b => openBatches.has(b.batch)));
+
+  if (keep.length) {
+    const compacted = path.join(SPOOL_DIR, `segment-${Date.now()}-${process.pid}-c.jsonl`);
+    fs.writeFileSync(`${compacted}.tmp`, keep.map(r => JSON.stringify(r)).join('\n') + '\n');
+    fs.renameSync(`${compacted}.tmp`, compacted);
+  }
+  for (const file of segments) {
+    try { fs.unlinkSync(file); } catch (e) {}
+  }
+}
+
+/**
+ * 超过重试上限的 op 转入 dead.jsonl
+ * 创建失败的 Issue 永远不会存在：同一 Issue 的其余 op 一并转入，session 索引里指向它的映射删除
+ */
+function buryDead(pending, attempts) {
+  const expired = pending.filter(op => (attempts.get(op.id) || 0) >= MAX_ATTEMPTS);
+  if (expired.length === 0) return pending;
+
+  const lostCreates = expired.filter(op => op.kind === 'create');
+  const lostIssues = new Set(lostCreates.map(op => op.issueId));
+  const dead = pending.filter(op => expired.includes(op) || lostIssues.has(op.issueId));
+  for (const op of lostCreates) {
+    if (op.sessionId && sessionIndex.lookup(op.sessionId)?.id === op.issueId) sessionIndex.forget(op.sessionId);
+  }
+
+  fs.appendFileSync(DEAD_FILE, dead.map(op => JSON.stringify(op)).join('\n') + '\n');
+  appendRecord({ t: 'dead', ops: dead.map(op => op.id) });
+  stats.dead += dead.length;
+  const deadIds = new Set(dead.map(op => op.id));
+  return pending.filter(op => !deadIds.has(op.id));
+}
+
+async function flushLocked(callLinear) {
+  rotateWal();
+  const segments = listSegments();
+  const sizes = segments.map(f => fs.statSync(f).size);
+  const records = segments.flatMap(readRecords);
+  let { pending, prepared, attempts } = rebuildState(records);
+  const summary = { requests: 0, committed: 0, failed: 0, errors: [] };
+  const written = new Map();
+
+  const absorb = (res) => {
+    summary.requests++;
+    summary.committed += res.committed;
+    summary.failed += res.failed;
+    summary.errors.push(...res.errors);
+    for (const [issueId, description] of res.written || []) written.set(issueId, description);
+  };
+
+  // 1. 先重放未决批次，保证同一 Issue 的写入顺序
+  for (const batch of prepared) {
+    absorb(await replayPrepared(callLinear, batch));
+  }
+
+  // 2. 合并新的待写操作
+  pending = buryDead(pending, attempts);
+  const groups = groupByIssue(pending);
+
+  for (let i = 0; i < groups.length; i += MAX_ALIASES_PER_REQUEST) {
+    const chunk = groups.slice(i, i + MAX_ALIASES_PER_REQUEST);
+    const bases = await resolveBaseDescriptions(callLinear, chunk, written);
+    const unread = chunk.filter(group => needsBase(group) && !bases.has(group.issueId));
+    if (unread.length) {
+      // 没读到基准 description：这些 op 记为失败，退避后重试，超过上限进 dead.jsonl
+      const ops = unread.flatMap(group => group.ops.map(op => op.id));
+      const errors = unread.map(group => `${group.issueId}: description read failed`);
+      appendRecord({ t: 'fail', batch: crypto.randomUUID(), ops, error: errors.join('; ') });
+      stats.failed += ops.length;
+      absorb({ committed: 0, failed: ops.length, errors });
+    }
+
+    const ready = chunk.filter(group => !unread.includes(group));
+    if (ready.length === 0) continue;
+    const requests = ready.map(group => ({
+      ...coalesce(group, bases.get(group.issueId)),
+      opIds: group.ops.map(op => op.id)
+    }));
+
+    const batch = { t: 'prepare', batch: crypto.randomUUID(), ops: requests.flatMap(r => r.opIds), requests };
+    appendRecord(batch);
+    absorb(await commitBatch(callLinear, batch));
+  }
+
+  compact(segments, sizes);
+  return summary;
+}
+
+function backoff() {
+  flusher.failures++;
+  flusher.backoffUntil = Date.now() + Math.min(BACKOFF_MAX_MS, BACKOFF_BASE_MS * 2 ** (flusher.failures - 1));
+}
+
+/**
+ * 提交所有待写操作
+ * @param {Object} [options]
+ * @param {boolean} [options.force] - 忽略退避窗口
+ * 返回的结果覆盖调用前 enqueue 的所有 op（有 flush 在跑时排在它后面）
+ * @returns {Promise<Object>} { requests, committed, failed, errors }（有失败时另带 retryAt）或 { skipped }
+ */
+async function flush(options = {}) {
+  if (flusher.running) {
+    // 进行中的一轮只覆盖它开始前的 op；之后又有 enqueue 的，等它结束再来一轮
+    if (stats.enqueued === flusher.runningFrom) return flusher.running;
+    return flusher.running.then(() => flush(options));
+  }
+  if (!options.force && Date.now() < flusher.backoffUntil) return { skipped: 'backoff' };
+  if (!acquireLock()) return { skipped: 'locked' };
+
+  const { callLinear } = require('./handler');
+  flusher.runningFrom = stats.enqueued;
+  flusher.running = (async () => {
+    try {
+      const summary = await flushLocked(callLinear);
+      stats.flushes++;
+      if (summary.failed) {
+        // 有 op 失败（含读不到基准 description）：退避后重试，而不是下一个事件立刻再打一轮
+        backoff();
+        return { ...summary, retryAt: new Date(flusher.backoffUntil).toISOString() };
+      }
+      flusher.failures = 0;
+      flusher.backoffUntil = 0;
+      return summary;
+    } catch (e) {
+      // 网络层失败：prepare 记录保留，退避后重放
+      backoff();
+      return { error: e.message, retryAt: new Date(flusher.backoffUntil).toISOString() };
+    } finally {
+      releaseLock();
+      flusher.running = null;
+    }
+  })();
+
+  return flusher.running;
+}
+
+function scheduleFlush(delayMs = FLUSH_DELAY_MS) {
+  if (flusher.timer) return;
+  const wait = Math.max(delayMs, flusher.backoffUntil - Date.now());
+  flusher.timer = setTimeout(async () => {
+    flusher.timer = null;
+    const summary = await flush();
+    if (summary.error || summary.failed) scheduleFlush(flusher.backoffUntil - Date.now());
+  }, wait);
+}
+
+/**
+ * 启动后台 flusher（daemon 调用）
+ * enqueue 后在合并窗口结束时 flush，另有兜底轮询处理积压与重试
+ */
+function startFlusher() {
+  if (flusher.enabled) return;
+  flusher.enabled = true;
+  flusher.interval = setInterval(() => scheduleFlush(0), FLUSH_INTERVAL_MS);
+  scheduleFlush(0);
+}
+
+async function stopFlusher() {
+  flusher.enabled = false;
+  clearInterval(flusher.interval);
+  clearTimeout(flusher.timer);
+  flusher.timer = null;
+  if (flusher.running) await flusher.running;
+}
+
+function getStats() {
+  return { ...stats, backoffUntil: flusher.backoffUntil || null };
+}
+
+module.exports = {
+  SPOOL_DIR,
+  queueCreate,
+  queueState,
+  queueAppend,
+  flush,
+  startFlusher,
+  stopFlusher,
+  getStats,
+  // 供压测/排查使用
+  rebuildState,
+  coalesce,
+  buildMutation
+};
@@ -0,0 +1,294 @@
+/**
+ * PMO Tracing - hook / daemon 共用的结构化 span 记录
+ *
+ * 每个 span 一行 JSON，追加到 PMO_TRACE_FILE（默认 /tmp/pmo-trace.jsonl）：
+ *   { ts, trace, proc, session, span, at, ms, ...attrs }
+ * - trace：一次 hook 调用一个；投递给 daemon 时随消息带过去，daemon 里的 handle / linear / agent_spawn 沿用
+ * - at：span 开始时刻（进程启动后的毫秒数），ms：耗时
+ *
+ * 开销：span 只进内存缓冲，攒够 FLUSH_SPANS 条、每 FLUSH_INTERVAL_MS 或进程退出时一次 appendFileSync；
+ * 写前按大小轮转（.1 / .2），多进程同时轮转最多丢一段旧 trace
+ *
+ * hook 用法（见 content-bu/hooks/pmo-report-x.js）：
+ *   const trace = require('../../pmo/lib/tracing').hook('pmo-report-x');
+ *   const hookData = trace.parse(input);   // stdin_parse span，随后开始 match
+ *
+ * hook 固定记录的 span：
+ * - startup：进程启动到 hook() 调用（Node 启动 + require）
+ * - stdin_parse：JSON.parse
+ * - match：解析完到第一次投递（dispatch / agent_submit），没投递则到事件循环清空（matched: false）
+ * - hook：进程启动到事件循环清空，即 hook 给 session 增加的延迟
+ *
+ * 环境变量：
+ * - PMO_TRACE=0：关闭
+ * - PMO_TRACE_EVENTS=1：hook 结束时把本次 span 摘要写一行 pac.pmo_events（event_type = hook_trace，放在 metadata）
+ * - PMO_HOOK_CAPTURE=<file>：把 hook 收到的 stdin 按 bench/payloads.js 的格式录下来，供 bench/hook-replay.js 回放
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { AsyncLocalStorage } = require('async_hooks');
+const { performance } = require('perf_hooks');
+
+const ENABLED = process.env.PMO_TRACE !== '0';
+const TRACE_FILE = process.env.PMO_TRACE_FILE || '/tmp/pmo-trace.jsonl';
+const MAX_BYTES = Number(process.env.PMO_TRACE_MAX_BYTES) || 20 * 1024 * 1024;
+const KEEP_FILES = 2;
+const FLUSH_SPANS = 200;
+const FLUSH_INTERVAL_MS = 1000;
+const TRACE_EVENTS = process.env.PMO_TRACE_EVENTS === '1';
+const CAPTURE_FILE = process.env.PMO_HOOK_CAPTURE;
+
+// 进程级默认上下文（hook 进程只有一个 trace）；daemon 按消息用 AsyncLocalStorage 切换
+const defaults = {
+  trace: null,
+  proc: path.basename(process.argv[1] || 'node', '.js'),
+  session: null
+};
+const storage = new AsyncLocalStorage();
+
+// hook 进程的状态（hook() 调用后才有 name）
+const hookState = {
+  name: null,
+  match: null,
+  matched: false,
+  bu: null,
+  spans: [],
+  finished: false
+};
+
+const buffer = [];
+let flushTimer = null;
+let exitHooked = false;
+
+function newTraceId() {
+  return crypto.randomBytes(8).toString('hex');
+}
+
+/**
+ * 当前上下文：{ trace, proc, session }
+ */
+function context() {
+  const scoped = storage.getStore();
+  return scoped ? { ...defaults, ...scoped } : defaults;
+}
+
+/**
+ * 在指定 trace 下运行 fn（daemon 处理 hook 投递的消息时用）
+ * @param {?{trace?: string, session?: string}} scope
+ */
+function withContext(scope, fn) {
+  if (!scope) return fn();
+  return storage.run(scope, fn);
+}
+
+function rotate() {
+  let size = 0;
+  try { size = fs.statSync(TRACE_FILE).size; } catch (e) { return; }
+  if (size < MAX_BYTES) return;
+  try {
+    for (let i = KEEP_FILES - 1; i >= 1; i--) {
+      try { fs.renameSync(`${TRACE_FILE}.${i}`, `${TRACE_FILE}.${i + 1}`); } catch (e) { /* 还没有这一段 */ }
+    }
+    fs.renameSync(TRACE_FILE, `${TRACE_FILE}.1`);
+  } catch (e) {
+    // 另一个进程刚轮转过
+  }
+}
+
+/**
+ * 把缓冲的 span 写盘（同步，可在 exit 里调用）
+ */
+function flush() {
+  clearTimeout(flushTimer);
+  flushTimer = null;
+  if (buffer.length === 0) return;
+  const lines = buffer.splice(0).join('\n') + '\n';
+  try {
+    rotate();
+    fs.appendFileSync(TRACE_FILE, lines);
+  } catch (e) {
+    // trace 写失败不影响 hook
+  }
+}
+
+function write(record) {
+  buffer.push(JSON.stringify(record));
+  if (TRACE_EVENTS && hookState.name) hookState.spans.push(record);
+  if (!exitHooked) {
+    exitHooked = true;
+    process.on('exit', flush);
+  }
+  if (buffer.length >= FLUSH_SPANS) flush();
+  else if (!flushTimer) {
+    flushTimer = setTimeout(flush, FLUSH_INTERVAL_MS);
+    flushTimer.unref();
+  }
+}
+
+function writeSpan(ctx, name, at, ms, fields) {
+  write({
+    ts: new Date().toISOString(),
+    trace: ctx.trace,
+    proc: ctx.proc,
+    session: ctx.session,
+    span: name,
+    at: +at.toFixed(2),
+    ms: +ms.toFixed(2),
+    ...fields
+  });
+}
+
+const NOOP_SPAN = { end() { return 0; }, set() { return NOOP_SPAN; } };
+
+/**
+ * 开始一个 span
+ * @param {string} name
+ * @param {Object} [attrs] - 附加字段；trace / session 可覆盖上下文
+ * @returns {{end: function(Object=): number, set: function(Object): Object}} end 返回耗时（ms）
+ */
+function startSpan(name, attrs = {}) {
+  if (!ENABLED) return NOOP_SPAN;
+  const ctx = context();
+  const start = performance.now();
+  const fields = { ...attrs };
+  let ended = false;
+
+  const span = {
+    set(more) {
+      Object.assign(fields, more);
+      return span;
+    },
+    end(more) {
+      const ms = performance.now() - start;
+      if (ended) return ms;
+      ended = true;
+      if (more) Object.assign(fields, more);
+      writeSpan(ctx, name, start, ms, fields);
+      return ms;
+    }
+  };
+  return span;
+}
+
+/**
+ * 用 span 包住 fn（同步或 async 均可），抛错时记 error 字段后原样抛出
+ * fn 收到 span，可用 span.set() 补充结果字段
+ */
+function wrap(name, attrs, fn) {
+  const span = startSpan(name, attrs);
+  let result;
+  try {
+    result = fn(span);
+  } catch (e) {
+    span.end({ error: e.message });
+    throw e;
+  }
+  if (result && typeof result.then === 'function') {
+    return result.then(
+      (value) => { span.end(); return value; },
+      (e) => { span.end({ error: e.message }); throw e; }
+    );
+  }
+  span.end();
+  return result;
+}
+
+// ============================================
+// Hook 进程
+// ============================================
+
+/**
+ * 投递前调用（client.js 的 dispatchEvent / submitAgentJob）：结束 match 阶段
+ */
+function matched(attrs = {}) {
+  if (attrs.bu && !hookState.bu) hookState.bu = attrs.bu;
+  if (!hookState.match) return;
+  hookState.matched = true;
+  hookState.match.end({ matched: true, ...attrs });
+  hookState.match = null;
+}
+
+/**
+ * 事件循环清空时结束 hook span；需要写 pmo_events 时再异步 flush 一次（之后会再次触发 beforeExit）
+ */
+function finishHook() {
+  if (hookState.finished) return;
+  hookState.finished = true;
+  if (hookState.match) {
+    hookState.match.end({ matched: false });
+    hookState.match = null;
+  }
+  // hook span 从进程启动算起
+  const ctx = context();
+  const ms = performance.now();
+  writeSpan(ctx, 'hook', 0, ms, { matched: hookState.matched });
+  flush();
+  if (!TRACE_EVENTS) return;
+
+  const pmoEvents = require('./pmo-events');
+  pmoEvents.record({
+    session_id: ctx.session || 'unknown',
+    event_type: 'hook_trace',
+    bu: hookState.bu,
+    metadata: {
+      hook: hookState.name,
+      trace: ctx.trace,
+      ms: +ms.toFixed(2),
+      matched: hookState.matched,
+      spans: hookState.spans.map(({ span, at, ms, ts, trace, proc, session, ...attrs }) => ({ span, at, ms, ...attrs }))
+    }
+  });
+  pmoEvents.flush().catch(() => {});
+}
+
+/**
+ * 声明当前进程是一次 hook 调用：生成 trace，记录 startup，退出前记录 hook 总耗时
+ * @param {string} name - hook 名（与 bench/hook-replay.js 的 HOOKS 一致）
+ */
+function hook(name) {
+  hookState.name = name;
+  defaults.proc = name;
+  defaults.trace = newTraceId();
+
+  if (ENABLED) {
+    writeSpan(defaults, 'startup', 0, performance.now(), {});
+    process.on('beforeExit', finishHook);
+  }
+
+  return {
+    /**
+     * 解析 stdin（失败照常抛出），记录 session 并开始 match 阶段
+     */
+    parse(text) {
+      const span = startSpan('stdin_parse', { bytes: text.length });
+      let input;
+      try {
+        input = JSON.parse(text);
+      } catch (e) {
+        span.end({ error: e.message });
+        throw e;
+      }
+      if (input?.session_id) defaults.session = input.session_id;
+      span.end({ session: defaults.session });
+      if (CAPTURE_FILE) {
+        try { fs.appendFileSync(CAPTURE_FILE, JSON.stringify({ hook: name, input }) + '\n'); } catch (e) { /* 录制失败不影响 hook */ }
+      }
+      hookState.match = startSpan('match');
+      return input;
+    },
+    span: wrap
+  };
+}
+
+module.exports = {
+  TRACE_FILE,
+  hook,
+  context,
+  withContext,
+  startSpan,
+  wrap,
+  matched,
+  flush
+};
@@ -0,0 +1,86 @@
+/**
+ * Transcript Pool - 多个 transcript 的摘要提取分摊到 worker 线程
+ *
+ * Session Scanner 每轮可能有几十个 transcript 有新内容，逐个读是串行 IO + 串行解析；
+ * 这里按 transcript 分发给固定数量的 worker，每个 worker 各自读写对应的 checkpoint
+ *
+ * 用法：
+ *   const results = await summarizeMany(paths, { concurrency: 4 });
+ *   results.get(path) // => { extracted, bytesRead } 或 { error }
+ */
+
+const os = require('os');
+const { Worker, isMainThread, parentPort, workerData } = require('worker_threads');
+const { summarizeTranscript } = require('./transcript-summary');
+
+const WORKER_TAG = 'pmo-transcript-pool';
+
+const DEFAULT_CONCURRENCY = Number(process.env.PMO_SCANNER_WORKERS)
+  || Math.max(1, Math.min(4, os.cpus().length));
+
+/**
+ * @param {string[]} transcriptPaths
+ * @param {Object} [options]
+ * @param {number} [options.concurrency] - worker 数量（不超过 transcript 数）
+ * @param {boolean} [options.checkpoint=true]
+ * @returns {Promise<Map<string, {extracted: ?Object, bytesRead: number} | {error: string}>>}
+ */
+async function summarizeMany(transcriptPaths, options = {}) {
+  const results = new Map();
+  const queue = [...transcriptPaths];
+  const size = Math.min(options.concurrency || DEFAULT_CONCURRENCY, queue.length);
+  if (size === 0) return results;
+
+  const runWorker = () => new Promise((resolve) => {
+    const worker = new Worker(__filename, { workerData: WORKER_TAG });
+    let current = null;
+
+    const next = () => {
+      current = queue.shift();
+      if (current === undefined) {
+        worker.terminate().then(() => resolve());
+        return;
+      }
+      worker.postMessage({ transcriptPath: current, checkpoint: options.checkpoint });
+    };
+
+    worker.on('message', (message) => {
+      results.set(current, message);
+      next();
+    });
+    // worker 崩溃：当前 transcript 记为失败，剩下的交给其他 worker（或这里串行兜底）
+    worker.on('error', (err) => {
+      if (current !== undefined && current !== null) results.set(current, { error: err.message });
+      current = undefined;
+      resolve();
+    });
+
+    next();
+  });
+
+  await Promise.all(Array.from({ length: size }, runWorker));
+
+  // 所有 worker 都异常退出时剩下的 transcript 在主线程处理
+  for (const transcriptPath of queue.splice(0)) {
+    results.set(transcriptPath, runOne({ transcriptPath, checkpoint: options.checkpoint }));
+  }
+  return results;
+}
+
+function runOne({ transcriptPath, checkpoint }) {
+  try {
+    const { extracted, bytesRead } = summarizeTranscript(transcriptPath, { checkpoint });
+    return { extracted, bytesRead };
+  } catch (err) {
+    return { error: err.message };
+  }
+}
+
+if (!isMainThread && workerData === WORKER_TAG) {
+  parentPort.on('message', (task) => parentPort.postMessage(runOne(task)));
+}
+
+module.exports = {
+  DEFAULT_CONCURRENCY,
+  summarizeMany
+};
@@ -0,0 +1,443 @@
+/**
+ * Transcript Summary - 从 Claude Code transcript 提取分层 session 摘要
+ *
+ * 供 pmo-session-end.js、Session Scanner 与压测 / 回放脚本共用
+ *
+ * 提取策略（分层，用户优先）：
+ * 1. 全量扫描用户消息（短，代表意图；tool_result 也是 user 行，同样计入）
+ * 2. 提取工具调用名称（代表做了什么）
+ * 3. 只取最后一条 assistant 文本（通常是总结）
+ * 4. 提取 tool_use 的 file_path 与 Bash 重定向路径（代表产出物）；其中 Write / Edit 类工具的目标
+ *    和 Bash 重定向另记为 outputs，供分类器判断 session 是否真有产出（Read 的路径不算）
+ *
+ * 流式读取：
+ * - 按块读取、逐行处理，内存只和单行长度有关，与 transcript 大小无关
+ * - 解析前先按原始字节判断类型：只有 user / assistant 行会被 JSON.parse；
+ *   用户消息填满摘要上限后，tool_result（工具返回，通常是最大的行）只计数不解析
+ * - 超过 MAX_LINE_BYTES 的行不缓存，只保留行首用于识别类型、消息开头和文件路径
+ *
+ * 断点续读：
+ * 每个 transcript 一个 checkpoint（~/.claude/pmo/transcripts/），记录已处理的字节偏移 + 摘要中间状态，
+ * Scanner 每 5 分钟扫一遍、session 结束时再读一次，都只处理新追加的部分
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { threadId } = require('worker_threads');
+
+const CHECKPOINT_DIR = process.env.PMO_TRANSCRIPT_CHECKPOINT_DIR
+  || path.join(os.homedir(), '.claude', 'pmo', 'transcripts');
+
+const CONFIG = {
+  MIN_TRANSCRIPT_LINES: 10,
+  USER_MSG_MAX_CHARS: 500,       // 每条用户消息最大字符
+  LAST_ASSISTANT_MAX_CHARS: 1500, // 最后一条 assistant 消息最大字符
+  TOTAL_SUMMARY_MAX_CHARS: 4000,  // 总摘要上限
+  MAX_FILES: 200,                 // 文件产出最多保留条数
+  CHUNK_BYTES: 1024 * 1024,       // 每次读取的块大小
+  MAX_LINE_BYTES: 8 * 1024 * 1024, // 超长行不缓存
+  LINE_HEAD_BYTES: 64 * 1024      // 超长行保留的行首
+};
+
+const CHECKPOINT_VERSION = 2;
+
+// 会写文件的工具（outputs 只收这些工具的目标路径和 Bash 重定向）
+const WRITE_TOOLS = new Set(['Write', 'Edit', 'MultiEdit', 'NotebookEdit']);
+
+// 原始字节层面的类型标记（transcript 由 JSON.stringify 写出，无多余空白）
+const MARK_USER = Buffer.from('"type":"user"');
+const MARK_ASSISTANT = Buffer.from('"type":"assistant"');
+const MARK_TOOL_RESULT = Buffer.from('"type":"tool_result"');
+const MARK_CONTENT = Buffer.from('"content":');
+const NEWLINE = 10;
+
+/**
+ * 从 assistant content 中提取 tool_use 名称
+ */
+function extractToolNames(content) {
+  if (!Array.isArray(content)) return [];
+  return content
+    .filter(c => c.type === 'tool_use')
+    .map(c => c.name)
+    .filter(Boolean);
+}
+
+/**
+ * 从 assistant content 中提取文本
+ */
+function extractAssistantText(content) {
+  if (typeof content === 'string') return content;
+  if (!Array.isArray(content)) return '';
+  return content
+    .filter(c => c.type === 'text')
+    .map(c => c.text)
+    .join(' ');
+}
+
+/**
+ * 从 tool_use 参数中提取文件路径
+ * @returns {{files: string[], outputs: string[]}} files 为全部路径，outputs 只含写入目标
+ */
+function extractFilePaths(content) {
+  const files = [];
+  const outputs = [];
+  if (!Array.isArray(content)) return { files, outputs };
+  for (const block of content) {
+    if (block.type !== 'tool_use') continue;
+    const input = block.input || {};
+    // Write/Edit tool 的 file_path
+    if (input.file_path) files.push(input.file_path);
+    if (WRITE_TOOLS.has(block.name)) {
+      const target = input.file_path || input.notebook_path;
+      if (target) outputs.push(target);
+    }
+    // Bash 中的输出路径（简单匹配）
+    if (input.command && />\s*\S+/.test(input.command)) {
+      const match = input.command.match(/>\s*(\S+)/);
+      if (match) {
+        files.push(match[1]);
+        outputs.push(match[1]);
+      }
+    }
+  }
+  return { files, outputs };
+}
+
+// ============ 摘要中间状态 ============
+
+/**
+ * 摘要中间状态（可 JSON 序列化，存进 checkpoint）
+ * userMessages 只保留到能填满摘要上限为止，后面的消息只计数
+ */
+function createState() {
+  return {
+    lines: 0,
+    turns: 0,
+    userCount: 0,
+    userChars: 0,
+    userMessages: [],
+    tools: [],
+    files: [],
+    outputs: [],
+    lastAssistantText: '',
+    cwd: null
+  };
+}
+
+function addUnique(list, value, limit = Infinity) {
+  if (list.length < limit && !list.includes(value)) list.push(value);
+}
+
+function userMessagesFull(state) {
+  return state.userChars >= CONFIG.TOTAL_SUMMARY_MAX_CHARS;
+}
+
+/**
+ * @param {string|Object[]} content - message.content；也可以是已序列化的文本
+ */
+function addUserMessage(state, content) {
+  state.turns++;
+  state.userCount++;
+  if (userMessagesFull(state)) return;
+  const text = typeof content === 'string' ? content : JSON.stringify(content);
+  const message = text.substring(0, CONFIG.USER_MSG_MAX_CHARS);
+  state.userMessages.push(message);
+  state.userChars += message.length;
+}
+
+function addAssistant(state, content) {
+  // 工具调用名称 / 文件路径（累积全量）
+  for (const name of extractToolNames(content)) addUnique(state.tools, name);
+  const { files, outputs } = extractFilePaths(content);
+  for (const p of files) addUnique(state.files, p, CONFIG.MAX_FILES);
+  for (const p of outputs) addUnique(state.outputs, p, CONFIG.MAX_FILES);
+  // 文本（只保留最后一条）
+  const text = extractAssistantText(content);
+  if (text.trim()) state.lastAssistantText = text.substring(0, CONFIG.LAST_ASSISTANT_MAX_CHARS);
+}
+
+/**
+ * 处理一行（Buffer）：先按字节判断类型，只解析需要的行
+ */
+function feedLine(state, line) {
+  if (line.length === 0) return;
+  state.lines++;
+
+  const isUser = line.includes(MARK_USER);
+  const isAssistant = !isUser && line.includes(MARK_ASSISTANT);
+  if (!isUser && !isAssistant) return;
+
+  // 工具返回：用户消息已填满摘要上限时只计数，不解析（通常是最大的行）
+  if (isUser && userMessagesFull(state) && line.includes(MARK_TOOL_RESULT)) {
+    state.turns++;
+    state.userCount++;
+    return;
+  }
+
+  let entry;
+  try { entry = JSON.parse(line.toString('utf8')); } catch (e) { return; }
+  if (!state.cwd && entry.cwd) state.cwd = entry.cwd;
+
+  if (entry.type === 'user' && entry.message?.content) {
+    addUserMessage(state, entry.message.content);
+  }
+  if (entry.type === 'assistant' && entry.message?.content) {
+    addAssistant(state, entry.message.content);
+  }
+}
+
+/**
+ * 超长行只看行首：用户消息取 content 开头（transcript 是紧凑 JSON，与序列化结果一致）；
+ * Write 之类大块 tool_use 取出工具名和 file_path
+ */
+function feedOversizedLine(state, head) {
+  state.lines++;
+  if (head.includes(MARK_USER)) {
+    const at = head.indexOf(MARK_CONTENT);
+    if (at !== -1) {
+      const start = at + MARK_CONTENT.length;
+      const raw = head.subarray(start, start + CONFIG.USER_MSG_MAX_CHARS * 4).toString('utf8').replace(/\uFFFD+$/, '');
+      // 字符串 content 去掉开头的引号，与解析后的文本对齐
+      addUserMessage(state, raw.startsWith('"') ? raw.substring(1) : raw);
+    }
+    return;
+  }
+  if (!head.includes(MARK_ASSISTANT)) return;
+
+  const text = head.toString('utf8');
+  const toolUse = /"type":"tool_use","id":"[^"]*","name":"([^"]+)","input":\{"(file_path|notebook_path)":"((?:[^"\\]|\\.)*)"/g;
+  let match;
+  while ((match = toolUse.exec(text))) {
+    addUnique(state.tools, match[1]);
+    const target = JSON.parse(`"${match[3]}"`);
+    if (match[2] === 'file_path') addUnique(state.files, target, CONFIG.MAX_FILES);
+    if (WRITE_TOOLS.has(match[1])) addUnique(state.outputs, target, CONFIG.MAX_FILES);
+  }
+}
+
+/**
+ * 从 offset 开始流式读取，只处理完整的行
+ * @returns {{offset: number, tail: ?Buffer}} 新的偏移（最后一个换行之后）和末尾未写完的行
+ */
+function readFrom(transcriptPath, state, offset) {
+  const fd = fs.openSync(transcriptPath, 'r');
+  const chunk = Buffer.allocUnsafe(CONFIG.CHUNK_BYTES);
+  let position = offset;
+  let consumed = offset;
+  let pending = [];
+  let pendingBytes = 0;
+  let oversizedHead = null;
+
+  try {
+    let bytesRead;
+    while ((bytesRead = fs.readSync(fd, chunk, 0, CONFIG.CHUNK_BYTES, position)) > 0) {
+      const view = chunk.subarray(0, bytesRead);
+      let start = 0;
+      let newline;
+      while ((newline = view.indexOf(NEWLINE, start)) !== -1) {
+        const piece = view.subarray(start, newline);
+        if (oversizedHead) {
+          feedOversizedLine(state, oversizedHead);
+        } else {
+          feedLine(state, pending.length ? Buffer.concat([...pending, piece]) : piece);
+        }
+        pending = [];
+        pendingBytes = 0;
+        oversizedHead = null;
+        start = newline + 1;
+        consumed = position + start;
+      }
+
+      // 块末尾的半行：复制出来（chunk 会被复用），过长则只留行首
+      if (start < bytesRead && !oversizedHead) {
+        pending.push(Buffer.from(view.subarray(start)));
+        pendingBytes += bytesRead - start;
+        if (pendingBytes > CONFIG.MAX_LINE_BYTES) {
+          oversizedHead = Buffer.concat(pending).subarray(0, CONFIG.LINE_HEAD_BYTES);
+          pending = [];
+        }
+      }
+      position += bytesRead;
+    }
+  } finally {
+    fs.closeSync(fd);
+  }
+
+  return { offset: consumed, tail: oversizedHead ? null : (pending.length ? Buffer.concat(pending) : null) };
+}
+
+/**
+ * 由中间状态组装结构化摘要
+ * @returns {?{summary: string, intent: string, tools: string[], files: string[], outputs: string[], cwd: ?string}}
+ */
+function buildSummary(state) {
+  if (state.lines < CONFIG.MIN_TRANSCRIPT_LINES) return null;
+  if (state.userCount === 0) return null;
+
+  const sections = [];
+
+  sections.push(`## 用户消息（${state.userCount} 条，共 ${state.turns} 轮）`);
+  sections.push(state.userMessages.map((m, i) => `${i + 1}. ${m}`).join('\n'));
+
+  if (state.tools.length > 0) {
+    sections.push(`## 使用的工具（${state.tools.length} 种）`);
+    sections.push(state.tools.join(', '));
+  }
+
+  if (state.files.length > 0) {
+    sections.push(`## 文件产出（${state.files.length} 个）`);
+    sections.push(state.files.slice(0, 20).join('\n'));
+  }
+
+  if (state.lastAssistantText) {
+    sections.push('## AI 最后回复（通常是总结）');
+    sections.push(state.lastAssistantText);
+  }
+
+  const summary = sections.join('\n\n');
+  return {
+    summary: summary.substring(0, CONFIG.TOTAL_SUMMARY_MAX_CHARS),
+    intent: state.userMessages[0],
+    tools: [...state.tools],
+    files: [...state.files],
+    outputs: [...state.outputs],
+    cwd: state.cwd
+  };
+}
+
+// ============ Checkpoint ============
+
+function checkpointFile(transcriptPath) {
+  const key = crypto.createHash('sha1').update(path.resolve(transcriptPath)).digest('hex').substring(0, 16);
+  return path.join(CHECKPOINT_DIR, `${key}.json`);
+}
+
+/**
+ * 读取 checkpoint；文件被替换（inode 变化）或截断时视为无效
+ */
+function readCheckpoint(transcriptPath, stat) {
+  try {
+    const checkpoint = JSON.parse(fs.readFileSync(checkpointFile(transcriptPath), 'utf8'));
+    if (checkpoint.version !== CHECKPOINT_VERSION) return null;
+    if (stat && (checkpoint.ino !== stat.ino || checkpoint.offset > stat.size)) return null;
+    return checkpoint;
+  } catch (e) {
+    return null;
+  }
+}
+
+function writeCheckpoint(transcriptPath, checkpoint) {
+  try {
+    const file = checkpointFile(transcriptPath);
+    fs.mkdirSync(CHECKPOINT_DIR, { recursive: true });
+    const tmpFile = `${file}.${process.pid}.${threadId}.tmp`;
+    fs.writeFileSync(tmpFile, JSON.stringify(checkpoint));
+    fs.renameSync(tmpFile, file);
+  } catch (e) {
+    console.error('transcript checkpoint save error:', e.message);
+  }
+}
+
+/**
+ * 记录该 transcript 已上报（session-end hook / Scanner 共用，避免重复上报）
+ */
+function markReported(transcriptPath, outcome) {
+  const checkpoint = readCheckpoint(transcriptPath);
+  if (!checkpoint) return;
+  checkpoint.reportedAt = new Date().toISOString();
+  checkpoint.reportedOffset = checkpoint.offset;
+  checkpoint.reportOutcome = outcome;
+  writeCheckpoint(transcriptPath, checkpoint);
+}
+
+/**
+ * 清理 transcript 已不存在或长期未更新的 checkpoint
+ * @returns {number} 删除的数量
+ */
+function pruneCheckpoints(maxAgeMs) {
+  let removed = 0;
+  let names = [];
+  try { names = fs.readdirSync(CHECKPOINT_DIR); } catch (e) { return 0; }
+  for (const name of names.filter(n => n.endsWith('.json'))) {
+    const file = path.join(CHECKPOINT_DIR, name);
+    try {
+      const checkpoint = JSON.parse(fs.readFileSync(file, 'utf8'));
+      const stale = Date.now() - new Date(checkpoint.updatedAt).getTime() > maxAgeMs;
+      if (stale || !fs.existsSync(checkpoint.path)) {
+        fs.rmSync(file, { force: true });
+        removed++;
+      }
+    } catch (e) {
+      fs.rmSync(file, { force: true });
+      removed++;
+    }
+  }
+  return removed;
+}
+
+/**
+ * 分层提取 session 摘要（流式 + 断点续读）
+ *
+ * @param {string} transcriptPath
+ * @param {Object} [options]
+ * @param {boolean} [options.checkpoint=true] - 是否读写 checkpoint
+ * @returns {?{summary: string, intent: string, tools: string[], files: string[], outputs: string[], cwd: ?string}}
+ *   summary 给 PMO Agent；intent（首条用户消息）/ tools / files / outputs 给规则分类器
+ */
+function extractStructuredSummary(transcriptPath, options = {}) {
+  return summarizeTranscript(transcriptPath, options).extracted;
+}
+
+/**
+ * 同 extractStructuredSummary，额外返回本次读取的字节数和 checkpoint
+ * @returns {{extracted: ?Object, bytesRead: number, checkpoint: ?Object}}
+ */
+function summarizeTranscript(transcriptPath, options = {}) {
+  const useCheckpoint = options.checkpoint !== false;
+  let stat;
+  try { stat = fs.statSync(transcriptPath); } catch (e) { return { extracted: null, bytesRead: 0, checkpoint: null }; }
+
+  const previous = useCheckpoint ? readCheckpoint(transcriptPath, stat) : null;
+  const state = previous ? previous.state : createState();
+  const startOffset = previous ? previous.offset : 0;
+
+  const { offset, tail } = stat.size > startOffset
+    ? readFrom(transcriptPath, state, startOffset)
+    : { offset: startOffset, tail: null };
+
+  let checkpoint = previous;
+  if (useCheckpoint && (!previous || offset !== previous.offset)) {
+    checkpoint = {
+      ...previous,
+      version: CHECKPOINT_VERSION,
+      path: path.resolve(transcriptPath),
+      ino: stat.ino,
+      offset,
+      mtimeMs: stat.mtimeMs,
+      updatedAt: new Date().toISOString(),
+      state
+    };
+    writeCheckpoint(transcriptPath, checkpoint);
+  }
+
+  // 末尾未写完换行的行不进 checkpoint，但算进本次摘要
+  let view = state;
+  if (tail) {
+    view = JSON.parse(JSON.stringify(state));
+    feedLine(view, tail);
+  }
+
+  return { extracted: buildSummary(view), bytesRead: stat.size - startOffset, checkpoint };
+}
+
+module.exports = {
+  CONFIG,
+  CHECKPOINT_DIR,
+  extractStructuredSummary,
+  summarizeTranscript,
+  readCheckpoint,
+  markReported,
+  pruneCheckpoints
+};
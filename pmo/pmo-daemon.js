@@ -0,0 +1,173 @@
+#!/usr/bin/env node
+/**
+ * PMO Daemon - 常驻事件处理进程
+ *
+ * 启动方式：LaunchAgent 常驻（见 README），或手动 node pmo-daemon.js
+ * 职责：在 Unix socket 上接收 hook 投递的事件，由同一个热进程执行 handleEvent；
+ *       托管 PMO Agent 调度队列（并发上限 + 防抖合并 + 优先级）
+ *
+ * 省掉的开销（每次工具调用）：
+ * 1. hook 进程 require handler.js
+ * 2. curl 子进程 + /tmp 临时 payload 文件
+ * 3. 每次新建 TLS 连接（handler.js 使用 keep-alive 连接池）
+ * 4. 每个写操作一次往返（写操作进 spool，由后台 flusher 合并批量提交）
+ *
+ * 协议：每行一个 JSON
+ *   → { op: 'event', event, wait?, trace? }   ← { result: 'queued' } 或 wait 时返回 handleEvent 结果
+ *   → { op: 'ping' }                  ← { result: 'pong', pid }
+ *   → { op: 'stats' }                 ← 计数器（含 spool）
+ *   → { op: 'flush' }                 ← 立即提交 spool，返回 flush 摘要
+ *   → { op: 'agent', job }            ← { result: 'scheduled', id, merged }
+ *
+ * trace 为 hook 侧的 { trace, session }，该事件的 handle / linear span 记在同一个 trace 下
+ */
+
+const fs = require('fs');
+const net = require('net');
+const { handleEvent } = require('./lib/handler');
+const { SOCKET_PATH } = require('./lib/client');
+const spool = require('./lib/spool');
+const scheduler = require('./lib/agent-scheduler');
+const tracing = require('./lib/tracing');
+
+const LOG_FILE = process.env.PMO_DAEMON_LOG || '/tmp/pmo-daemon.log';
+
+const stats = {
+  startedAt: new Date().toISOString(),
+  received: 0,
+  processed: 0,
+  failed: 0,
+  inFlight: 0
+};
+
+// 同一 session 的事件串行处理，保证 superpower 阶段按到达顺序落到 Linear
+const sessionChains = new Map();
+
+function log(msg) {
+  fs.appendFileSync(LOG_FILE, `[${new Date().toISOString()}] ${msg}\n`);
+}
+
+function processEvent(event) {
+  const key = event.sessionId || 'unknown';
+  const prev = sessionChains.get(key) || Promise.resolve();
+
+  stats.inFlight++;
+  const run = prev.then(() => handleEvent(event)).then(
+    (result) => {
+      stats.processed++;
+      log(`${event.type} ${key} → ${result?.result}${result?.issue?.identifier ? ' ' + result.issue.identifier : ''}`);
+      return result;
+    },
+    (err) => {
+      stats.failed++;
+      log(`${event.type} ${key} failed: ${err.message}`);
+      return { result: 'error', error: err.message };
+    }
+  ).finally(() => {
+    stats.inFlight--;
+    if (sessionChains.get(key) === run) sessionChains.delete(key);
+  });
+
+  sessionChains.set(key, run);
+  return run;
+}
+
+async function handleMessage(message) {
+  switch (message.op) {
+    case 'event': {
+      if (!message.event?.type) return { result: 'error', error: 'Missing event.type' };
+      stats.received++;
+      const run = tracing.withContext(message.trace, () => processEvent(message.event));
+      return message.wait ? run : { result: 'queued' };
+    }
+    case 'ping':
+      return { result: 'pong', pid: process.pid };
+    case 'stats':
+      return { result: 'ok', ...stats, spool: spool.getStats(), agents: scheduler.getStats() };
+    case 'flush':
+      await Promise.allSettled([...sessionChains.values()]);
+      return { result: 'ok', ...(await spool.flush({ force: true })) };
+    case 'agent': {
+      if (!message.job?.kind) return { result: 'error', error: 'Missing job.kind' };
+      return { result: 'scheduled', ...scheduler.enqueue(message.job) };
+    }
+    default:
+      return { result: 'error', error: `Unknown op: ${message.op}` };
+  }
+}
+
+function handleConnection(socket) {
+  let buffer = '';
+  socket.setEncoding('utf8');
+  socket.on('data', (chunk) => {
+    buffer += chunk;
+    let newline;
+    while ((newline = buffer.indexOf('\n')) !== -1) {
+      const line = buffer.slice(0, newline);
+      buffer = buffer.slice(newline + 1);
+      if (!line.trim()) continue;
+
+      let message;
+      try { message = JSON.parse(line); }
+      catch (e) {
+        socket.write(JSON.stringify({ result: 'error', error: 'Invalid JSON' }) + '\n');
+        continue;
+      }
+
+      handleMessage(message).then((reply) => {
+        if (!socket.destroyed) socket.write(JSON.stringify(reply) + '\n');
+      });
+    }
+  });
+  socket.on('error', () => {});
+}
+
+/**
+ * 清理残留 socket 文件；若已有 daemon 在线则返回 false
+ */
+function claimSocket() {
+  return new Promise((resolve) => {
+    if (!fs.existsSync(SOCKET_PATH)) return resolve(true);
+    const probe = net.createConnection(SOCKET_PATH);
+    probe.on('connect', () => { probe.destroy(); resolve(false); });
+    probe.on('error', () => {
+      try { fs.unlinkSync(SOCKET_PATH); } catch (e) {}
+      resolve(true);
+    });
+  });
+}
+
+async function main() {
+  if (!(await claimSocket())) {
+    console.log(JSON.stringify({ result: 'skipped', reason: `PMO daemon already running on ${SOCKET_PATH}` }));
+    return;
+  }
+
+  const server = net.createServer(handleConnection);
+  server.listen(SOCKET_PATH, () => {
+    fs.chmodSync(SOCKET_PATH, 0o600);
+    log(`PMO daemon listening on ${SOCKET_PATH} (pid ${process.pid})`);
+    console.log(JSON.stringify({ result: 'listening', socket: SOCKET_PATH, pid: process.pid }));
+  });
+  spool.startFlusher();
+  scheduler.start();
+
+  const shutdown = async () => {
+    server.close();
+    await Promise.allSettled([...sessionChains.values()]);
+    scheduler.stop();
+    await spool.stopFlusher();
+    await spool.flush({ force: true });
+    try { fs.unlinkSync(SOCKET_PATH); } catch (e) {}
+    log(`PMO daemon stopped (processed ${stats.processed}, failed ${stats.failed})`);
+    process.exit(0);
+  };
+  process.on('SIGTERM', shutdown);
+  process.on('SIGINT', shutdown);
+}
+
+main().catch(err => {
+  log(`Fatal error: ${err.message}`);
+  console.log(JSON.stringify({ result: 'error', reason: err.message }));
+  process.exit(1);
+});
@@ -3,26 +3,22 @@
  * PMO Session End Hook
  *
  * 触发时机：SessionEnd
- * 职责：从 transcript 提取结构化摘要，spawn PMO Agent 创建 Linear Issue
+ * 职责：从 transcript 提取结构化摘要，提交 PMO Agent 任务创建 Linear Issue
  *
- * 提取策略（分层，用户优先）：
- * 1. 全量扫描用户消息（短，代表意图）
- * 2. 提取工具调用名称（代表做了什么）
- * 3. 只取最后一条 assistant 文本（通常是总结）
- * 4. 提取文件写入路径（代表产出物）
+ * 摘要提取见 lib/transcript-summary.js（分层，用户优先；流式读取，Scanner 已读过的部分直接用 checkpoint）
+ * 规则分类器高置信时直接跳过或由 handler 建 Issue，只有拿不准的 session 才启动 PMO Agent
+ *
+ * reportSession 也被 pmo-session-scanner.js 用来补报没有触发 SessionEnd 的 session
  */
 
 const fs = require('fs');
-const { spawn } = require('child_process');
-
-const CONFIG = {
-  MIN_TRANSCRIPT_LINES: 10,
-  USER_MSG_MAX_CHARS: 500,       // 每条用户消息最大字符
-  LAST_ASSISTANT_MAX_CHARS: 1500, // 最后一条 assistant 消息最大字符
-  TOTAL_SUMMARY_MAX_CHARS: 4000   // 总摘要上限
-};
+const { submitAgentJob, dispatchEvent } = require('./lib/client');
+const classifier = require('./lib/classifier');
+const { summarizeTranscript, markReported } = require('./lib/transcript-summary');
+const pmoEvents = require('./lib/pmo-events');
+const tracing = require('./lib/tracing');
 
-async function readInput() {
+async function readInput(trace) {
   return new Promise((resolve) => {
     let data = '';
     process.stdin.setEncoding('utf8');
@@ -31,151 +27,17 @@ async function readInput() {
       while ((chunk = process.stdin.read()) !== null) data += chunk;
     });
     process.stdin.on('end', () => {
-      try { resolve(JSON.parse(data)); }
+      try { resolve(trace.parse(data)); }
       catch (e) { resolve({}); }
     });
   });
 }
 
 /**
- * 从 assistant content 中提取 tool_use 名称
- */
-function extractToolNames(content) {
-  if (!Array.isArray(content)) return [];
-  return content
-    .filter(c => c.type === 'tool_use')
-    .map(c => c.name)
-    .filter(Boolean);
-}
-
-/**
- * 从 assistant content 中提取文本
- */
-function extractAssistantText(content) {
-  if (typeof content === 'string') return content;
-  if (!Array.isArray(content)) return '';
-  return content
-    .filter(c => c.type === 'text')
-    .map(c => c.text)
-    .join(' ');
-}
-
-/**
- * 从 tool_use 参数中提取文件路径
- */
-function extractFilePaths(content) {
-  if (!Array.isArray(content)) return [];
-  const paths = [];
-  for (const block of content) {
-    if (block.type !== 'tool_use') continue;
-    const input = block.input || {};
-    // Write/Edit tool 的 file_path
-    if (input.file_path) paths.push(input.file_path);
-    // Bash 中的输出路径（简单匹配）
-    if (input.command && />\s*\S+/.test(input.command)) {
-      const match = input.command.match(/>\s*(\S+)/);
-      if (match) paths.push(match[1]);
-    }
-  }
-  return paths;
-}
-
-/**
- * 分层提取 session 摘要
- *
- * 层级：
- * 1. ALL 用户消息（意图层）
- * 2. ALL 工具调用名称（行为层）
- * 3. 最后一条 assistant 文本消息（结果层）
- * 4. 文件写入路径（产出层）
- */
-function extractStructuredSummary(transcriptPath) {
-  if (!fs.existsSync(transcriptPath)) return null;
-
-  const content = fs.readFileSync(transcriptPath, 'utf8');
-  const lines = content.trim().split('\n');
-
-  if (lines.length < CONFIG.MIN_TRANSCRIPT_LINES) return null;
-
-  const userMessages = [];
-  const toolNames = new Set();
-  const filePaths = new Set();
-  let lastAssistantText = '';
-  let totalTurns = 0;
-
-  for (const line of lines) {
-    let entry;
-    try { entry = JSON.parse(line); } catch (e) { continue; }
-
-    if (entry.type === 'user' && entry.message?.content) {
-      totalTurns++;
-      const text = typeof entry.message.content === 'string'
-        ? entry.message.content
-        : JSON.stringify(entry.message.content);
-      userMessages.push(text.substring(0, CONFIG.USER_MSG_MAX_CHARS));
-    }
-
-    if (entry.type === 'assistant' && entry.message?.content) {
-      // 工具调用名称（累积全量）
-      for (const name of extractToolNames(entry.message.content)) {
-        toolNames.add(name);
-      }
-      // 文件路径（累积全量）
-      for (const p of extractFilePaths(entry.message.content)) {
-        filePaths.add(p);
-      }
-      // 文本（只保留最后一条）
-      const text = extractAssistantText(entry.message.content);
-      if (text.trim()) {
-        lastAssistantText = text;
-      }
-    }
-  }
-
-  if (userMessages.length === 0) return null;
-
-  // 组装结构化摘要
-  const sections = [];
-
-  sections.push(`## 用户消息（${userMessages.length} 条，共 ${totalTurns} 轮）`);
-  sections.push(userMessages.map((m, i) => `${i + 1}. ${m}`).join('\n'));
-
-  if (toolNames.size > 0) {
-    sections.push(`## 使用的工具（${toolNames.size} 种）`);
-    sections.push([...toolNames].join(', '));
-  }
-
-  if (filePaths.size > 0) {
-    sections.push(`## 文件产出（${filePaths.size} 个）`);
-    sections.push([...filePaths].slice(0, 20).join('\n'));
-  }
-
-  if (lastAssistantText) {
-    sections.push('## AI 最后回复（通常是总结）');
-    sections.push(lastAssistantText.substring(0, CONFIG.LAST_ASSISTANT_MAX_CHARS));
-  }
-
-  const summary = sections.join('\n\n');
-  return summary.substring(0, CONFIG.TOTAL_SUMMARY_MAX_CHARS);
-}
-
-function detectBu(cwd) {
-  if (!cwd) return 'unknown';
-  if (cwd.includes('product-bu')) return 'product';
-  if (cwd.includes('content-bu')) return 'content';
-  if (cwd.includes('investment-bu')) return 'investment';
-  if (cwd.includes('research-bu')) return 'research';
-  if (cwd.includes('pmo')) return 'pmo';
-  return 'unknown';
-}
-
-/**
- * 触发 PMO Agent 后台分析 session
- * 移除 ANTHROPIC_API_KEY，使用 Pro 订阅认证
+ * 提交 PMO Agent 任务后台分析 session
+ * session 总结优先级最低，排在发布 / 交易 / superpower 之后
  */
-function spawnPmoAgent(eventData) {
-  const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
-
+async function schedulePmoAgent(eventData) {
   const prompt = `处理 session_end 事件，根据 CLAUDE.md 规则判断是否需要创建 Linear Issue：
 
 事件数据：
@@ -185,46 +47,60 @@ ${JSON.stringify(eventData, null, 2)}
 1. 分析结构化摘要（用户消息=意图，工具=行为，最后回复=结果，文件=产出）
 2. 判断是否值得创建 Issue（纯聊天/咨询不需要，有实际产出的才需要）
 3. 如果值得，根据 BU 规则确定 Team、Project、Labels
-4. 调用 /api-linear skill 创建 Issue
+4. 调用 /api-linear skill 创建 Issue（description 第一行写 \`sessionId: ${eventData.sessionId}\`，session 恢复后据此追加）
 5. 如果有详细产出，用 doc-create 创建 Document 关联到 Issue`;
 
   try {
-    const child = spawn('claude', [
-      '--dangerously-skip-permissions',
-      '--print',
-      '-p', prompt
-    ], {
-      cwd: '/Users/liuyishou/usr/pac/pmo',
-      detached: true,
-      stdio: 'ignore',
-      env: cleanEnv
+    return await submitAgentJob({
+      kind: 'session_end',
+      bu: eventData.bu,
+      sessionId: eventData.sessionId,
+      prompt
     });
-
-    child.unref();
-    return true;
   } catch (err) {
-    return false;
+    return null;
   }
 }
 
-async function main() {
-  const input = await readInput();
+/**
+ * 对一个已提取摘要的 session 做分类并上报
+ * @param {{session_id: string, transcript_path: string, cwd: string, reason: string}} input
+ * @param {{summary: string, intent: string, tools: string[], files: string[], outputs: string[]}} extracted
+ * @param {?Object} [checkpoint] - transcript checkpoint；已上报过（reportedAt）说明 session 被恢复过
+ * @returns {Promise<Object>} hook 输出
+ */
+async function reportSession(input, extracted, checkpoint) {
   const { session_id, transcript_path, cwd, reason } = input;
-
-  if (!transcript_path || !fs.existsSync(transcript_path)) {
-    console.log(JSON.stringify({ result: 'skipped', reason: 'No transcript' }));
-    return;
+  const { summary, intent, tools, files, outputs } = extracted;
+  const verdict = classifier.classify({ eventType: 'session_end', cwd, tools, files, outputs, text: summary });
+  const bu = verdict.bu;
+
+  // 上报过又有新内容：追加到已有 Issue，不再建第二个（上次判定为跳过的除外，那时没有 Issue）
+  if (checkpoint?.reportedAt && checkpoint.reportOutcome !== 'skipped') {
+    const result = await dispatchEvent({
+      type: 'session_resume',
+      bu,
+      sessionId: session_id,
+      data: { intent, files, classification: verdict }
+    });
+    return { result: 'appended_to_issue', outcome: result?.result, session_id, bu };
   }
 
-  const summary = extractStructuredSummary(transcript_path);
-  if (!summary) {
-    console.log(JSON.stringify({ result: 'skipped', reason: 'Transcript too short or empty' }));
-    return;
+  // 快速路径：规则能高置信判断时不启动 PMO Agent
+  if (!verdict.spawnAgent && verdict.decision === 'skip') {
+    return { result: 'skipped', reason: `rules: ${verdict.rule}`, session_id, bu };
+  }
+  if (!verdict.spawnAgent && verdict.decision === 'report') {
+    const result = await dispatchEvent({
+      type: 'session_report',
+      bu,
+      sessionId: session_id,
+      data: { intent, tools, files, cwd, classification: verdict }
+    });
+    return { result: 'reported_by_rules', outcome: result?.result, session_id, bu };
   }
 
-  const bu = detectBu(cwd);
-
-  const agentSpawned = spawnPmoAgent({
+  const scheduled = await schedulePmoAgent({
     type: 'session_end',
     bu,
     sessionId: session_id,
@@ -232,17 +108,57 @@ async function main() {
       summary,
       cwd,
       transcript_path,
-      reason
+      reason,
+      // 规则分类的初步结论（置信度不足），供 Agent 参考
+      rulesHint: { project: verdict.project, labels: verdict.labels, confidence: verdict.confidence }
     }
   });
 
-  console.log(JSON.stringify({
-    result: agentSpawned ? 'agent_spawned' : 'spawn_failed',
+  return {
+    result: scheduled ? 'agent_scheduled' : 'schedule_failed',
     session_id,
     bu
-  }));
+  };
 }
 
-main().catch(err => {
-  console.log(JSON.stringify({ result: 'error', reason: err.message }));
-});
+async function main() {
+  // hook span 只在作为 hook 运行时记录（Scanner 也 require 本文件）
+  const trace = tracing.hook('pmo-session-end');
+  const input = await readInput(trace);
+  const { transcript_path } = input;
+
+  if (!transcript_path || !fs.existsSync(transcript_path)) {
+    console.log(JSON.stringify({ result: 'skipped', reason: 'No transcript' }));
+    return;
+  }
+
+  const { extracted, checkpoint } = trace.span('summarize', {}, () => summarizeTranscript(transcript_path));
+  if (!extracted) {
+    console.log(JSON.stringify({ result: 'skipped', reason: 'Transcript too short or empty' }));
+    return;
+  }
+
+  // 已经上报过、之后没有新内容
+  if (checkpoint?.reportedAt && checkpoint.reportedOffset === checkpoint.offset) {
+    console.log(JSON.stringify({ result: 'skipped', reason: `Already reported at ${checkpoint.reportedAt}` }));
+    return;
+  }
+
+  const output = await reportSession(input, extracted, checkpoint);
+  // 提交失败留给 Scanner 重试
+  if (output.result !== 'schedule_failed') markReported(transcript_path, output.result);
+  console.log(JSON.stringify(output));
+
+  pmoEvents.recordSessionOutcome({ ...input, summary: extracted.summary }, output, 'hook');
+  await pmoEvents.flush();
+}
+
+if (require.main === module) {
+  main().catch(err => {
+    console.log(JSON.stringify({ result: 'error', reason: err.message }));
+  });
+}
+
+module.exports = {
+  reportSession
+};
@@ -0,0 +1,128 @@
+#!/usr/bin/env node
+/**
+ * PMO Session Scanner - 兜底扫描 Claude Code transcript
+ *
+ * 触发时机：每 5 分钟（LaunchAgent / cron），也可手动 node pmo-session-scanner.js
+ * 职责：
+ * 1. 找出最近有更新的 transcript，交给 worker 池流式提取摘要（只读新追加的字节，进度存 checkpoint）
+ * 2. 闲置超过 IDLE_MINUTES 且没有上报过的 session（SessionEnd hook 没触发，如终端被直接关掉），
+ *    按 pmo-session-end 的同一套逻辑补报；上报后又恢复过的 session 追加到已有 Issue
+ *
+ * 3. 补报结果攒成一批写入 pac.pmo_events（多行 INSERT），顺带确保未来月份的分区已建好
+ *
+ * 进行中的 session 每轮只增量读几 KB，session 结束时 hook 拿到的基本是现成的摘要
+ */
+
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { summarizeMany } = require('./lib/transcript-pool');
+const { summarizeTranscript, readCheckpoint, markReported, pruneCheckpoints } = require('./lib/transcript-summary');
+const { reportSession } = require('./pmo-session-end');
+const pmoEvents = require('./lib/pmo-events');
+
+const CONFIG = {
+  PROJECTS_DIR: process.env.PMO_TRANSCRIPTS_DIR || path.join(os.homedir(), '.claude', 'projects'),
+  LOOKBACK_HOURS: Number(process.env.PMO_SCANNER_LOOKBACK_HOURS) || 24,  // 只看最近更新过的 transcript
+  IDLE_MINUTES: Number(process.env.PMO_SCANNER_IDLE_MINUTES) || 30,      // 闲置多久算 session 已结束
+  CHECKPOINT_MAX_AGE_DAYS: 30
+};
+
+const LOG_FILE = process.env.PMO_SCANNER_LOG || '/tmp/pmo-session-scanner.log';
+
+function log(msg) {
+  const timestamp = new Date().toISOString();
+  fs.appendFileSync(LOG_FILE, `[${timestamp}] ${msg}\n`);
+}
+
+/**
+ * 列出最近更新过的 transcript：~/.claude/projects/<project>/<sessionId>.jsonl
+ */
+function listTranscripts(since) {
+  const transcripts = [];
+  let projects = [];
+  try { projects = fs.readdirSync(CONFIG.PROJECTS_DIR, { withFileTypes: true }); } catch (e) { return transcripts; }
+
+  for (const project of projects.filter(d => d.isDirectory())) {
+    const dir = path.join(CONFIG.PROJECTS_DIR, project.name);
+    let names = [];
+    try { names = fs.readdirSync(dir); } catch (e) { continue; }
+    for (const name of names.filter(n => n.endsWith('.jsonl'))) {
+      const file = path.join(dir, name);
+      try {
+        const stat = fs.statSync(file);
+        if (stat.mtimeMs >= since) transcripts.push({ path: file, sessionId: path.basename(name, '.jsonl'), stat });
+      } catch (e) {
+        continue;
+      }
+    }
+  }
+  return transcripts;
+}
+
+async function scan() {
+  const started = Date.now();
+  const transcripts = listTranscripts(started - CONFIG.LOOKBACK_HOURS * 3600 * 1000);
+
+  // 和 checkpoint 对比，没有新字节的不用进 worker
+  const changed = transcripts.filter(t => readCheckpoint(t.path, t.stat)?.offset !== t.stat.size);
+  const results = await summarizeMany(changed.map(t => t.path));
+
+  let bytesRead = 0;
+  for (const [file, result] of results) {
+    if (result.error) log(`Summarize error ${file}: ${result.error}`);
+    else bytesRead += result.bytesRead;
+  }
+
+  // 补报：闲置够久、上报后还有新内容（没上报过的 reportedOffset 为空）
+  const idleBefore = started - CONFIG.IDLE_MINUTES * 60 * 1000;
+  const outcomes = [];
+  for (const t of transcripts.filter(t => t.stat.mtimeMs < idleBefore)) {
+    const checkpoint = readCheckpoint(t.path, t.stat);
+    if (checkpoint?.reportedAt && checkpoint.reportedOffset === checkpoint.offset) continue;
+
+    // 本轮没变化的 transcript 直接从 checkpoint 组装摘要
+    const result = results.get(t.path);
+    const extracted = result && !result.error ? result.extracted : summarizeTranscript(t.path).extracted;
+    if (!extracted) continue;
+
+    const input = {
+      session_id: t.sessionId,
+      transcript_path: t.path,
+      cwd: extracted.cwd,
+      reason: 'scanner'
+    };
+    const output = await reportSession(input, extracted, checkpoint);
+    if (output.result !== 'schedule_failed') {
+      markReported(t.path, output.result);
+    }
+    pmoEvents.recordSessionOutcome({ ...input, summary: extracted.summary }, output, 'scanner');
+    outcomes.push(output);
+    log(`Backfill ${t.sessionId}: ${JSON.stringify(output)}`);
+  }
+
+  const events = await pmoEvents.flush({ ensurePartitions: true });
+  const pruned = pruneCheckpoints(CONFIG.CHECKPOINT_MAX_AGE_DAYS * 24 * 3600 * 1000);
+
+  return {
+    result: 'scanned',
+    transcripts: transcripts.length,
+    changed: changed.length,
+    bytesRead,
+    backfilled: outcomes.length,
+    events,
+    pruned,
+    ms: Date.now() - started
+  };
+}
+
+scan().then(
+  (summary) => {
+    log(JSON.stringify(summary));
+    console.log(JSON.stringify(summary));
+  },
+  (err) => {
+    log(`Error: ${err.message}`);
+    console.log(JSON.stringify({ result: 'error', reason: err.message }));
+  }
+);
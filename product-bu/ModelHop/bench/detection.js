@@ -0,0 +1,237 @@
+#!/usr/bin/env node
+/**
+ * Benchmark: prompt detection cost while a long conversation streams
+ *
+ * Replays a TURNS-turn conversation into a jsdom page per platform: each turn
+ * appends the user message together with an empty answer, then streams the
+ * answer in CHUNKS mutation batches and marks it finished.
+ *
+ * - before: the previous detection (MutationObserver on document.body, full
+ *           getLastPrompt() rescan on every mutation batch)
+ * - after:  platforms/<name>.js + content.js as shipped
+ *
+ * Frames are driven by hand, one per streamed chunk (worst case for the
+ * frame-coalesced checks). Cost per mutation batch = observer callback time +
+ * frame callback time, divided by observer callbacks. After every turn the
+ * detected prompt is compared with the turn's prompt ("after" reads it back by
+ * clicking a hop button).
+ *
+ * Requires jsdom: npm install --no-save jsdom (in this folder) or NODE_PATH
+ *
+ * Usage: node bench/detection.js [turns] [chunks] [platform]
+ */
+
+const fs = require('fs');
+const path = require('path');
+const { performance } = require('perf_hooks');
+const { JSDOM, VirtualConsole } = require('jsdom');
+
+const TURNS = Number(process.argv[2]) || 500;
+const CHUNKS = Number(process.argv[3]) || 20;
+const ONLY = process.argv[4];
+
+const ROOT = path.join(__dirname, '..');
+
+// ============ Page fixtures (match the adapters' selectors) ============
+
+const FIXTURES = {
+  chatgpt: {
+    page: `<main><div class="thread"></div>
+      <form><textarea id="prompt-textarea"></textarea><button data-testid="send-button">Send</button></form></main>`,
+    thread: '.thread',
+    userTurn: (text) => `<article data-testid="conversation-turn"><div data-message-author-role="user">
+      <div class="whitespace-pre-wrap">${text}</div></div></article>`,
+    answerTurn: () => `<article data-testid="conversation-turn"><div data-message-author-role="assistant">
+      <div class="markdown result-streaming"></div></div></article>`,
+    answerBody: (turn) => turn.querySelector('.markdown'),
+    finish: (turn) => turn.querySelector('.markdown').classList.remove('result-streaming')
+  },
+  claude: {
+    page: `<main><div class="conversation"></div>
+      <div contenteditable="true" class="ProseMirror"></div><button aria-label="Send Message">Send</button></main>`,
+    thread: '.conversation',
+    userTurn: (text) => `<div data-testid="user-message" class="font-user-message"><p>${text}</p></div>`,
+    answerTurn: () => `<div class="font-claude-message" data-is-streaming="true">
+      <div class="prose"></div><div data-testid="action-bar"></div></div>`,
+    answerBody: (turn) => turn.querySelector('.prose'),
+    finish: (turn) => turn.setAttribute('data-is-streaming', 'false')
+  },
+  gemini: {
+    page: `<div id="app"><div id="chat-history"></div>
+      <div class="rich-textarea"><div class="ql-editor" contenteditable="true"></div></div>
+      <button class="send-button">Send</button></div>`,
+    thread: '#chat-history',
+    userTurn: (text) => `<div class="conversation-container"><user-query><div class="user-query">
+      <div class="query-text">${text}</div></div></user-query></div>`,
+    answerTurn: () => `<div class="conversation-container"><model-response>
+      <div class="response-content" aria-busy="true"><div class="model-response-text"></div></div></model-response></div>`,
+    answerBody: (turn) => turn.querySelector('.model-response-text'),
+    finish: (turn) => turn.querySelector('.response-content').setAttribute('aria-busy', 'false')
+  }
+};
+
+const PROMPTS = [
+  'Explain how MutationObserver batches records',
+  'Rewrite this function to avoid layout thrashing',
+  'Compare requestIdleCallback and requestAnimationFrame',
+  'Summarize the trade-offs of virtualized lists'
+];
+
+function chunkHtml(turn, chunk) {
+  return `<p>Turn ${turn}, part ${chunk}: <code>observer.observe(container)</code> keeps the callback away from unrelated subtrees, and <strong>coalescing</strong> keeps it off the hot path.</p>`;
+}
+
+// ============ Previous detection (before) ============
+
+// getLastPrompt() as it was before incremental detection
+const LEGACY_GET_LAST_PROMPT = {
+  chatgpt(document, adapter) {
+    const userMessages = document.querySelectorAll('[data-message-author-role="user"]');
+    if (userMessages.length > 0) {
+      const content = userMessages[userMessages.length - 1].querySelector('.markdown, .whitespace-pre-wrap');
+      if (content) return content.textContent.trim();
+    }
+    const input = adapter.getInputElement();
+    return input ? (input.value || input.textContent || '') : '';
+  },
+  claude(document, adapter) {
+    const userMessages = document.querySelectorAll('[data-testid="user-message"], .font-user-message');
+    if (userMessages.length > 0) return userMessages[userMessages.length - 1].textContent.trim();
+    const humanTurns = Array.from(document.querySelectorAll('[data-testid]')).filter(el =>
+      el.getAttribute('data-testid')?.includes('human') || el.getAttribute('data-testid')?.includes('user'));
+    if (humanTurns.length > 0) return humanTurns[humanTurns.length - 1].textContent.trim();
+    const input = adapter.getInputElement();
+    return input ? (input.textContent || input.innerText || '') : '';
+  },
+  gemini(document, adapter) {
+    for (const selector of ['.query-text', '.user-query', '[data-message-author="user"]', '.conversation-turn.user .message-content']) {
+      const messages = document.querySelectorAll(selector);
+      if (messages.length > 0) {
+        const text = messages[messages.length - 1].textContent.trim();
+        if (text) return text;
+      }
+    }
+    const input = adapter.getInputElement();
+    return input ? (input.value || input.textContent || input.innerText || '') : '';
+  }
+};
+
+function installLegacy(window, name) {
+  const adapter = window.ModelHopPlatform;
+  let lastDetectedPrompt = '';
+  const observer = new window.MutationObserver(() => {
+    const prompt = LEGACY_GET_LAST_PROMPT[name](window.document, adapter);
+    if (prompt && prompt !== lastDetectedPrompt) lastDetectedPrompt = prompt;
+  });
+  observer.observe(window.document.body, { childList: true, subtree: true });
+  return () => lastDetectedPrompt;
+}
+
+// ============ Runner ============
+
+async function runMode(name, mode) {
+  const fixture = FIXTURES[name];
+  const dom = new JSDOM(`<!DOCTYPE html><html><body>${fixture.page}</body></html>`, {
+    url: 'https://example.com/',
+    runScripts: 'outside-only',
+    pretendToBeVisual: true,
+    virtualConsole: new VirtualConsole()
+  });
+  const { window } = dom;
+  const stats = { callbacks: 0, frames: 0, totalMs: 0, maxMs: 0 };
+
+  const timed = (fn, args) => {
+    const start = performance.now();
+    fn(...args);
+    const ms = performance.now() - start;
+    stats.totalMs += ms;
+    stats.maxMs = Math.max(stats.maxMs, ms);
+  };
+
+  const NativeObserver = window.MutationObserver;
+  window.MutationObserver = function (callback) {
+    return new NativeObserver((...args) => {
+      stats.callbacks++;
+      timed(callback, args);
+    });
+  };
+
+  // Manual frames: content.js falls back to requestAnimationFrame without requestIdleCallback
+  const frameQueue = [];
+  window.requestIdleCallback = undefined;
+  window.requestAnimationFrame = (fn) => frameQueue.push(fn);
+  const frame = async () => {
+    await new Promise(resolve => setImmediate(resolve));
+    for (const fn of frameQueue.splice(0)) {
+      stats.frames++;
+      timed(fn, [performance.now()]);
+    }
+  };
+
+  const sent = [];
+  window.chrome = { runtime: { sendMessage: (message) => sent.push(message) } };
+
+  window.eval(fs.readFileSync(path.join(ROOT, 'platforms', `${name}.js`), 'utf8'));
+  let detected;
+  if (mode === 'before') {
+    detected = installLegacy(window, name);
+  } else {
+    window.eval(fs.readFileSync(path.join(ROOT, 'content.js'), 'utf8'));
+    detected = () => {
+      window.document.querySelector('.modelhop-btn[data-target]').click();
+      return sent.filter(m => m.action === 'hop').pop()?.prompt;
+    };
+  }
+  await frame();
+
+  const thread = window.document.querySelector(fixture.thread);
+  let mismatches = 0;
+  for (let turn = 0; turn < TURNS; turn++) {
+    const prompt = `Turn ${turn}: ${PROMPTS[turn % PROMPTS.length]}`;
+    thread.insertAdjacentHTML('beforeend', fixture.userTurn(prompt) + fixture.answerTurn());
+    const answer = thread.lastElementChild;
+    await frame();
+    for (let chunk = 0; chunk < CHUNKS; chunk++) {
+      fixture.answerBody(answer).insertAdjacentHTML('beforeend', chunkHtml(turn, chunk));
+      await frame();
+    }
+    fixture.finish(answer);
+    await frame();
+    if (detected() !== prompt) mismatches++;
+  }
+
+  const nodes = window.document.getElementsByTagName('*').length;
+  window.close();
+  return {
+    platform: name,
+    mode,
+    batches: stats.callbacks,
+    frames: stats.frames,
+    usPerBatch: Math.round(stats.totalMs * 1000 / Math.max(1, stats.callbacks)),
+    maxMs: +stats.maxMs.toFixed(2),
+    totalMs: Math.round(stats.totalMs),
+    domNodes: nodes,
+    mismatches
+  };
+}
+
+async function main() {
+  const names = ONLY ? [ONLY] : Object.keys(FIXTURES);
+  const rows = [];
+  for (const name of names) {
+    rows.push(await runMode(name, 'before'));
+    rows.push(await runMode(name, 'after'));
+  }
+
+  console.log(`turns: ${TURNS}, chunks/turn: ${CHUNKS}`);
+  console.table(rows);
+  const speedups = {};
+  for (const name of names) {
+    const [before, after] = rows.filter(r => r.platform === name);
+    speedups[name] = `${(before.usPerBatch / Math.max(1, after.usPerBatch)).toFixed(1)}x`;
+  }
+  console.log(JSON.stringify({ speedups, mismatches: rows.reduce((sum, r) => sum + r.mismatches, 0) }));
+  if (rows.some(r => r.mismatches > 0)) process.exitCode = 1;
+}
+
+main().catch(err => { console.error(err); process.exit(1); });
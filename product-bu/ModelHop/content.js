@@ -262,20 +262,132 @@
   // ============================================
   // Detection: Watch for user sending messages
   // ============================================
-  function setupDetection() {
-    // Observe DOM for new messages
-    const observer = new MutationObserver((mutations) => {
-      const prompt = platform.getLastPrompt();
-      if (prompt && prompt !== lastDetectedPrompt) {
-        lastDetectedPrompt = prompt;
-        showButtons();
+  // Observes only the conversation container and inspects only the nodes
+  // added since the last check, coalesced into one idle/frame callback.
+  // Mutations inside the answer being streamed are skipped in the observer
+  // callback itself: that subtree never contains a user turn.
+  const CONTAINER_POLL_MS = 1000;
+  const IDLE_TIMEOUT_MS = 200;
+
+  const detection = {
+    container: null,
+    observer: null,
+    userSelector: platform.selectors.userMessageVariants.join(', '),
+    streamingEl: null,
+    pendingNodes: [],
+    scheduled: false,
+    fullScan: false
+  };
+
+  const scheduleCallback = window.requestIdleCallback
+    ? (fn) => window.requestIdleCallback(fn, { timeout: IDLE_TIMEOUT_MS })
+    : (fn) => window.requestAnimationFrame(fn);
+
+  function updatePrompt(prompt) {
+    if (prompt && prompt !== lastDetectedPrompt) {
+      lastDetectedPrompt = prompt;
+      showButtons();
+    }
+  }
+
+  function scheduleCheck() {
+    if (detection.scheduled) return;
+    detection.scheduled = true;
+    scheduleCallback(runCheck);
+  }
+
+  function onMutations(mutations) {
+    const streamingEl = detection.streamingEl;
+    let added = false;
+    for (const mutation of mutations) {
+      if (streamingEl && streamingEl.contains(mutation.target)) continue;
+      for (const node of mutation.addedNodes) {
+        detection.pendingNodes.push(node);
+        added = true;
       }
-    });
-    
-    observer.observe(document.body, {
+    }
+    if (added) scheduleCheck();
+  }
+
+  /**
+   * Find the user message an added node belongs to or contains
+   */
+  function userMessageFor(node) {
+    if (node.nodeType !== Node.ELEMENT_NODE) {
+      // Text added to an existing turn (e.g. an edited prompt)
+      return node.parentElement ? node.parentElement.closest(detection.userSelector) : null;
+    }
+    const own = node.closest(detection.userSelector);
+    if (own) return platform.findLastUserMessage(own) || own;
+    // One combined query rules out the common case (answer chunks, UI chrome)
+    return node.querySelector(detection.userSelector) ? platform.findLastUserMessage(node) : null;
+  }
+
+  /**
+   * Find the streaming answer an added node is or contains
+   */
+  function streamingElFor(el) {
+    const selector = platform.selectors.streaming;
+    return el.matches(selector) ? el : el.querySelector(selector);
+  }
+
+  function runCheck() {
+    detection.scheduled = false;
+
+    // The answer finished (attribute flipped) or was re-rendered
+    const streamingEl = detection.streamingEl;
+    if (streamingEl && (!streamingEl.isConnected || !streamingEl.matches(platform.selectors.streaming))) {
+      detection.streamingEl = null;
+    }
+
+    const nodes = detection.pendingNodes;
+    detection.pendingNodes = [];
+
+    let message = null;
+    if (detection.fullScan) {
+      detection.fullScan = false;
+      message = platform.findLastUserMessage(detection.container);
+      detection.streamingEl = detection.container.querySelector(platform.selectors.streaming);
+    } else {
+      // Later nodes win: the newest user turn is appended last
+      for (const node of nodes) {
+        if (!node.isConnected) continue;
+        message = userMessageFor(node) || message;
+        if (!detection.streamingEl && node.nodeType === Node.ELEMENT_NODE) {
+          detection.streamingEl = streamingElFor(node);
+        }
+      }
+    }
+
+    if (message) {
+      updatePrompt(platform.getPromptText(message));
+    }
+  }
+
+  /**
+   * (Re)attach the observer when the conversation container appears or is replaced
+   */
+  function attachObserver() {
+    const container = document.querySelector(platform.selectors.conversation) || document.body;
+    if (container === detection.container) return;
+
+    if (detection.observer) detection.observer.disconnect();
+    detection.container = container;
+    detection.streamingEl = null;
+    detection.pendingNodes = [];
+    detection.fullScan = true;
+    detection.observer = new MutationObserver(onMutations);
+    detection.observer.observe(container, {
       childList: true,
       subtree: true
     });
+    scheduleCheck();
+  }
+
+  function setupDetection() {
+    attachObserver();
+    // SPA navigation can swap the container; polling one selector is cheap
+    setInterval(attachObserver, CONTAINER_POLL_MS);
     
     // Also listen for form submissions
     document.addEventListener('keydown', (e) => {
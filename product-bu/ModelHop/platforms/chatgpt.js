@@ -10,9 +10,16 @@ window.ModelHopPlatform = {
   selectors: {
     input: '#prompt-textarea, textarea[data-id="root"]',
     sendButton: '[data-testid="send-button"], button[aria-label="Send prompt"]',
-    userMessages: '[data-message-author-role="user"]',
-    messageContent: '.markdown, .whitespace-pre-wrap'
+    messageContent: '.markdown, .whitespace-pre-wrap',
+    // Observed by content.js instead of the whole body
+    conversation: 'main',
+    userMessageVariants: ['[data-message-author-role="user"]'],
+    // Answer element while it is streaming (content.js skips mutations inside it)
+    streaming: '.result-streaming'
   },
+
+  // Variant that matched last time, tried first
+  _userMessageSelector: null,
   
   /**
    * Get the input element
@@ -21,18 +28,38 @@ window.ModelHopPlatform = {
     return document.querySelector(this.selectors.input);
   },
   
+  /**
+   * Find the last user message element under root
+   */
+  findLastUserMessage(root = document) {
+    const variants = this.selectors.userMessageVariants;
+    const ordered = this._userMessageSelector ? [this._userMessageSelector, ...variants] : variants;
+    for (const selector of ordered) {
+      const messages = root.querySelectorAll(selector);
+      if (messages.length > 0) {
+        this._userMessageSelector = selector;
+        return messages[messages.length - 1];
+      }
+    }
+    return null;
+  },
+  
+  /**
+   * Get the prompt text from a user message element
+   */
+  getPromptText(message) {
+    const content = message.querySelector(this.selectors.messageContent);
+    return content ? content.textContent.trim() : '';
+  },
+  
   /**
    * Get the last prompt sent by the user
    */
   getLastPrompt() {
     // Try to get from the conversation
-    const userMessages = document.querySelectorAll(this.selectors.userMessages);
-    if (userMessages.length > 0) {
-      const lastMessage = userMessages[userMessages.length - 1];
-      const content = lastMessage.querySelector(this.selectors.messageContent);
-      if (content) {
-        return content.textContent.trim();
-      }
+    const lastMessage = this.findLastUserMessage();
+    if (lastMessage && lastMessage.querySelector(this.selectors.messageContent)) {
+      return this.getPromptText(lastMessage);
     }
     
     // Fallback: get from input field
@@ -10,9 +10,20 @@ window.ModelHopPlatform = {
   selectors: {
     input: '[contenteditable="true"].ProseMirror, div[contenteditable="true"]',
     sendButton: 'button[aria-label="Send Message"], button[type="submit"]',
-    userMessages: '[data-testid="user-message"], .font-user-message',
-    conversationTurn: '.font-claude-message'
+    conversationTurn: '.font-claude-message',
+    // Observed by content.js instead of the whole body
+    conversation: 'main',
+    // Tried in order; older UIs only expose the testid substring
+    userMessageVariants: [
+      '[data-testid="user-message"], .font-user-message',
+      '[data-testid*="human"], [data-testid*="user"]'
+    ],
+    // Answer element while it is streaming (content.js skips mutations inside it)
+    streaming: '[data-is-streaming="true"]'
   },
+
+  // Variant that matched last time, tried first
+  _userMessageSelector: null,
   
   /**
    * Get the input element
@@ -28,26 +39,37 @@ window.ModelHopPlatform = {
     return inputs[0] || null;
   },
   
+  /**
+   * Find the last user message element under root
+   */
+  findLastUserMessage(root = document) {
+    const variants = this.selectors.userMessageVariants;
+    const ordered = this._userMessageSelector ? [this._userMessageSelector, ...variants] : variants;
+    for (const selector of ordered) {
+      const messages = root.querySelectorAll(selector);
+      if (messages.length > 0) {
+        this._userMessageSelector = selector;
+        return messages[messages.length - 1];
+      }
+    }
+    return null;
+  },
+  
+  /**
+   * Get the prompt text from a user message element
+   */
+  getPromptText(message) {
+    return message.textContent.trim();
+  },
+  
   /**
    * Get the last prompt sent by the user
    */
   getLastPrompt() {
     // Try to get from conversation
-    const userMessages = document.querySelectorAll(this.selectors.userMessages);
-    if (userMessages.length > 0) {
-      const lastMessage = userMessages[userMessages.length - 1];
-      return lastMessage.textContent.trim();
-    }
-    
-    // Alternative: look for human turns in the conversation
-    const allTurns = document.querySelectorAll('[data-testid]');
-    const humanTurns = Array.from(allTurns).filter(el => 
-      el.getAttribute('data-testid')?.includes('human') ||
-      el.getAttribute('data-testid')?.includes('user')
-    );
-    
-    if (humanTurns.length > 0) {
-      return humanTurns[humanTurns.length - 1].textContent.trim();
+    const lastMessage = this.findLastUserMessage();
+    if (lastMessage) {
+      return this.getPromptText(lastMessage);
     }
     
     // Fallback: get from input
@@ -10,9 +10,22 @@ window.ModelHopPlatform = {
   selectors: {
     input: '.ql-editor, [contenteditable="true"], textarea.text-input',
     sendButton: 'button.send-button, button[aria-label="Send message"]',
-    userMessages: '.query-text, .user-query, [data-message-id] .query-content',
-    richTextarea: '.rich-textarea'
+    richTextarea: '.rich-textarea',
+    // Observed by content.js instead of the whole body
+    conversation: '#chat-history, .chat-history, main',
+    // Gemini has various UI versions, tried in order
+    userMessageVariants: [
+      '.query-text',
+      '.user-query',
+      '[data-message-author="user"]',
+      '.conversation-turn.user .message-content'
+    ],
+    // Answer element while it is streaming (content.js skips mutations inside it)
+    streaming: 'model-response [aria-busy="true"]'
   },
+
+  // Variant that matched last time, tried first
+  _userMessageSelector: null,
   
   /**
    * Get the input element
@@ -37,25 +50,40 @@ window.ModelHopPlatform = {
   },
   
   /**
-   * Get the last prompt sent by the user
+   * Find the last user message element under root
+   * A variant whose last message has no text falls through to the next one
    */
-  getLastPrompt() {
-    // Gemini has various UI versions, try multiple approaches
-    const selectors = [
-      '.query-text',
-      '.user-query',
-      '[data-message-author="user"]',
-      '.conversation-turn.user .message-content'
-    ];
-    
-    for (const selector of selectors) {
-      const messages = document.querySelectorAll(selector);
+  findLastUserMessage(root = document) {
+    const variants = this.selectors.userMessageVariants;
+    const ordered = this._userMessageSelector ? [this._userMessageSelector, ...variants] : variants;
+    for (const selector of ordered) {
+      const messages = root.querySelectorAll(selector);
       if (messages.length > 0) {
         const lastMessage = messages[messages.length - 1];
-        const text = lastMessage.textContent.trim();
-        if (text) return text;
+        if (!this.getPromptText(lastMessage)) continue;
+        this._userMessageSelector = selector;
+        return lastMessage;
       }
     }
+    return null;
+  },
+  
+  /**
+   * Get the prompt text from a user message element
+   */
+  getPromptText(message) {
+    return message.textContent.trim();
+  },
+  
+  /**
+   * Get the last prompt sent by the user
+   */
+  getLastPrompt() {
+    const lastMessage = this.findLastUserMessage();
+    if (lastMessage) {
+      const text = this.getPromptText(lastMessage);
+      if (text) return text;
+    }
     
     // Fallback: get from input
     const input = this.getInputElement();
@@ -6,21 +6,22 @@
  * 职责：检测 git worktree 操作 → 上报 PMO
  */
 
-const { handleEvent } = require('/Users/liuyishou/usr/pac/pmo/lib/handler');
+const { dispatchEvent } = require('../../pmo/lib/client');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-git');
 
 let input = '';
 process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
-    main(hookData);
+    const hookData = trace.parse(input);
+    main(hookData).catch(() => {});
   } catch (e) {
     // 静默失败
   }
 });
 
-function main(hookData) {
+async function main(hookData) {
   const { tool_name, tool_input, tool_output, session_id, cwd } = hookData;
 
   // 只处理 Bash 工具
@@ -42,7 +43,7 @@ function main(hookData) {
   const issueMatch = branch.match(/[PC]-\d+/);
 
   // 上报 PMO
-  const result = handleEvent({
+  const result = await dispatchEvent({
     type: 'git_worktree',
     bu: 'product',
     sessionId: session_id,
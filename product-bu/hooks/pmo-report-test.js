@@ -7,27 +7,13 @@
  * 职责：检测测试工作完成 → 启动 PMO Agent 创建测试类型 Issue
  */
 
-const { spawn } = require('child_process');
+const { submitAgentJob } = require('../../pmo/lib/client');
+const classifier = require('../../pmo/lib/classifier');
 const fs = require('fs');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-test');
 
-const PMO_DIR = '/Users/liuyishou/usr/pac/pmo';
-const CLAUDE_BIN = '/Users/liuyishou/.local/share/fnm/node-versions/v22.16.0/installation/bin/claude';
 const LOG_FILE = '/tmp/pmo-report-test.log';
 
-// 已知产品及其 Linear Project ID
-const PROJECTS = {
-  viva: {
-    name: 'Viva',
-    projectId: '50deb7b2-f67b-4dd4-b7e9-7809dd4229c0',
-    keywords: ['viva', 'VoiceType']
-  },
-  'vocab-highlighter': {
-    name: 'Vocab Highlighter',
-    projectId: null, // TODO
-    keywords: ['highlighter', 'vocab-highlighter']
-  }
-};
-
 function log(msg) {
   fs.appendFileSync(LOG_FILE, `[${new Date().toISOString()}] ${msg}\n`);
 }
@@ -38,7 +24,7 @@ process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
+    const hookData = trace.parse(input);
     main(hookData);
   } catch (e) {
     log(`Parse error: ${e.message}`);
@@ -46,18 +32,11 @@ process.stdin.on('end', () => {
 });
 
 /**
- * 从 cwd 匹配产品项目
+ * 从 cwd 匹配产品项目（关键词来自 pmo/rules/product-bu.md 项目名单）
  */
 function detectProject(cwd) {
   if (!cwd) return null;
-
-  const cwdLower = cwd.toLowerCase();
-  for (const [key, project] of Object.entries(PROJECTS)) {
-    if (project.keywords.some(kw => cwdLower.includes(kw.toLowerCase()))) {
-      return { key, ...project };
-    }
-  }
-  return null;
+  return classifier.matchProject('product', { cwd });
 }
 
 function main(hookData) {
@@ -105,13 +84,13 @@ function main(hookData) {
   };
 
   // 启动 PMO Agent 智能分析
-  callPmoAgent(event);
+  callPmoAgent(event).catch(e => log(`Schedule error: ${e.message}`));
 }
 
 /**
  * 启动 PMO Agent 智能分析并创建测试 Issue
  */
-function callPmoAgent(event) {
+async function callPmoAgent(event) {
   const prompt = `处理测试工作事件，创建 Linear Issue。
 
 ## 基本信息
@@ -158,28 +137,22 @@ node ~/.claude/skills/api-linear/linear-cli.js create \\
 
 直接执行，不要询问确认。完成后输出创建的 Issue 标识符。`;
 
-  // 移除 ANTHROPIC_API_KEY，让 claude 使用 Pro 订阅认证
-  const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
-
-  const child = spawn(CLAUDE_BIN, [
-    '--dangerously-skip-permissions',
-    '--model', 'haiku',
-    '--max-turns', '15'
-  ], {
-    cwd: PMO_DIR,
-    detached: true,
-    stdio: ['pipe', 'ignore', 'ignore'],
-    env: cleanEnv
+  const scheduled = await submitAgentJob({
+    kind: 'test',
+    bu: event.bu,
+    sessionId: event.sessionId,
+    prompt,
+    args: [
+      '--model', 'haiku',
+      '--max-turns', '15'
+    ]
   });
 
-  child.stdin.write(prompt);
-  child.stdin.end();
-  child.unref();
-
-  log('PMO Agent spawned for test report');
+  log(`PMO Agent job ${scheduled.result} for test report: ${scheduled.id || ''}`);
 
   console.log(JSON.stringify({
     result: 'success',
-    message: `PMO Agent spawned for ${event.project.name} test report`
+    scheduled: scheduled.result,
+    message: `PMO Agent job queued for ${event.project.name} test report`
   }));
 }
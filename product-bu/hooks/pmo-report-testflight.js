@@ -6,19 +6,20 @@
  * 职责：检测 TestFlight 部署成功 → 上报 PMO
  */
 
-const { handleEvent } = require('/Users/liuyishou/usr/pac/pmo/lib/handler');
+const { dispatchEvent } = require('../../pmo/lib/client');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-testflight');
 
 let input = '';
 process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
-    main(hookData);
+    const hookData = trace.parse(input);
+    main(hookData).catch(() => {});
   } catch (e) {}
 });
 
-function main(hookData) {
+async function main(hookData) {
   const { tool_name, tool_input, tool_output, session_id, cwd } = hookData;
 
   // 只处理 Skill 工具且是 api-deploy-testflight
@@ -30,7 +31,7 @@ function main(hookData) {
   const output = typeof tool_output === 'string' ? tool_output : JSON.stringify(tool_output || '');
   if (output.includes('失败') || output.includes('error') || output.includes('Error')) return;
 
-  const result = handleEvent({
+  const result = await dispatchEvent({
     type: 'deploy_testflight',
     bu: 'product',
     sessionId: session_id,
@@ -41,7 +42,7 @@ function main(hookData) {
     }
   });
 
-  if (result.result === 'created') {
-    console.log(`✅ PMO: TestFlight deploy tracked - ${result.issue?.identifier}`);
+  if (result.result === 'created' || result.result === 'queued') {
+    console.log(`✅ PMO: TestFlight deploy tracked - ${result.issue?.identifier || '已入队'}`);
   }
 }
@@ -6,19 +6,20 @@
  * 职责：检测 Web 部署成功 → 上报 PMO
  */
 
-const { handleEvent } = require('/Users/liuyishou/usr/pac/pmo/lib/handler');
+const { dispatchEvent } = require('../../pmo/lib/client');
+const trace = require('../../pmo/lib/tracing').hook('pmo-report-vercel');
 
 let input = '';
 process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
-    main(hookData);
+    const hookData = trace.parse(input);
+    main(hookData).catch(() => {});
   } catch (e) {}
 });
 
-function main(hookData) {
+async function main(hookData) {
   const { tool_name, tool_input, tool_output, session_id, cwd } = hookData;
 
   // 只处理 Skill 工具且是 api-deploy-static
@@ -33,7 +34,7 @@ function main(hookData) {
   // 判断是 Vercel 还是 Cloudflare
   const platform = output.includes('cloudflare') ? 'Cloudflare' : 'Vercel';
 
-  const result = handleEvent({
+  const result = await dispatchEvent({
     type: 'deploy_web',
     bu: 'product',
     sessionId: session_id,
@@ -44,7 +45,7 @@ function main(hookData) {
     }
   });
 
-  if (result.result === 'created') {
-    console.log(`✅ PMO: ${platform} deploy tracked - ${result.issue?.identifier}`);
+  if (result.result === 'created' || result.result === 'queued') {
+    console.log(`✅ PMO: ${platform} deploy tracked - ${result.issue?.identifier || '已入队'}`);
   }
 }
@@ -6,10 +6,8 @@
  * 职责：启动 PMO Agent 创建 Linear Issue
  */
 
-const { spawn } = require('child_process');
-
-const PMO_DIR = '/Users/liuyishou/usr/pac/pmo';
-const CLAUDE_BIN = '/Users/liuyishou/.local/share/fnm/node-versions/v22.16.0/installation/bin/claude';
+const { submitAgentJob } = require('../../pmo/lib/client');
+const trace = require('../../pmo/lib/tracing').hook('pmo-test-hook');
 
 // 从 stdin 读取 hook 输入
 let input = '';
@@ -17,7 +15,7 @@ process.stdin.setEncoding('utf8');
 process.stdin.on('data', chunk => input += chunk);
 process.stdin.on('end', () => {
   try {
-    const hookData = JSON.parse(input);
+    const hookData = trace.parse(input);
     main(hookData);
   } catch (e) {
     // 静默失败
@@ -49,10 +47,10 @@ function main(hookData) {
   };
 
   // 启动 PMO Agent
-  callPmoAgent(event);
+  callPmoAgent(event).catch(() => {});
 }
 
-function callPmoAgent(event) {
+async function callPmoAgent(event) {
   const prompt = `这是一个 PMO Agent 测试事件。请根据 CLAUDE.md 和 rules/product-bu.md 规范创建 Linear Issue。
 
 事件数据：
@@ -67,26 +65,20 @@ ${JSON.stringify(event, null, 2)}
 
 注意：这是后台任务，直接执行，不要询问确认。`;
 
-  // 移除 ANTHROPIC_API_KEY，让 claude 使用 Pro 订阅认证而非 API key
-  const { ANTHROPIC_API_KEY, ...cleanEnv } = process.env;
-
-  const child = spawn(CLAUDE_BIN, [
-    '--dangerously-skip-permissions',
-    '--model', 'haiku',
-    '--max-turns', '10'
-  ], {
-    cwd: PMO_DIR,
-    detached: true,
-    stdio: ['pipe', 'ignore', 'ignore'],
-    env: cleanEnv
+  const scheduled = await submitAgentJob({
+    kind: 'test',
+    bu: event.bu,
+    sessionId: event.sessionId,
+    prompt,
+    args: [
+      '--model', 'haiku',
+      '--max-turns', '10'
+    ]
   });
 
-  child.stdin.write(prompt);
-  child.stdin.end();
-  child.unref();
-
   console.log(JSON.stringify({
     result: 'success',
-    message: 'PMO Agent spawned for product-bu test'
+    scheduled: scheduled.result,
+    message: 'PMO Agent job queued for product-bu test'
   }));
 }